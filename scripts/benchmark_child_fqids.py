@@ -0,0 +1,79 @@
+"""Benchmark of child FQIDs storing.
+
+Compares size of a publisher event record and time of building the default events response, that
+includes child FQIDs, for a page of such events. Before, child FQIDs were stored inline in event
+data, now event data and child FQIDs packed to a separate record are stored and read separately.
+Run from the repository root:
+
+    PYTHONPATH=src python scripts/benchmark_child_fqids.py [child_fqids] [events]
+"""
+
+import sys
+import time
+import uuid
+
+from newsfeed.infrastructure.serializers import create_serializer
+from newsfeed.infrastructure.utils import pack_fqids, unpack_fqids
+
+
+ROUNDS = 10
+
+
+def create_event_data():
+    """Create serialized event data."""
+    return {
+        'id': str(uuid.uuid4()),
+        'newsfeed_id': 'publisher',
+        'data': {'payload': 'benchmark'},
+        'parent_fqid': None,
+        'first_seen_at': time.time(),
+        'published_at': time.time(),
+    }
+
+
+def measure(function, data):
+    """Return average duration of the function call in microseconds."""
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        function(data)
+    return (time.perf_counter() - start) / ROUNDS * 1000000
+
+
+def main(child_fqids_number, events_number):
+    """Run benchmark."""
+    serializer = create_serializer()
+    events_data = [create_event_data() for _ in range(events_number)]
+    child_fqids = [
+        (f'subscriber-{number}', str(uuid.uuid4()))
+        for number in range(child_fqids_number)
+    ]
+
+    inline_records = [serializer.dumps({**event_data, 'child_fqids': child_fqids}) for event_data in events_data]
+    separate_records = [(serializer.dumps(event_data), pack_fqids(child_fqids)) for event_data in events_data]
+
+    def respond_inline(records):
+        return serializer.dumps({'results': [serializer.loads(record) for record in records]})
+
+    def respond_separate(records):
+        results = []
+        for event_record, child_fqids_record in records:
+            result = serializer.loads(event_record)
+            result['child_fqids'] = unpack_fqids(child_fqids_record)
+            results.append(result)
+        return serializer.dumps({'results': results})
+
+    assert serializer.loads(respond_inline(inline_records)) == serializer.loads(respond_separate(separate_records))
+
+    print(f'Page of {events_number} events with {child_fqids_number} child FQIDs, {serializer.name} serializer')
+    print(f'{"inline":>10}: event record {len(inline_records[0]):10} bytes, '
+          f'response {measure(respond_inline, inline_records):12.1f} us')
+    print(f'{"separate":>10}: event record {len(separate_records[0][0]):10} bytes, '
+          f'child FQIDs record {len(separate_records[0][1])} bytes, '
+          f'response {measure(respond_separate, separate_records):12.1f} us')
+
+
+if __name__ == '__main__':
+    main(
+        child_fqids_number=int(sys.argv[1]) if len(sys.argv) > 1 else 1000,
+        events_number=int(sys.argv[2]) if len(sys.argv) > 2 else 200,
+    )
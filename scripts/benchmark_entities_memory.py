@@ -0,0 +1,156 @@
+"""Memory and allocation benchmark of event entities.
+
+Fans out events of a publisher with 1024 subscribers 1024 times the way event processor does and
+reads 1024 events newsfeed through entities, comparing current slotted entities with the previous
+implementation that had per-instance dictionaries, copied data on access and created FQID on every
+access. Run from the repository root:
+
+    PYTHONPATH=src python scripts/benchmark_entities_memory.py [subscribers] [events]
+"""
+
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Dict, Sequence
+from uuid import UUID, uuid4
+
+from newsfeed.domain.event import Event
+
+
+class LegacyEventFQID:
+    """Previous implementation of event FQID."""
+
+    def __init__(self, newsfeed_id, event_id):
+        """Initialize object."""
+        assert isinstance(newsfeed_id, str)
+        self.newsfeed_id = newsfeed_id
+
+        assert isinstance(event_id, UUID)
+        self.event_id = event_id
+
+
+class LegacyEvent:
+    """Previous implementation of event entity."""
+
+    def __init__(self, id, newsfeed_id, data, parent_fqid, child_fqids, first_seen_at,
+                 published_at):
+        """Initialize entity."""
+        assert isinstance(id, UUID)
+        self._id = id
+
+        assert isinstance(newsfeed_id, str)
+        self._newsfeed_id = newsfeed_id
+
+        assert isinstance(data, Dict)
+        self._data = data
+
+        if parent_fqid is not None:
+            assert isinstance(parent_fqid, LegacyEventFQID)
+        self._parent_fqid = parent_fqid
+
+        assert isinstance(child_fqids, Sequence)
+        for child_fqid in child_fqids:
+            assert isinstance(child_fqid, LegacyEventFQID)
+        self._child_fqids = list(child_fqids)
+
+        assert isinstance(first_seen_at, datetime)
+        self._first_seen_at = first_seen_at
+
+        self._published_at = published_at
+
+    @property
+    def fqid(self):
+        """Return FQID."""
+        return LegacyEventFQID(self._newsfeed_id, self._id)
+
+    @property
+    def child_fqids(self):
+        """Return list of child FQIDs."""
+        return list(self._child_fqids)
+
+    @property
+    def data(self):
+        """Return data."""
+        return dict(self._data)
+
+    def track_child_fqids(self, child_fqids):
+        """Track child FQIDs."""
+        assert isinstance(child_fqids, Sequence)
+        for child_fqid in child_fqids:
+            assert isinstance(child_fqid, LegacyEventFQID)
+        self._child_fqids.extend(child_fqids)
+
+
+def create_event(event_cls, newsfeed_id, data, parent_fqid=None):
+    """Create new event."""
+    return event_cls(
+        id=uuid4(),
+        newsfeed_id=newsfeed_id,
+        data=data,
+        parent_fqid=parent_fqid,
+        child_fqids=[],
+        first_seen_at=datetime.utcnow(),
+        published_at=None,
+    )
+
+
+def fan_out(event_cls, subscribers):
+    """Fan out event to subscribers the same way as event processor does."""
+    event = create_event(event_cls, 'publisher', {'payload': 'benchmark'})
+    subscriber_events = [
+        create_event(event_cls, subscriber, event.data, parent_fqid=event.fqid)
+        for subscriber in subscribers
+    ]
+    event.track_child_fqids([subscriber_event.fqid for subscriber_event in subscriber_events])
+    for child_fqid in event.child_fqids:
+        child_fqid.newsfeed_id
+    return [event] + subscriber_events
+
+
+def read_newsfeed(events):
+    """Access event attributes the same way as event processor and handlers do."""
+    return [(event.fqid, event.data, event.child_fqids) for event in events]
+
+
+def benchmark(event_cls, subscribers_number, events_number):
+    """Measure time and allocated memory of fan-outs and reads."""
+    subscribers = [f'subscriber-{number}' for number in range(subscribers_number)]
+
+    start = time.perf_counter()
+    for _ in range(events_number):
+        events = fan_out(event_cls, subscribers)
+        read_newsfeed(events)
+    duration = time.perf_counter() - start
+
+    tracemalloc.start()
+    events = fan_out(event_cls, subscribers)
+    fan_out_memory, _ = tracemalloc.get_traced_memory()
+    views = read_newsfeed(events)
+    read_memory = tracemalloc.get_traced_memory()[0] - fan_out_memory
+    tracemalloc.stop()
+    del views
+
+    return duration, fan_out_memory, read_memory
+
+
+def main(subscribers_number, events_number):
+    """Run benchmark."""
+    print(f'{events_number} events fanned out to {subscribers_number} subscribers each')
+    for event_cls in (LegacyEvent, Event):
+        duration, fan_out_memory, read_memory = benchmark(
+            event_cls,
+            subscribers_number,
+            events_number,
+        )
+        print(f'{event_cls.__name__:>12}: '
+              f'{duration:8.2f} s total, '
+              f'{fan_out_memory / 1024:10.1f} KiB per fan-out, '
+              f'{read_memory / 1024:10.1f} KiB allocated by reading it')
+
+
+if __name__ == '__main__':
+    main(
+        subscribers_number=int(sys.argv[1]) if len(sys.argv) > 1 else 1024,
+        events_number=int(sys.argv[2]) if len(sys.argv) > 2 else 1024,
+    )
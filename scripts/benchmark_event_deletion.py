@@ -0,0 +1,129 @@
+"""Benchmark of widely fanned-out event deletion from in-memory event storage.
+
+Compares current ``InMemoryEventStorage`` with the previous deque-based implementation that
+scanned newsfeeds linearly. Event is deleted the same way as event processor does, child FQIDs
+are asked from the storage, because storages keep them separately from event data. Run from the
+repository root:
+
+    PYTHONPATH=src python scripts/benchmark_event_deletion.py [subscribers] [events_per_newsfeed]
+"""
+
+import asyncio
+import sys
+import time
+import uuid
+from collections import defaultdict, deque
+
+from newsfeed.infrastructure.event_storages import InMemoryEventStorage, EventNotFound
+
+
+class LinearScanEventStorage(InMemoryEventStorage):
+    """Previous implementation of in-memory storage that scans newsfeed deques."""
+
+    def __init__(self, config):
+        """Initialize storage."""
+        super().__init__(config)
+        self._storage = defaultdict(deque)
+
+    async def get_by_fqid(self, newsfeed_id, event_id):
+        """Return data of specified event."""
+        for event in self._storage[newsfeed_id]:
+            if event['id'] == event_id:
+                return event
+        raise EventNotFound(newsfeed_id=newsfeed_id, event_id=event_id)
+
+    async def get_child_fqids(self, newsfeed_id, event_id):
+        """Return child FQIDs of specified event, they are kept in event data."""
+        event = await self.get_by_fqid(newsfeed_id, event_id)
+        return event['child_fqids']
+
+    async def add(self, event_data):
+        """Add event data to the storage."""
+        newsfeed_storage = self._storage[str(event_data['newsfeed_id'])]
+        if len(newsfeed_storage) >= self._max_events_per_newsfeed_id:
+            newsfeed_storage.pop()
+        newsfeed_storage.appendleft(event_data)
+
+    async def delete_by_fqid(self, newsfeed_id, event_id):
+        """Delete data of specified event."""
+        newsfeed_storage = self._storage[newsfeed_id]
+        for index, event in enumerate(newsfeed_storage):
+            if event['id'] == event_id:
+                del newsfeed_storage[index]
+                break
+
+
+def create_event_data(newsfeed_id, parent_fqid=None, child_fqids=()):
+    """Create serialized event data."""
+    return {
+        'id': str(uuid.uuid4()),
+        'newsfeed_id': newsfeed_id,
+        'data': {'payload': 'benchmark'},
+        'parent_fqid': parent_fqid,
+        'child_fqids': list(child_fqids),
+        'first_seen_at': time.time(),
+        'published_at': time.time(),
+    }
+
+
+async def fill_storage(storage, subscribers, events_per_newsfeed):
+    """Publish fanned-out event and bury its copies under newer events."""
+    child_events = [
+        create_event_data(newsfeed_id=f'subscriber-{number}')
+        for number in range(subscribers)
+    ]
+    parent_event = create_event_data(
+        newsfeed_id='publisher',
+        child_fqids=[(event['newsfeed_id'], event['id']) for event in child_events],
+    )
+
+    await storage.add(parent_event)
+    for child_event in child_events:
+        child_event['parent_fqid'] = ('publisher', parent_event['id'])
+        await storage.add(child_event)
+        for _ in range(events_per_newsfeed - 1):
+            await storage.add(create_event_data(newsfeed_id=child_event['newsfeed_id']))
+
+    return parent_event
+
+
+async def delete_event(storage, newsfeed_id, event_id):
+    """Delete event the same way as event processor does."""
+    await storage.get_by_fqid(newsfeed_id, event_id)
+    for child_newsfeed_id, child_event_id in await storage.get_child_fqids(newsfeed_id, event_id):
+        await storage.delete_by_fqid(child_newsfeed_id, child_event_id)
+    await storage.delete_by_fqid(newsfeed_id, event_id)
+
+
+async def benchmark(storage_cls, subscribers, events_per_newsfeed):
+    """Measure deletion time of fanned-out event."""
+    storage = storage_cls(
+        config={
+            'max_newsfeeds': subscribers + 2,
+            'max_events_per_newsfeed': events_per_newsfeed,
+        },
+    )
+    parent_event = await fill_storage(storage, subscribers, events_per_newsfeed)
+
+    start = time.perf_counter()
+    await delete_event(storage, parent_event['newsfeed_id'], parent_event['id'])
+    return time.perf_counter() - start
+
+
+async def main(subscribers, events_per_newsfeed):
+    """Run benchmark."""
+    print(f'Deleting event fanned out to {subscribers} newsfeeds '
+          f'with {events_per_newsfeed} events each')
+    for storage_cls in (LinearScanEventStorage, InMemoryEventStorage):
+        duration = await benchmark(storage_cls, subscribers, events_per_newsfeed)
+        print(f'{storage_cls.__name__:>24}: {duration * 1000:10.2f} ms')
+
+
+if __name__ == '__main__':
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(
+        main(
+            subscribers=int(sys.argv[1]) if len(sys.argv) > 1 else 1023,
+            events_per_newsfeed=int(sys.argv[2]) if len(sys.argv) > 2 else 1024,
+        ),
+    )
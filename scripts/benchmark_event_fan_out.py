@@ -0,0 +1,64 @@
+"""Benchmark of event fan-out with validation of every event and of posted event only.
+
+Fans out event to subscribers the same way as event processor does. Posted events are always
+validated when they are created from request data, events that service creates itself are not.
+For comparison, every created event is validated too, the way entity constructors used to check
+their attributes. Run from the repository root:
+
+    PYTHONPATH=src python scripts/benchmark_event_fan_out.py [subscribers] [rounds]
+"""
+
+import sys
+import time
+
+from newsfeed.domain.event import EventFactory
+
+
+def fan_out(event_factory, event_data, subscribers, validate_every_event):
+    """Fan out event to subscribers."""
+    event = event_factory.create_from_serialized(event_data)
+    subscriber_events = [
+        event_factory.create_child(parent=event, newsfeed_id=subscriber)
+        for subscriber in subscribers
+    ]
+    event.track_child_fqids([subscriber_event.fqid for subscriber_event in subscriber_events])
+
+    if validate_every_event:
+        for subscriber_event in subscriber_events:
+            subscriber_event.validate()
+        event.validate()
+
+    return [event] + subscriber_events
+
+
+def benchmark(subscribers_number, rounds, validate_every_event):
+    """Measure the best fan-out time."""
+    event_factory = EventFactory()
+    event_data = event_factory.create_new(
+        newsfeed_id='publisher',
+        data={'payload': 'benchmark'},
+    ).serialized_data
+    subscribers = [f'subscriber-{number}' for number in range(subscribers_number)]
+
+    durations = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fan_out(event_factory, event_data, subscribers, validate_every_event)
+        durations.append(time.perf_counter() - start)
+    return min(durations)
+
+
+def main(subscribers_number, rounds):
+    """Run benchmark."""
+    print(f'Fan-out of event to {subscribers_number} subscribers')
+    for validate_every_event in (True, False):
+        duration = benchmark(subscribers_number, rounds, validate_every_event)
+        validated = 'every event' if validate_every_event else 'posted event'
+        print(f'validated {validated:>12}: {duration * 1000:10.2f} ms per fan-out (best of {rounds})')
+
+
+if __name__ == '__main__':
+    main(
+        subscribers_number=int(sys.argv[1]) if len(sys.argv) > 1 else 10000,
+        rounds=int(sys.argv[2]) if len(sys.argv) > 2 else 20,
+    )
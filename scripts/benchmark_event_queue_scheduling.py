@@ -0,0 +1,73 @@
+"""Benchmark of event queue scheduling.
+
+Puts a burst of posts of a noisy newsfeed and a few posts and deletions of quiet newsfeeds to the
+queue, then measures the position at which messages of quiet newsfeeds are got with first-in
+first-out order and with the scheduling order of in-memory queue. Run from the repository root:
+
+    PYTHONPATH=src python scripts/benchmark_event_queue_scheduling.py [noisy_posts] [quiet_newsfeeds]
+"""
+
+import asyncio
+import sys
+import uuid
+
+from newsfeed.infrastructure.event_queues import InMemoryEventQueue
+
+
+def create_messages(noisy_posts, quiet_newsfeeds):
+    """Create messages in order of putting."""
+    messages = [
+        ('post', {'id': str(uuid.uuid4()), 'newsfeed_id': 'noisy'})
+        for _ in range(noisy_posts)
+    ]
+    for number in range(quiet_newsfeeds):
+        newsfeed_id = f'quiet-{number}'
+        messages.append(('post', {'id': str(uuid.uuid4()), 'newsfeed_id': newsfeed_id}))
+        messages.append(('delete', {'event_id': str(uuid.uuid4()), 'newsfeed_id': newsfeed_id}))
+    return messages
+
+
+async def get_positions(messages):
+    """Return positions at which messages of quiet newsfeeds are got from in-memory queue."""
+    queue = InMemoryEventQueue(config={'max_size': len(messages)})
+    for message in messages:
+        await queue.put(message)
+
+    positions = []
+    position = 0
+    while not await queue.is_empty():
+        _, data = await queue.get()
+        if data['newsfeed_id'] != 'noisy':
+            positions.append(position)
+        position += 1
+    return positions
+
+
+def print_positions(name, positions):
+    """Print position statistics."""
+    positions = sorted(positions)
+    print(f'{name:>10}: median position {positions[len(positions) // 2]:8}, '
+          f'worst position {positions[-1]:8}')
+
+
+async def main(noisy_posts, quiet_newsfeeds):
+    """Run benchmark."""
+    messages = create_messages(noisy_posts, quiet_newsfeeds)
+    print(f'{noisy_posts} posts of noisy newsfeed, then a post and a deletion '
+          f'of {quiet_newsfeeds} quiet newsfeeds')
+    print_positions('fifo', [
+        position
+        for position, (_, data) in enumerate(messages)
+        if data['newsfeed_id'] != 'noisy'
+    ])
+    print_positions('scheduled', await get_positions(messages))
+
+
+if __name__ == '__main__':
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(
+        main(
+            noisy_posts=int(sys.argv[1]) if len(sys.argv) > 1 else 10000,
+            quiet_newsfeeds=int(sys.argv[2]) if len(sys.argv) > 2 else 100,
+        ),
+    )
@@ -0,0 +1,108 @@
+"""Benchmark of newsfeed events reading.
+
+Compares serialization of newsfeed events through ``Event`` entities with the default response of
+events getting handler, that projects stored events data and includes their child FQIDs. Both
+variants produce the same response shape. Run from the repository root:
+
+    PYTHONPATH=src python scripts/benchmark_event_reading.py [events_per_newsfeed] [child_fqids]
+"""
+
+import asyncio
+import sys
+import time
+import uuid
+
+from aiohttp.test_utils import make_mocked_request
+
+from newsfeed.domain.event import EventFactory, EventRepository
+from newsfeed.handlers.events import _serialize_event, get_events_handler
+from newsfeed.infrastructure.event_storages import InMemoryEventStorage
+from newsfeed.infrastructure.serializers import create_serializer
+
+
+ROUNDS = 5
+
+
+def create_event_data(newsfeed_id, child_fqids):
+    """Create serialized event data."""
+    return {
+        'id': str(uuid.uuid4()),
+        'newsfeed_id': newsfeed_id,
+        'data': {'payload': 'benchmark'},
+        'parent_fqid': None,
+        'child_fqids': [
+            (f'subscriber-{number}', str(uuid.uuid4()))
+            for number in range(child_fqids)
+        ],
+        'first_seen_at': time.time(),
+        'published_at': time.time(),
+    }
+
+
+async def read_entities(repository, serializer, newsfeed_id):
+    """Read events the way handler did before, through event entities."""
+    events = await repository.get_by_newsfeed_id(newsfeed_id)
+    results = []
+    for event in events:
+        result = _serialize_event(event)
+        result['child_fqids'] = [
+            child_fqid.serialized_data
+            for child_fqid in await repository.get_child_fqids(event.fqid)
+        ]
+        results.append(result)
+    return serializer.dumps({'results': results, 'next_cursor': None})
+
+
+async def read_default_response(repository, serializer, newsfeed_id):
+    """Read events with events getting handler, child FQIDs are included by default."""
+    request = make_mocked_request(
+        'GET',
+        f'/newsfeed/{newsfeed_id}/events/',
+        match_info={'newsfeed_id': newsfeed_id},
+    )
+    response = await get_events_handler(request, event_repository=repository, serializer=serializer)
+    return response.body
+
+
+async def benchmark(read, repository, serializer, newsfeed_id, events_per_newsfeed):
+    """Measure number of events serialized per second."""
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        await read(repository, serializer, newsfeed_id)
+    return events_per_newsfeed * ROUNDS / (time.perf_counter() - start)
+
+
+async def main(events_per_newsfeed, child_fqids):
+    """Run benchmark."""
+    storage = InMemoryEventStorage(
+        config={
+            'max_newsfeeds': 2,
+            'max_events_per_newsfeed': events_per_newsfeed,
+        },
+    )
+    repository = EventRepository(factory=EventFactory(), storage=storage)
+    serializer = create_serializer()
+    await storage.add_many([
+        create_event_data('publisher', child_fqids)
+        for _ in range(events_per_newsfeed)
+    ])
+
+    entities_response = serializer.loads(await read_entities(repository, serializer, 'publisher'))
+    default_response = serializer.loads(await read_default_response(repository, serializer, 'publisher'))
+    assert entities_response == default_response
+
+    print(f'Reading newsfeed of {events_per_newsfeed} events '
+          f'with {child_fqids} child FQIDs each, {serializer.name} serializer')
+    for read in (read_entities, read_default_response):
+        events_per_second = await benchmark(read, repository, serializer, 'publisher', events_per_newsfeed)
+        print(f'{read.__name__:>21}: {events_per_second:12.0f} events/s')
+
+
+if __name__ == '__main__':
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(
+        main(
+            events_per_newsfeed=int(sys.argv[1]) if len(sys.argv) > 1 else 1024,
+            child_fqids=int(sys.argv[2]) if len(sys.argv) > 2 else 256,
+        ),
+    )
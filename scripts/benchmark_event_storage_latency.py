@@ -0,0 +1,104 @@
+"""Benchmark of redis event storage latency.
+
+Adds and deletes events one by one with Lua scripts of redis event storage and with separate
+commands, as the storage did before, and measures latency of every operation. Run from the
+repository root against a local redis-server:
+
+    PYTHONPATH=src python scripts/benchmark_event_storage_latency.py [events] [redis_dsn]
+"""
+
+import asyncio
+import sys
+import time
+import uuid
+
+from newsfeed.infrastructure.event_storages import RedisEventStorage
+from newsfeed.infrastructure.redis_clients import RedisClientManager
+from newsfeed.infrastructure.serializers import create_serializer
+
+
+DEFAULT_REDIS_DSN = 'redis://localhost:6379?db=2&connection_timeout=5&minsize=1&maxsize=1'
+
+
+async def add_with_commands(redis, serializer, event_data):
+    """Add event with existence check and transaction, as the storage did before scripts."""
+    if await redis.exists(f"event:{event_data['id']}"):
+        return
+    serialized_event_data = serializer.dumps(event_data)
+    transaction = redis.multi_exec()
+    transaction.lpush(f"newsfeed_id:{event_data['newsfeed_id']}", serialized_event_data)
+    transaction.append(f"event:{event_data['id']}", serialized_event_data)
+    await transaction.execute()
+
+
+async def delete_with_commands(redis, newsfeed_id, event_id):
+    """Delete event with separate commands, as the storage did before scripts."""
+    event = await redis.get(f'event:{event_id}')
+    await redis.lrem(f'newsfeed_id:{newsfeed_id}', 1, event)
+    await redis.delete(f'event:{event_id}', f'child_fqids:{event_id}')
+
+
+def print_latencies(name, latencies):
+    """Print latency statistics."""
+    latencies = sorted(latencies)
+    print(f'{name:>16}: p50 {latencies[len(latencies) // 2] * 1e6:8.1f} us, '
+          f'p99 {latencies[int(len(latencies) * 0.99)] * 1e6:8.1f} us, '
+          f'max {latencies[-1] * 1e6:8.1f} us')
+
+
+async def measure(operation, arguments):
+    """Return latencies of operation called with every of arguments."""
+    latencies = []
+    for argument in arguments:
+        start = time.perf_counter()
+        await operation(*argument)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def main(events_number, redis_dsn):
+    """Run benchmark."""
+    serializer = create_serializer()
+    redis_client_manager = RedisClientManager()
+    storage = RedisEventStorage(
+        config={'dsn': redis_dsn, 'max_newsfeeds': 1024, 'max_events_per_newsfeed': events_number},
+        serializer=serializer,
+        redis_client_manager=redis_client_manager,
+    )
+    redis_client = redis_client_manager.get_client(redis_dsn)
+    print(f'Adding and deleting {events_number} events')
+
+    events_data = [
+        {'id': str(uuid.uuid4()), 'newsfeed_id': 'benchmark', 'data': {'payload': 'benchmark'}}
+        for _ in range(events_number)
+    ]
+    async with redis_client.get_connection() as redis:
+        print_latencies('add, commands', await measure(
+            lambda event_data: add_with_commands(redis, serializer, event_data),
+            [(event_data,) for event_data in events_data],
+        ))
+        print_latencies('delete, commands', await measure(
+            lambda event_data: delete_with_commands(redis, 'benchmark', event_data['id']),
+            [(event_data,) for event_data in events_data],
+        ))
+
+    print_latencies('add, script', await measure(
+        storage.add,
+        [(event_data,) for event_data in events_data],
+    ))
+    print_latencies('delete, script', await measure(
+        storage.delete_by_fqid,
+        [('benchmark', event_data['id']) for event_data in events_data],
+    ))
+
+    await redis_client_manager.close()
+
+
+if __name__ == '__main__':
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(
+        main(
+            events_number=int(sys.argv[1]) if len(sys.argv) > 1 else 10000,
+            redis_dsn=sys.argv[2] if len(sys.argv) > 2 else DEFAULT_REDIS_DSN,
+        ),
+    )
@@ -0,0 +1,80 @@
+"""Benchmark of batch event posting.
+
+Dispatches events one by one, as posting handler does, and in batches, as batch posting handler
+does, and measures dispatching time. Events are put to in-memory queue, or to redis stream queue
+if its dsn is specified. Run from the repository root:
+
+    PYTHONPATH=src python scripts/benchmark_events_batch.py [events] [batch_size] [redis_dsn]
+"""
+
+import asyncio
+import sys
+import time
+
+from newsfeed.domain.event import EventFactory, EventSpecification
+from newsfeed.domain.event_dispatcher import EventDispatcherService
+from newsfeed.domain.newsfeed_id import NewsfeedIDSpecification
+from newsfeed.infrastructure.event_queues import InMemoryEventQueue, RedisStreamEventQueue
+from newsfeed.infrastructure.redis_clients import RedisClientManager
+from newsfeed.infrastructure.serializers import create_serializer
+
+
+def create_event_queue(events_number, redis_dsn, redis_client_manager):
+    """Create event queue that could accept all events."""
+    config = {'max_size': events_number}
+    if redis_dsn:
+        return RedisStreamEventQueue(
+            config={'dsn': redis_dsn, 'stream': 'benchmark_events_batch', **config},
+            serializer=create_serializer(),
+            redis_client_manager=redis_client_manager,
+        )
+    return InMemoryEventQueue(config=config)
+
+
+async def clear_event_queue(event_queue):
+    """Get and acknowledge all messages."""
+    while not await event_queue.is_empty():
+        await event_queue.acknowledge(await event_queue.get())
+
+
+async def main(events_number, batch_size, redis_dsn):
+    """Run benchmark."""
+    redis_client_manager = RedisClientManager()
+    event_queue = create_event_queue(events_number, redis_dsn, redis_client_manager)
+    event_dispatcher_service = EventDispatcherService(
+        event_factory=EventFactory(),
+        event_specification=EventSpecification(NewsfeedIDSpecification(max_length=128)),
+        event_queue=event_queue,
+    )
+    events_data = [
+        (f'newsfeed-{number % 100}', {'payload': 'benchmark'})
+        for number in range(events_number)
+    ]
+    print(f'Dispatching {events_number} events to {type(event_queue).__name__}')
+
+    start = time.perf_counter()
+    for newsfeed_id, data in events_data:
+        await event_dispatcher_service.dispatch_new_event(newsfeed_id, data)
+    duration = time.perf_counter() - start
+    print(f'{"one by one":>16}: {duration * 1000:10.2f} ms, {events_number / duration:10.0f} events/s')
+    await clear_event_queue(event_queue)
+
+    start = time.perf_counter()
+    for position in range(0, events_number, batch_size):
+        await event_dispatcher_service.dispatch_new_events(events_data[position:position + batch_size])
+    duration = time.perf_counter() - start
+    print(f'{f"batches of {batch_size}":>16}: {duration * 1000:10.2f} ms, '
+          f'{events_number / duration:10.0f} events/s')
+    await clear_event_queue(event_queue)
+    await redis_client_manager.close()
+
+
+if __name__ == '__main__':
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(
+        main(
+            events_number=int(sys.argv[1]) if len(sys.argv) > 1 else 10000,
+            batch_size=int(sys.argv[2]) if len(sys.argv) > 2 else 1000,
+            redis_dsn=sys.argv[3] if len(sys.argv) > 3 else None,
+        ),
+    )
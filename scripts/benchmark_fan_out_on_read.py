@@ -0,0 +1,104 @@
+"""Benchmark of fan-out-on-write and fan-out-on-read.
+
+Publishes events of a newsfeed with many subscribers with fan-out-on-read disabled and enabled,
+then reads newsfeed of a subscriber that follows it. Measures publishing time, number of stored
+events and reading time. Publishing time includes processing of fan-out chunks that event
+processor puts to the queue. Run from the repository root:
+
+    PYTHONPATH=src python scripts/benchmark_fan_out_on_read.py [subscribers] [events]
+"""
+
+import asyncio
+import sys
+import time
+
+from newsfeed.domain.event import EventFactory, EventRepository
+from newsfeed.domain.event_processor import EventProcessorService
+from newsfeed.domain.subscription import SubscriptionFactory, SubscriptionRepository
+from newsfeed.infrastructure.event_queues import InMemoryEventQueue
+from newsfeed.infrastructure.event_storages import InMemoryEventStorage
+from newsfeed.infrastructure.subscription_storages import InMemorySubscriptionStorage
+
+
+async def benchmark(subscribers_number, events_number, fan_out_on_read_threshold):
+    """Measure publishing and reading."""
+    event_storage = InMemoryEventStorage(
+        config={
+            'max_newsfeeds': subscribers_number + 2,
+            'max_events_per_newsfeed': events_number,
+        },
+    )
+    subscription_factory = SubscriptionFactory()
+    subscription_repository = SubscriptionRepository(
+        factory=subscription_factory,
+        storage=InMemorySubscriptionStorage(
+            config={
+                'max_newsfeeds': subscribers_number + 1,
+                'max_subscriptions_per_newsfeed': 1,
+            },
+        ),
+    )
+    event_factory = EventFactory()
+    event_repository = EventRepository(
+        factory=event_factory,
+        storage=event_storage,
+        subscription_repository=subscription_repository,
+        fan_out_on_read_threshold=fan_out_on_read_threshold,
+    )
+    event_processor_service = EventProcessorService(
+        event_queue=InMemoryEventQueue(config={'max_size': 0}),
+        event_factory=event_factory,
+        event_repository=event_repository,
+        subscription_repository=subscription_repository,
+        concurrency=1,
+    )
+
+    for number in range(subscribers_number):
+        await subscription_repository.add(
+            subscription_factory.create_new(
+                newsfeed_id=f'subscriber-{number}',
+                to_newsfeed_id='publisher',
+            ),
+        )
+
+    start = time.perf_counter()
+    for _ in range(events_number):
+        event = event_factory.create_new(newsfeed_id='publisher', data={'payload': 'benchmark'})
+        await event_processor_service.process_new_event(event.serialized_data)
+        # Fan-out chunks after the first one are put to the queue
+        while not await event_processor_service.event_queue.is_empty():
+            await event_processor_service.process_event()
+    publishing_duration = time.perf_counter() - start
+
+    stored_events_number = sum(len(newsfeed_storage) for newsfeed_storage in event_storage._storage.values())
+
+    start = time.perf_counter()
+    events = await event_repository.get_serialized_by_newsfeed_id('subscriber-0', limit=events_number)
+    reading_duration = time.perf_counter() - start
+    assert len(events) == events_number
+
+    return publishing_duration, stored_events_number, reading_duration
+
+
+async def main(subscribers_number, events_number):
+    """Run benchmark."""
+    print(f'Publishing {events_number} events to {subscribers_number} subscribers')
+    for name, threshold in (('fan-out-on-write', None), ('fan-out-on-read', subscribers_number - 1)):
+        publishing_duration, stored_events_number, reading_duration = await benchmark(
+            subscribers_number,
+            events_number,
+            threshold,
+        )
+        print(f'{name:>16}: publishing {publishing_duration * 1000:10.2f} ms, '
+              f'{stored_events_number:8} events stored, '
+              f'reading subscriber newsfeed {reading_duration * 1000:8.2f} ms')
+
+
+if __name__ == '__main__':
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(
+        main(
+            subscribers_number=int(sys.argv[1]) if len(sys.argv) > 1 else 10000,
+            events_number=int(sys.argv[2]) if len(sys.argv) > 2 else 10,
+        ),
+    )
@@ -0,0 +1,81 @@
+"""Micro-benchmark of serializer backends.
+
+Measures serialization and deserialization of event payloads the way they are used by the service:
+a single stored event, an events page and a queue message. Backends that are not installed are
+skipped. Run from the repository root:
+
+    PYTHONPATH=src python scripts/benchmark_serializers.py [events_per_page] [child_fqids]
+"""
+
+import sys
+import time
+import uuid
+
+from newsfeed.infrastructure.serializers import BACKENDS, create_serializer
+
+
+ROUNDS = 20
+
+
+def create_event_data(child_fqids):
+    """Create serialized event data."""
+    return {
+        'id': str(uuid.uuid4()),
+        'newsfeed_id': 'publisher',
+        'data': {
+            'title': 'Benchmark event',
+            'body': 'Event text with non-ASCII characters: café, Новини',
+            'payload_id': 835,
+        },
+        'parent_fqid': None,
+        'child_fqids': [
+            (f'subscriber-{number}', str(uuid.uuid4()))
+            for number in range(child_fqids)
+        ],
+        'first_seen_at': time.time(),
+        'published_at': time.time(),
+    }
+
+
+def measure(function, data):
+    """Return number of operations per second."""
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        function(data)
+    return ROUNDS / (time.perf_counter() - start)
+
+
+def main(events_per_page, child_fqids):
+    """Run benchmark."""
+    payloads = {
+        'event': create_event_data(child_fqids),
+        'page': {
+            'results': [create_event_data(child_fqids) for _ in range(events_per_page)],
+            'next_cursor': None,
+        },
+        'message': {
+            'newsfeed_id': 'publisher',
+            'event_id': str(uuid.uuid4()),
+        },
+    }
+
+    print(f'Payloads: page of {events_per_page} events with {child_fqids} child FQIDs each')
+    for backend in BACKENDS:
+        serializer = create_serializer(backend)
+        if serializer.name != backend:
+            print(f'{backend:>8}: not installed')
+            continue
+
+        for name, payload in payloads.items():
+            serialized_payload = serializer.dumps(payload)
+            dumps_per_second = measure(serializer.dumps, payload)
+            loads_per_second = measure(serializer.loads, serialized_payload)
+            print(f'{backend:>8} {name:>8}: '
+                  f'dumps {dumps_per_second:12.0f} ops/s, loads {loads_per_second:12.0f} ops/s')
+
+
+if __name__ == '__main__':
+    main(
+        events_per_page=int(sys.argv[1]) if len(sys.argv) > 1 else 1024,
+        child_fqids=int(sys.argv[2]) if len(sys.argv) > 2 else 256,
+    )
@@ -0,0 +1,98 @@
+"""Benchmark of batch subscription creating.
+
+Creates subscriptions of a social graph one by one, as subscription posting handler does, and in
+batches, as batch subscription posting handler does, and measures creating time. Subscriptions
+are stored in memory, or in redis if its dsn is specified. Run from the repository root:
+
+    PYTHONPATH=src python scripts/benchmark_subscriptions_batch.py [subscriptions] [batch_size] [redis_dsn]
+"""
+
+import asyncio
+import sys
+import time
+
+from newsfeed.domain.newsfeed_id import NewsfeedIDSpecification
+from newsfeed.domain.subscription import (
+    SubscriptionFactory,
+    SubscriptionRepository,
+    SubscriptionService,
+    SubscriptionSpecification,
+)
+from newsfeed.infrastructure.redis_clients import RedisClientManager
+from newsfeed.infrastructure.serializers import create_serializer
+from newsfeed.infrastructure.subscription_storages import (
+    InMemorySubscriptionStorage,
+    RedisSubscriptionStorage,
+)
+
+
+NEWSFEEDS_NUMBER = 1000
+
+
+def create_subscription_service(subscriptions_number, redis_dsn, redis_client_manager):
+    """Create subscription service with storage that could keep all subscriptions."""
+    config = {
+        'max_newsfeeds': 2 * NEWSFEEDS_NUMBER + 1,  # both runs could share the same redis database
+        'max_subscriptions_per_newsfeed': subscriptions_number,
+    }
+    if redis_dsn:
+        storage = RedisSubscriptionStorage(
+            config={'dsn': redis_dsn, **config},
+            serializer=create_serializer(),
+            redis_client_manager=redis_client_manager,
+        )
+    else:
+        storage = InMemorySubscriptionStorage(config=config)
+
+    factory = SubscriptionFactory()
+    return SubscriptionService(
+        factory=factory,
+        specification=SubscriptionSpecification(NewsfeedIDSpecification(max_length=128)),
+        repository=SubscriptionRepository(factory=factory, storage=storage),
+    )
+
+
+def create_pairs(subscriptions_number, prefix):
+    """Create pairs of newsfeed ids, every newsfeed follows the following ones in turn."""
+    return [
+        (
+            f'{prefix}-{number % NEWSFEEDS_NUMBER}',
+            f'{prefix}-{(number % NEWSFEEDS_NUMBER + number // NEWSFEEDS_NUMBER + 1) % NEWSFEEDS_NUMBER}',
+        )
+        for number in range(subscriptions_number)
+    ]
+
+
+async def main(subscriptions_number, batch_size, redis_dsn):
+    """Run benchmark."""
+    print(f'Creating {subscriptions_number} subscriptions between {NEWSFEEDS_NUMBER} newsfeeds')
+
+    redis_client_manager = RedisClientManager()
+    subscription_service = create_subscription_service(subscriptions_number, redis_dsn, redis_client_manager)
+    start = time.perf_counter()
+    for newsfeed_id, to_newsfeed_id in create_pairs(subscriptions_number, 'one-by-one'):
+        await subscription_service.create_subscription(newsfeed_id, to_newsfeed_id)
+    duration = time.perf_counter() - start
+    print(f'{"one by one":>16}: {duration * 1000:10.2f} ms, '
+          f'{subscriptions_number / duration:10.0f} subscriptions/s')
+
+    subscription_service = create_subscription_service(subscriptions_number, redis_dsn, redis_client_manager)
+    pairs = create_pairs(subscriptions_number, 'batches')
+    start = time.perf_counter()
+    for position in range(0, subscriptions_number, batch_size):
+        await subscription_service.create_subscriptions(pairs[position:position + batch_size])
+    duration = time.perf_counter() - start
+    print(f'{f"batches of {batch_size}":>16}: {duration * 1000:10.2f} ms, '
+          f'{subscriptions_number / duration:10.0f} subscriptions/s')
+    await redis_client_manager.close()
+
+
+if __name__ == '__main__':
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(
+        main(
+            subscriptions_number=int(sys.argv[1]) if len(sys.argv) > 1 else 10000,
+            batch_size=int(sys.argv[2]) if len(sys.argv) > 2 else 1000,
+            redis_dsn=sys.argv[3] if len(sys.argv) > 3 else None,
+        ),
+    )
@@ -2,14 +2,8 @@
 
 import os
 
-from aiohttp import web
-
-from .app import create_app
+from .supervisor import run_server
 
 
 if __name__ == '__main__':
-    app = create_app()
-    web.run_app(
-        app,
-        port=int(os.getenv('PORT', 8000)),
-    )
+    run_server(port=int(os.getenv('PORT', 8000)))
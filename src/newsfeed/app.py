@@ -1,37 +1,41 @@
 """Application module."""
 
+from typing import Optional
+
 from aiohttp import web
 
-from .containers import Container
+from .containers import Container, create_container, start_redis_clients
 from .routes import setup_routes
 from . import handlers
 
 
-def create_app() -> web.Application:
-    container = Container()
-
-    container.config.from_yaml('config/newsfeed.yml')
-    container.config.from_yaml('config/newsfeed.local.yml')
-    container.config.logging.from_yaml('config/logging.yml')
-    container.config.logging.from_yaml('config/logging.local.yml')
-
-    container.configure_logging()
-    container.configure_event_loop()
-
+def create_app(container: Optional[Container] = None) -> web.Application:
+    if container is None:
+        container = create_container()
     container.wire(packages=[handlers])
 
     app = web.Application()
     app.container = container
     setup_routes(app)
 
-    event_processor = container.event_processor_service()
-
     @app.on_startup.append
-    async def _on_startup(_: web.Application) -> None:
-        event_processor.start_processing()
+    async def _start_redis_clients(_: web.Application) -> None:
+        await start_redis_clients(container)
+
+    if container.config.webapi.run_processors():
+        event_processor = container.event_processor_service()
+
+        @app.on_startup.append
+        async def _on_startup(_: web.Application) -> None:
+            event_processor.start_processing()
+
+        @app.on_cleanup.append
+        async def _on_cleanup(_: web.Application) -> None:
+            event_processor.stop_processing()
 
+    # Registered after processors are stopped, cleanup callbacks are called in order of registration
     @app.on_cleanup.append
-    async def _on_cleanup(_: web.Application) -> None:
-        event_processor.stop_processing()
+    async def _close_redis_clients(_: web.Application) -> None:
+        await container.redis_client_manager().close()
 
     return app
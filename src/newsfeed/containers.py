@@ -5,7 +5,15 @@ import logging.config
 from dependency_injector import containers, providers
 
 from .loop import configure_event_loop
-from .infrastructure import event_queues, event_storages, subscription_storages
+from .infrastructure import (
+    event_queues,
+    event_storages,
+    subscription_storages,
+    idempotency_key_storages,
+    redis_clients,
+    serializers,
+    utils,
+)
 from .domain import newsfeed_id, event, subscription, event_processor, event_dispatcher
 
 
@@ -25,19 +33,70 @@ class Container(containers.DeclarativeContainer):
 
     # Infrastructure
 
-    event_queue = providers.Singleton(
-        event_queues.InMemoryEventQueue,
-        config=config.infrastructure.event_queue,
+    serializer = providers.Singleton(
+        serializers.create_serializer,
+        backend=config.infrastructure.serializer,
     )
 
-    event_storage = providers.Singleton(
-        event_storages.InMemoryEventStorage,
-        config=config.infrastructure.event_storage,
+    redis_client_manager = providers.Singleton(
+        redis_clients.RedisClientManager,
+        health_check_interval=config.infrastructure.redis.health_check_interval,
     )
 
-    subscription_storage = providers.Singleton(
-        subscription_storages.InMemorySubscriptionStorage,
-        config=config.infrastructure.subscription_storage,
+    event_queue = providers.Selector(
+        providers.Callable(utils.parse_dsn_scheme, config.infrastructure.event_queue.dsn),
+        memory=providers.Singleton(
+            event_queues.InMemoryEventQueue,
+            config=config.infrastructure.event_queue,
+        ),
+        redis=providers.Singleton(
+            event_queues.RedisStreamEventQueue,
+            config=config.infrastructure.event_queue,
+            serializer=serializer,
+            redis_client_manager=redis_client_manager,
+        ),
+    )
+
+    event_storage = providers.Selector(
+        providers.Callable(utils.parse_dsn_scheme, config.infrastructure.event_storage.dsn),
+        memory=providers.Singleton(
+            event_storages.InMemoryEventStorage,
+            config=config.infrastructure.event_storage,
+        ),
+        redis=providers.Singleton(
+            event_storages.RedisEventStorage,
+            config=config.infrastructure.event_storage,
+            serializer=serializer,
+            redis_client_manager=redis_client_manager,
+        ),
+    )
+
+    subscription_storage = providers.Selector(
+        providers.Callable(utils.parse_dsn_scheme, config.infrastructure.subscription_storage.dsn),
+        memory=providers.Singleton(
+            subscription_storages.InMemorySubscriptionStorage,
+            config=config.infrastructure.subscription_storage,
+        ),
+        redis=providers.Singleton(
+            subscription_storages.RedisSubscriptionStorage,
+            config=config.infrastructure.subscription_storage,
+            serializer=serializer,
+            redis_client_manager=redis_client_manager,
+        ),
+    )
+
+    idempotency_key_storage = providers.Selector(
+        providers.Callable(utils.parse_dsn_scheme, config.infrastructure.idempotency_key_storage.dsn),
+        memory=providers.Singleton(
+            idempotency_key_storages.InMemoryIdempotencyKeyStorage,
+            config=config.infrastructure.idempotency_key_storage,
+        ),
+        redis=providers.Singleton(
+            idempotency_key_storages.RedisIdempotencyKeyStorage,
+            config=config.infrastructure.idempotency_key_storage,
+            serializer=serializer,
+            redis_client_manager=redis_client_manager,
+        ),
     )
 
     # Domain
@@ -82,6 +141,8 @@ class Container(containers.DeclarativeContainer):
         event.EventRepository,
         factory=event_factory,
         storage=event_storage,
+        subscription_repository=subscription_repository,
+        fan_out_on_read_threshold=config.domain.fan_out_on_read_threshold,
     )
 
     # Domain -> Services
@@ -91,6 +152,7 @@ class Container(containers.DeclarativeContainer):
         event_factory=event_factory,
         event_specification=event_specification,
         event_queue=event_queue,
+        idempotency_key_storage=idempotency_key_storage,
     )
 
     event_processor_service = providers.Factory(
@@ -100,4 +162,29 @@ class Container(containers.DeclarativeContainer):
         event_repository=event_repository,
         subscription_repository=subscription_repository,
         concurrency=config.domain.processor_concurrency.as_int(),
+        fan_out_chunk_size=config.domain.fan_out_chunk_size.as_int(),
     )
+
+
+def create_container() -> Container:
+    """Create container, load its configuration and configure logging and event loop."""
+    container = Container()
+
+    container.config.from_yaml('config/newsfeed.yml')
+    container.config.from_yaml('config/newsfeed.local.yml')
+    container.config.logging.from_yaml('config/logging.yml')
+    container.config.logging.from_yaml('config/logging.local.yml')
+
+    container.configure_logging()
+    container.configure_event_loop()
+
+    return container
+
+
+async def start_redis_clients(container: Container) -> None:
+    """Create infrastructure components, so their redis clients are known, and start the clients."""
+    container.event_queue()
+    container.event_storage()
+    container.subscription_storage()
+    container.idempotency_key_storage()
+    await container.redis_client_manager().start()
@@ -2,24 +2,59 @@
 
 from __future__ import annotations
 
-from typing import Dict, List, Tuple, Sequence, Optional, Any
-from uuid import UUID, uuid4
+import asyncio
+import base64
+import heapq
+import json
+from itertools import islice
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Tuple, Sequence, Optional, Any, cast
+from uuid import UUID, uuid4, uuid5
 from datetime import datetime
 
-from newsfeed.infrastructure.event_storages import EventStorage
+from newsfeed.infrastructure.event_storages import EventStorage, EventNotFound
 from .newsfeed_id import NewsfeedIDSpecification
+from .subscription import Subscription, SubscriptionRepository
+from .error import DomainError
 
 
 class EventFQID:
-    """Event fully-qualified identifier."""
+    """Event fully-qualified identifier.
+
+    It is an immutable and hashable value object. FQIDs are created for every copy of event on
+    fan-out, so their attributes are not checked on creation, but by ``Event.validate()``.
+    """
+
+    __slots__ = ('_newsfeed_id', '_event_id')
 
     def __init__(self, newsfeed_id: str, event_id: UUID):
         """Initialize object."""
-        assert isinstance(newsfeed_id, str)
-        self.newsfeed_id = newsfeed_id
+        self._newsfeed_id = newsfeed_id
+        self._event_id = event_id
+
+    @property
+    def newsfeed_id(self) -> str:
+        """Return newsfeed id."""
+        return self._newsfeed_id
+
+    @property
+    def event_id(self) -> UUID:
+        """Return event id."""
+        return self._event_id
+
+    def __eq__(self, other: object) -> bool:
+        """Check if FQIDs are equal."""
+        if not isinstance(other, EventFQID):
+            return NotImplemented
+        return self._newsfeed_id == other._newsfeed_id and self._event_id == other._event_id
+
+    def __hash__(self) -> int:
+        """Return hash."""
+        return hash((self._newsfeed_id, self._event_id))
 
-        assert isinstance(event_id, UUID)
-        self.event_id = event_id
+    def __repr__(self) -> str:
+        """Return string representation."""
+        return f'{self.__class__.__name__}({self._newsfeed_id!r}, {self._event_id!r})'
 
     @classmethod
     def from_serialized_data(cls, data: Tuple[str, str]) -> EventFQID:
@@ -29,45 +64,49 @@ class EventFQID:
     @property
     def serialized_data(self) -> Tuple[str, str]:
         """Return serialized data."""
-        return self.newsfeed_id, str(self.event_id)
+        return self._newsfeed_id, str(self._event_id)
 
 
 class Event:
-    """Event entity."""
+    """Event entity.
+
+    Event data and child FQIDs are exposed as read-only views, so they are not copied on access.
+    """
+
+    __slots__ = (
+        '_id',
+        '_newsfeed_id',
+        '_fqid',
+        '_data',
+        '_parent_fqid',
+        '_child_fqids',
+        '_first_seen_at',
+        '_published_at',
+        '_fan_out_on_read',
+    )
 
     def __init__(self,
                  id: UUID,
                  newsfeed_id: str,
-                 data: Dict[Any, Any],
+                 data: Mapping[Any, Any],
                  parent_fqid: Optional[EventFQID],
                  child_fqids: Sequence[EventFQID],
                  first_seen_at: datetime,
-                 published_at: Optional[datetime]):
-        """Initialize entity."""
-        assert isinstance(id, UUID)
-        self._id = id
+                 published_at: Optional[datetime],
+                 fan_out_on_read: bool = False):
+        """Initialize entity.
 
-        assert isinstance(newsfeed_id, str)
+        Attributes are not validated, see ``validate()``.
+        """
+        self._id = id
         self._newsfeed_id = newsfeed_id
-
-        assert isinstance(data, Dict)
-        self._data = data
-
-        if parent_fqid is not None:
-            assert isinstance(parent_fqid, EventFQID)
+        self._fqid: Optional[EventFQID] = None
+        self._data: Mapping[Any, Any] = dict(data) if isinstance(data, MappingProxyType) else data
         self._parent_fqid = parent_fqid
-
-        assert isinstance(child_fqids, Sequence)
-        for child_fqid in child_fqids:
-            assert isinstance(child_fqid, EventFQID)
-        self._child_fqids = list(child_fqids)
-
-        assert isinstance(first_seen_at, datetime)
+        self._child_fqids = tuple(child_fqids)
         self._first_seen_at = first_seen_at
-
-        if published_at is not None:
-            assert isinstance(published_at, datetime)
         self._published_at = published_at
+        self._fan_out_on_read = fan_out_on_read
 
     @property
     def id(self) -> UUID:
@@ -82,7 +121,9 @@ class Event:
     @property
     def fqid(self) -> EventFQID:
         """Return FQID (Fully-Qualified ID)."""
-        return EventFQID(self.newsfeed_id, self.id)
+        if self._fqid is None:
+            self._fqid = EventFQID(self._newsfeed_id, self._id)
+        return self._fqid
 
     @property
     def parent_fqid(self) -> Optional[EventFQID]:
@@ -90,14 +131,14 @@ class Event:
         return self._parent_fqid
 
     @property
-    def child_fqids(self) -> Sequence[EventFQID]:
-        """Return list of child FQIDs."""
-        return list(self._child_fqids)
+    def child_fqids(self) -> Tuple[EventFQID, ...]:
+        """Return child FQIDs."""
+        return self._child_fqids
 
     @property
-    def data(self) -> Dict[Any, Any]:
-        """Return data."""
-        return dict(self._data)
+    def data(self) -> Mapping[Any, Any]:
+        """Return read-only view of data."""
+        return MappingProxyType(self._data)
 
     @property
     def first_seen_at(self) -> datetime:
@@ -109,19 +150,49 @@ class Event:
         """Return publishing time."""
         return self._published_at
 
+    @property
+    def fan_out_on_read(self) -> bool:
+        """Return true if event is not copied to subscriber newsfeeds, but merged on reading."""
+        return self._fan_out_on_read
+
     def track_publishing_time(self) -> None:
         """Track publishing time."""
         self._published_at = datetime.utcnow()
 
+    def track_fan_out_on_read(self) -> None:
+        """Track that event is merged into subscriber newsfeeds on reading."""
+        self._fan_out_on_read = True
+
     def track_child_fqids(self, child_fqids: Sequence[EventFQID]) -> None:
         """Track child FQIDs.
 
         This method accumulates child FQIDs.
         """
-        assert isinstance(child_fqids, Sequence)
-        for child_fqid in child_fqids:
-            assert isinstance(child_fqid, EventFQID)
-        self._child_fqids.extend(child_fqids)
+        self._child_fqids += tuple(child_fqids)
+
+    def validate(self) -> None:
+        """Validate types of attributes.
+
+        Validation is expensive for events with a lot of child FQIDs, so it is done only for
+        events that come from untrusted sources.
+        """
+        if not isinstance(self._id, UUID):
+            raise InvalidEventError(self._id, 'id')
+        if not isinstance(self._newsfeed_id, str):
+            raise InvalidEventError(self._id, 'newsfeed_id')
+        if not isinstance(self._data, dict):
+            raise InvalidEventError(self._id, 'data')
+        if self._parent_fqid is not None and not _is_valid_fqid(self._parent_fqid):
+            raise InvalidEventError(self._id, 'parent_fqid')
+        for child_fqid in self._child_fqids:
+            if not _is_valid_fqid(child_fqid):
+                raise InvalidEventError(self._id, 'child_fqids')
+        if not isinstance(self._first_seen_at, datetime):
+            raise InvalidEventError(self._id, 'first_seen_at')
+        if self._published_at is not None and not isinstance(self._published_at, datetime):
+            raise InvalidEventError(self._id, 'published_at')
+        if not isinstance(self._fan_out_on_read, bool):
+            raise InvalidEventError(self._id, 'fan_out_on_read')
 
     @property
     def serialized_data(self) -> Dict[str, Any]:
@@ -137,6 +208,7 @@ class Event:
             ],
             'first_seen_at': self._first_seen_at.timestamp(),
             'published_at': self._published_at.timestamp() if self._published_at else None,
+            'fan_out_on_read': self._fan_out_on_read,
         }
 
     @classmethod
@@ -153,26 +225,32 @@ class Event:
             ),
             child_fqids=[
                 EventFQID.from_serialized_data(child_fqid)
-                for child_fqid in data['child_fqids'] or []
+                for child_fqid in data.get('child_fqids') or []
             ],
             first_seen_at=datetime.utcfromtimestamp(data['first_seen_at']),
             published_at=(
                 datetime.utcfromtimestamp(data['published_at']) if data['published_at'] else None
             ),
+            fan_out_on_read=bool(data.get('fan_out_on_read')),
         )
 
 
 class EventFactory:
-    """Event entity factory."""
+    """Event entity factory.
+
+    New events are created from external data, so they are always validated. Events created from
+    data that service has serialized itself and child events created from already existing events
+    are not validated.
+    """
 
     cls = Event
 
     def create_new(self,
                    newsfeed_id: str,
-                   data: Dict[Any, Any],
+                   data: Mapping[Any, Any],
                    parent_fqid: Optional[EventFQID] = None) -> Event:
         """Create new instance."""
-        return self.cls(
+        event = self.cls(
             id=uuid4(),
             newsfeed_id=newsfeed_id,
             data=data,
@@ -181,9 +259,33 @@ class EventFactory:
             first_seen_at=datetime.utcnow(),
             published_at=None,
         )
+        event.validate()
+        return event
+
+    def create_child(self, parent: Event, newsfeed_id: str) -> Event:
+        """Create new instance of event that is a copy of parent event in another newsfeed."""
+        return self.cls(
+            id=self.create_child_fqid(parent, newsfeed_id).event_id,
+            newsfeed_id=newsfeed_id,
+            # Copies share data of parent event, read-only view of it would be copied by entity
+            data=parent._data,
+            parent_fqid=parent.fqid,
+            child_fqids=(),
+            first_seen_at=datetime.utcnow(),
+            published_at=None,
+        )
+
+    @staticmethod
+    def create_child_fqid(parent: Event, newsfeed_id: str) -> EventFQID:
+        """Create FQID of parent event copy in another newsfeed.
+
+        Event id is derived from parent event id and newsfeed id, so copying of event could be
+        retried without creating duplicates.
+        """
+        return EventFQID(newsfeed_id, uuid5(parent.id, newsfeed_id))
 
     def create_from_serialized(self, data: Dict[str, Any]) -> Event:
-        """Create instance from serialized data."""
+        """Create instance from data that service has serialized, e.g. loaded from queue or storage."""
         return self.cls.create_from_serialized(data)
 
 
@@ -201,24 +303,112 @@ class EventSpecification:
 
 
 class EventRepository:
-    """Event repository."""
+    """Event repository.
+
+    Events of newsfeeds that have more subscribers than fan-out-on-read threshold are not copied
+    to subscriber newsfeeds on publishing. Instead, they are merged into subscriber newsfeeds on
+    reading, so reading newsfeed is a k-way merge of the newsfeed itself and such subscriptions.
+    Newsfeeds are marked in the storage when their first event is fanned out on read, so their
+    events are merged even if their number of subscribers drops below the threshold later.
+    """
 
-    def __init__(self, factory: EventFactory, storage: EventStorage):
+    def __init__(self,
+                 factory: EventFactory,
+                 storage: EventStorage,
+                 subscription_repository: Optional[SubscriptionRepository] = None,
+                 fan_out_on_read_threshold: Optional[int] = None):
         """Initialize repository."""
-        assert isinstance(factory, EventFactory)
         self._factory = factory
-
-        assert isinstance(storage, EventStorage)
         self._storage = storage
+        self._subscription_repository = subscription_repository
+
+        self._fan_out_on_read_threshold = (
+            int(fan_out_on_read_threshold) if fan_out_on_read_threshold else None
+        )
 
-    async def get_by_newsfeed_id(self, newsfeed_id: str) -> List[Event]:
-        """Return events of specified newsfeed."""
-        newsfeed_events_data = await self._storage.get_by_newsfeed_id(newsfeed_id)
+    async def get_by_newsfeed_id(
+            self,
+            newsfeed_id: str,
+            limit: Optional[int] = None,
+            cursor: Optional[str] = None,
+    ) -> List[Event]:
+        """Return events of specified newsfeed, newest first.
+
+        Cursor is a value returned by ``get_next_cursor()`` for the previous page.
+        """
+        newsfeed_events_data = await self.get_serialized_by_newsfeed_id(
+            newsfeed_id=newsfeed_id,
+            limit=limit,
+            cursor=cursor,
+        )
         return [
             self._factory.create_from_serialized(event_data)
             for event_data in newsfeed_events_data
         ]
 
+    async def get_serialized_by_newsfeed_id(
+            self,
+            newsfeed_id: str,
+            limit: Optional[int] = None,
+            cursor: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Return serialized data of newsfeed events, newest first, without creating entities.
+
+        It is a read-optimized path for cases when events are not modified, but only presented.
+        """
+        before, positions = _decode_cursor(cursor)
+
+        sources = [
+            self._read_newsfeed(
+                newsfeed_id=newsfeed_id,
+                limit=limit,
+                after_event_id=positions.get(newsfeed_id),
+                before=before,
+            ),
+        ]
+        for subscription in await self._get_fanned_out_on_read_subscriptions(newsfeed_id):
+            sources.append(
+                self._read_newsfeed(
+                    newsfeed_id=subscription.to_newsfeed_id,
+                    limit=limit,
+                    after_event_id=positions.get(subscription.to_newsfeed_id),
+                    before=before,
+                    subscribed_at=subscription.subscribed_at,
+                ),
+            )
+
+        if len(sources) == 1:
+            return await sources[0]
+
+        # Every newsfeed is read in its storage order, newest added first. Publishing time is
+        # tracked right before adding, so storage order mostly follows it, but it could differ,
+        # e.g. when events are added by concurrent processors. Merging does not reorder events of
+        # any newsfeed, it only interleaves newsfeeds by publishing time of their next events
+
+        sources_events_data = await asyncio.gather(*sources)
+        merged_events_data = heapq.merge(*sources_events_data, key=_get_publishing_time, reverse=True)
+        return list(islice(merged_events_data, limit))
+
+    @staticmethod
+    def get_next_cursor(events_data: Sequence[Dict[str, Any]], cursor: Optional[str] = None) -> str:
+        """Return cursor of the page that follows specified events.
+
+        Cursor keeps position of the last returned event in every merged newsfeed and publishing
+        time of the last returned event, so it is valid even if events it points to are deleted.
+        """
+        _, positions = _decode_cursor(cursor)
+        for event_data in events_data:
+            positions[str(event_data['newsfeed_id'])] = str(event_data['id'])
+        before = _get_publishing_time(events_data[-1]) if events_data else None
+        return _encode_cursor(before, positions)
+
+    async def is_fanned_out_on_read(self, newsfeed_id: str) -> bool:
+        """Check if events of newsfeed should be merged into subscriber newsfeeds on reading."""
+        if self._subscription_repository is None or self._fan_out_on_read_threshold is None:
+            return False
+        subscribers_numbers = await self._subscription_repository.count_subscribers([newsfeed_id])
+        return subscribers_numbers[newsfeed_id] > self._fan_out_on_read_threshold
+
     async def get_by_fqid(self, fqid: EventFQID) -> Event:
         """Return event by its FQID."""
         event_data = await self._storage.get_by_fqid(
@@ -227,13 +417,185 @@ class EventRepository:
         )
         return self._factory.create_from_serialized(event_data)
 
+    async def get_child_fqids(self, fqid: EventFQID) -> List[EventFQID]:
+        """Return child FQIDs of event.
+
+        Child FQIDs are not loaded with events, so they have to be requested separately.
+        """
+        child_fqids = await self._storage.get_child_fqids(
+            newsfeed_id=fqid.newsfeed_id,
+            event_id=str(fqid.event_id),
+        )
+        return [
+            EventFQID(newsfeed_id, UUID(event_id))
+            for newsfeed_id, event_id in child_fqids
+        ]
+
+    async def get_serialized_child_fqids_many(
+            self,
+            fqids: Sequence[Tuple[str, str]],
+    ) -> List[List[Tuple[str, str]]]:
+        """Return serialized child FQIDs of multiple events at once, without creating entities.
+
+        FQIDs are serialized as pairs of newsfeed id and event id, in order of event FQIDs.
+        """
+        return await self._storage.get_child_fqids_many(fqids)
+
     async def add(self, event: Event) -> None:
         """Add event to repository."""
+        if event.fan_out_on_read:
+            await self._storage.add_fan_out_on_read_newsfeed(event.newsfeed_id)
         await self._storage.add(event.serialized_data)
 
+    async def add_many(self, events: Sequence[Event], parent_fqid: Optional[EventFQID] = None) -> None:
+        """Add multiple events to repository at once.
+
+        If parent FQID is specified, events are added only if parent event still exists.
+        """
+        for newsfeed_id in {event.newsfeed_id for event in events if event.fan_out_on_read}:
+            await self._storage.add_fan_out_on_read_newsfeed(newsfeed_id)
+        await self._storage.add_many(
+            [event.serialized_data for event in events],
+            parent_fqid=parent_fqid.serialized_data if parent_fqid is not None else None,
+        )
+
     async def delete_by_fqid(self, fqid: EventFQID) -> None:
         """Delete event by its FQID."""
         await self._storage.delete_by_fqid(
             newsfeed_id=fqid.newsfeed_id,
             event_id=str(fqid.event_id),
         )
+
+    async def record_deletion(self, fqid: EventFQID) -> None:
+        """Record deletion of event, so event is not added if its posting is processed later."""
+        await self._storage.record_deletion(
+            newsfeed_id=fqid.newsfeed_id,
+            event_id=str(fqid.event_id),
+        )
+
+    async def _get_fanned_out_on_read_subscriptions(self, newsfeed_id: str) -> List[Subscription]:
+        if self._subscription_repository is None or self._fan_out_on_read_threshold is None:
+            return []
+
+        subscriptions = await self._subscription_repository.get_by_newsfeed_id(newsfeed_id)
+        fan_out_on_read_newsfeed_ids = await self._storage.get_fan_out_on_read_newsfeeds(
+            [subscription.to_newsfeed_id for subscription in subscriptions],
+        )
+        return [
+            subscription
+            for subscription in subscriptions
+            if subscription.to_newsfeed_id in fan_out_on_read_newsfeed_ids
+        ]
+
+    async def _read_newsfeed(
+            self,
+            newsfeed_id: str,
+            limit: Optional[int],
+            after_event_id: Optional[str],
+            before: Optional[float],
+            subscribed_at: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        # Events published after the previous page are skipped, unless newsfeed is read from the
+        # position of its last returned event. They are added after the previous page has been
+        # read, so only the leading ones are skipped, older events that were added out of
+        # publishing order are kept. If subscribed_at is specified, only events that are fanned out
+        # on read since that time are returned
+        events_data: List[Dict[str, Any]] = []
+        skip_newer_events = after_event_id is None and before is not None
+        while True:
+            try:
+                newsfeed_events_data = list(
+                    await self._storage.get_by_newsfeed_id(
+                        newsfeed_id=newsfeed_id,
+                        limit=limit,
+                        after_event_id=after_event_id,
+                    ),
+                )
+            except EventNotFound:
+                if events_data:
+                    return events_data
+                # Event the cursor points to has been deleted, so newsfeed is read from the top
+                after_event_id = None
+                skip_newer_events = before is not None
+                continue
+
+            for event_data in newsfeed_events_data:
+                if skip_newer_events:
+                    if _get_publishing_time(event_data) > cast(float, before):
+                        continue
+                    skip_newer_events = False
+                if subscribed_at is not None and not _is_fanned_out_on_read_since(event_data, subscribed_at):
+                    continue
+                events_data.append(event_data)
+
+            if limit is None or len(newsfeed_events_data) < limit or len(events_data) >= limit:
+                return events_data[:limit]
+            after_event_id = str(newsfeed_events_data[-1]['id'])
+
+
+def _is_valid_fqid(fqid: Any) -> bool:
+    if not isinstance(fqid, EventFQID):
+        return False
+    return isinstance(fqid.newsfeed_id, str) and isinstance(fqid.event_id, UUID)
+
+
+def _get_publishing_time(event_data: Dict[str, Any]) -> float:
+    return float(event_data['published_at'] or event_data['first_seen_at'])
+
+
+def _is_fanned_out_on_read_since(event_data: Dict[str, Any], subscribed_at: datetime) -> bool:
+    return bool(event_data.get('fan_out_on_read')) \
+        and datetime.utcfromtimestamp(_get_publishing_time(event_data)) >= subscribed_at
+
+
+def _encode_cursor(before: Optional[float], positions: Dict[str, str]) -> str:
+    data = json.dumps({'before': before, 'positions': positions}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii')
+
+
+def _decode_cursor(cursor: Optional[str]) -> Tuple[Optional[float], Dict[str, str]]:
+    if cursor is None:
+        return None, {}
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        before = float(data['before']) if data['before'] is not None else None
+        positions = {str(newsfeed_id): str(UUID(event_id)) for newsfeed_id, event_id in data['positions'].items()}
+    except (ValueError, TypeError, KeyError, AttributeError):
+        raise InvalidEventCursorError(cursor)
+    return before, positions
+
+
+class EventError(DomainError):
+    """Event-related error."""
+
+    @property
+    def message(self) -> str:
+        """Return error message."""
+        return 'Newsfeed event error'
+
+
+class InvalidEventError(EventError):
+    """Error indicating situations when event attribute has invalid type."""
+
+    def __init__(self, event_id: Any, attribute: str):
+        """Initialize error."""
+        self._event_id = event_id
+        self._attribute = attribute
+
+    @property
+    def message(self) -> str:
+        """Return error message."""
+        return f'Event "{self._event_id}" has invalid "{self._attribute}"'
+
+
+class InvalidEventCursorError(EventError):
+    """Error indicating situations when events pagination cursor is invalid."""
+
+    def __init__(self, cursor: str):
+        """Initialize error."""
+        self._cursor = cursor
+
+    @property
+    def message(self) -> str:
+        """Return error message."""
+        return f'Cursor "{self._cursor}" is invalid'
@@ -1,10 +1,15 @@
 """Event dispatcher module."""
 
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Union
 
-from newsfeed.infrastructure.event_queues import EventQueue
+from newsfeed.infrastructure.event_queues import EventQueue, QueueFull
+from newsfeed.infrastructure.idempotency_key_storages import IdempotencyKeyStorage
 
-from .event import Event, EventFactory, EventSpecification
+from .error import DomainError
+from .event import Event, EventFactory, EventSpecification, EventError
+
+
+DispatchResult = Union[Event, DomainError, QueueFull]
 
 
 class EventDispatcherService:
@@ -13,7 +18,8 @@ class EventDispatcherService:
     def __init__(self,
                  event_factory: EventFactory,
                  event_specification: EventSpecification,
-                 event_queue: EventQueue):
+                 event_queue: EventQueue,
+                 idempotency_key_storage: Optional[IdempotencyKeyStorage] = None):
         """Initialize service."""
         assert isinstance(event_factory, EventFactory)
         self._event_factory = event_factory
@@ -24,16 +30,88 @@ class EventDispatcherService:
         assert isinstance(event_queue, EventQueue)
         self._event_queue = event_queue
 
-    async def dispatch_new_event(self, newsfeed_id: str, data: Dict[Any, Any]) -> Event:
-        """Dispatch posting of new event."""
+        if idempotency_key_storage is not None:
+            assert isinstance(idempotency_key_storage, IdempotencyKeyStorage)
+        self._idempotency_key_storage = idempotency_key_storage
+
+    async def dispatch_new_event(self, newsfeed_id: str, data: Dict[Any, Any],
+                                 idempotency_key: Optional[str] = None) -> Event:
+        """Dispatch posting of new event.
+
+        If idempotency key is specified and event has already been dispatched with the same key,
+        the original event is returned and nothing is dispatched.
+        """
         event = self._event_factory.create_new(
             newsfeed_id=newsfeed_id,
             data=data,
         )
         self._event_specification.is_satisfied_by(event)
-        await self._event_queue.put(('post', event.serialized_data))
+
+        if idempotency_key is None or self._idempotency_key_storage is None:
+            await self._event_queue.put(('post', event.serialized_data))
+            return event
+
+        key = f'{newsfeed_id}:{idempotency_key}'
+        original_event_data = await self._idempotency_key_storage.add(key, event.serialized_data)
+        if original_event_data is not None:
+            if original_event_data['data'] != event.data:
+                raise IdempotencyKeyReusedError(idempotency_key)
+            return self._event_factory.create_from_serialized(original_event_data)
+
+        try:
+            await self._event_queue.put(('post', event.serialized_data))
+        except Exception:
+            await self._idempotency_key_storage.delete(key)
+            raise
         return event
 
+    async def dispatch_new_events(
+            self,
+            events_data: Sequence[Tuple[str, Dict[Any, Any]]],
+    ) -> List[DispatchResult]:
+        """Dispatch posting of multiple new events at once.
+
+        Events data are pairs of newsfeed id and event data. Results are returned in the same
+        order: dispatched event, error of invalid event or error of queue that has not accepted
+        event.
+        """
+        results: List[DispatchResult] = []
+        events: List[Event] = []
+        positions: List[int] = []
+        for newsfeed_id, data in events_data:
+            try:
+                event = self._event_factory.create_new(
+                    newsfeed_id=newsfeed_id,
+                    data=data,
+                )
+                self._event_specification.is_satisfied_by(event)
+            except DomainError as exception:
+                results.append(exception)
+                continue
+            positions.append(len(results))
+            events.append(event)
+            results.append(event)
+
+        accepted_number = await self._event_queue.put_many(
+            [('post', event.serialized_data) for event in events],
+        )
+        for position in positions[accepted_number:]:
+            results[position] = self._event_queue.get_full_error()
+        return results
+
     async def dispatch_event_deletion(self, newsfeed_id: str, event_id: str) -> None:
         """Dispatch deletion of existing event."""
         await self._event_queue.put(('delete', {'newsfeed_id': newsfeed_id, 'event_id': event_id}))
+
+
+class IdempotencyKeyReusedError(EventError):
+    """Error indicating situations when idempotency key is reused for another event."""
+
+    def __init__(self, idempotency_key: str):
+        """Initialize error."""
+        self._idempotency_key = idempotency_key
+
+    @property
+    def message(self) -> str:
+        """Return error message."""
+        return f'Idempotency key "{self._idempotency_key}" has been used for another event'
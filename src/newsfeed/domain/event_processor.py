@@ -2,15 +2,20 @@
 
 import asyncio
 import dataclasses
+import logging
 from uuid import UUID
-from typing import List, Dict, Any
+from typing import List, Dict, Sequence, Any
 
 from newsfeed.infrastructure.event_queues import EventQueue
+from newsfeed.infrastructure.event_storages import EventNotFound
 
-from .event import EventFactory, EventRepository, EventFQID
+from .event import Event, EventFactory, EventRepository, EventFQID
 from .subscription import SubscriptionRepository
 
 
+logger = logging.getLogger(__name__)
+
+
 @dataclasses.dataclass
 class EventProcessorService:
 
@@ -19,6 +24,7 @@ class EventProcessorService:
     event_repository: EventRepository
     subscription_repository: SubscriptionRepository
     concurrency: int
+    fan_out_chunk_size: int = 1000
 
     _tasks: List['asyncio.Task[None]'] = dataclasses.field(default_factory=list)
 
@@ -36,56 +42,142 @@ class EventProcessorService:
         self._tasks.clear()
 
     async def process_event(self) -> None:
-        """Process event."""
-        action, data = await self.event_queue.get()
-
-        if action == 'post':
-            await self.process_new_event(data)
-        elif action == 'delete':
-            await self.process_event_deletion(data)
-        else:
-            ...
+        """Process event.
+
+        Message that fails to be processed is logged and rejected, so queue delivers it again or
+        moves it to dead letters, and processing of other messages goes on.
+        """
+        message = await self.event_queue.get()
+        action, data = message
+
+        try:
+            if action == 'post':
+                await self.process_new_event(data)
+            elif action == 'fanout':
+                await self.process_event_fan_out(data)
+            elif action == 'delete':
+                await self.process_event_deletion(data)
+            else:
+                ...
+        except Exception:
+            logger.exception('Processing of event queue message "%s" has failed', action)
+            await self.event_queue.reject(message)
+            return
+
+        await self.event_queue.acknowledge(message)
 
     async def process_new_event(self, data: Dict[str, Any]) -> None:
-        """Process posting of new event."""
+        """Process posting of new event.
+
+        Event is copied to subscriber newsfeeds in chunks of ``fan_out_chunk_size`` subscribers.
+        The first chunk is copied right away, others are put back to the queue, so they are
+        processed concurrently and do not block processing of other events. Copies have
+        deterministic ids, so if processing crashes and message is delivered again, copying is
+        resumed without duplicates.
+        """
         event = self.event_factory.create_from_serialized(data)
+
+        if await self.event_repository.is_fanned_out_on_read(event.newsfeed_id):
+            event.track_fan_out_on_read()
+            event.track_publishing_time()
+            await self.event_repository.add(event)
+            return
+
         subscriptions = await self.subscription_repository.get_by_to_newsfeed_id(
             newsfeed_id=event.newsfeed_id,
         )
-
-        subscriber_events = [
-            self.event_factory.create_new(
-                newsfeed_id=subscription.newsfeed_id,
-                data=event.data,
-                parent_fqid=event.fqid,
-            )
-            for subscription in subscriptions
+        subscriber_newsfeed_ids = [subscription.newsfeed_id for subscription in subscriptions]
+        chunk_size = max(int(self.fan_out_chunk_size), 1)
+        chunks = [
+            subscriber_newsfeed_ids[start:start + chunk_size]
+            for start in range(0, len(subscriber_newsfeed_ids), chunk_size)
         ]
+
         event.track_child_fqids(
             [
-                subscriber_event.fqid
-                for subscriber_event in subscriber_events
+                self.event_factory.create_child_fqid(event, newsfeed_id)
+                for newsfeed_id in subscriber_newsfeed_ids
             ]
         )
+        event.track_publishing_time()
+
+        await self.event_repository.add(event)
+        if chunks:
+            try:
+                await self.event_repository.add_many(
+                    self._create_subscriber_events(event, chunks[0]),
+                    parent_fqid=event.fqid,
+                )
+            except EventNotFound:
+                # Event has been deleted before its copying has been started
+                return
+
+        parent_data = {**event.serialized_data, 'child_fqids': []}
+        for chunk in chunks[1:]:
+            await self.event_queue.put(
+                ('fanout', {'event': parent_data, 'newsfeed_ids': chunk}),
+                bypass_limit=True,
+            )
 
-        for event in [event] + subscriber_events:
-            event.track_publishing_time()
-            await self.event_repository.add(event)
+    async def process_event_fan_out(self, data: Dict[str, Any]) -> None:
+        """Process copying of event to chunk of subscriber newsfeeds.
+
+        Copies are added only if event still exists, existence is checked atomically by storage.
+        """
+        event = self.event_factory.create_from_serialized(data['event'])
+        subscriber_events = self._create_subscriber_events(event, data['newsfeed_ids'])
+        try:
+            await self.event_repository.add_many(subscriber_events, parent_fqid=event.fqid)
+        except EventNotFound:
+            # Event has been deleted before its copying has been finished
+            return
 
     async def process_event_deletion(self, data: Dict[str, Any]) -> None:
-        """Process deletion of an existing event."""
-        event = await self.event_repository.get_by_fqid(
-            EventFQID(
-                newsfeed_id=str(data['newsfeed_id']),
-                event_id=UUID(data['event_id']),
-            ),
+        """Process deletion of an existing event.
+
+        Deletion is recorded before event is looked up, so if posting of event is processed
+        concurrently or later, event is not added. Deletion of event that is not found is ignored.
+        Some copies of event could be missing if its copying has not been finished yet. Such copies
+        could be added until event itself is deleted, so they are deleted once again after it.
+        """
+        fqid = EventFQID(
+            newsfeed_id=str(data['newsfeed_id']),
+            event_id=UUID(data['event_id']),
         )
+        await self.event_repository.record_deletion(fqid)
+        try:
+            event = await self.event_repository.get_by_fqid(fqid)
+        except EventNotFound:
+            return
 
-        for child_event_fqid in event.child_fqids:
-            await self.event_repository.delete_by_fqid(child_event_fqid)
+        child_event_fqids = await self.event_repository.get_child_fqids(event.fqid)
+        missing_child_event_fqids = await self._delete_events(child_event_fqids)
 
         await self.event_repository.delete_by_fqid(event.fqid)
 
+        await self._delete_events(missing_child_event_fqids)
+
+    async def _delete_events(self, fqids: Sequence[EventFQID]) -> List[EventFQID]:
+        missing_fqids = []
+        for fqid in fqids:
+            try:
+                await self.event_repository.delete_by_fqid(fqid)
+            except EventNotFound:
+                missing_fqids.append(fqid)
+        return missing_fqids
+
+    def _create_subscriber_events(self, event: Event, newsfeed_ids: Sequence[str]) -> List[Event]:
+        subscriber_events = [
+            self.event_factory.create_child(
+                parent=event,
+                newsfeed_id=newsfeed_id,
+            )
+            for newsfeed_id in newsfeed_ids
+        ]
+        for subscriber_event in subscriber_events:
+            subscriber_event.track_publishing_time()
+        return subscriber_events
+
     async def _processor_loop(self) -> None:
         while True:
             await self.process_event()
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Sequence, Set, Tuple, Union, Any
 from uuid import UUID, uuid4
 from datetime import datetime
 
@@ -15,15 +15,45 @@ from .error import DomainError
 
 
 class SubscriptionFQID:
-    """Subscription fully-qualified identifier."""
+    """Subscription fully-qualified identifier.
+
+    It is an immutable and hashable value object.
+    """
+
+    __slots__ = ('_newsfeed_id', '_subscription_id')
 
     def __init__(self, newsfeed_id: str, subscription_id: UUID):
         """Initialize object."""
         assert isinstance(newsfeed_id, str)
-        self.newsfeed_id = newsfeed_id
+        self._newsfeed_id = newsfeed_id
 
         assert isinstance(subscription_id, UUID)
-        self.subscription_id = subscription_id
+        self._subscription_id = subscription_id
+
+    @property
+    def newsfeed_id(self) -> str:
+        """Return newsfeed id."""
+        return self._newsfeed_id
+
+    @property
+    def subscription_id(self) -> UUID:
+        """Return subscription id."""
+        return self._subscription_id
+
+    def __eq__(self, other: object) -> bool:
+        """Check if FQIDs are equal."""
+        if not isinstance(other, SubscriptionFQID):
+            return NotImplemented
+        return (self._newsfeed_id, self._subscription_id) == \
+            (other._newsfeed_id, other._subscription_id)
+
+    def __hash__(self) -> int:
+        """Return hash."""
+        return hash((self._newsfeed_id, self._subscription_id))
+
+    def __repr__(self) -> str:
+        """Return string representation."""
+        return f'{self.__class__.__name__}({self._newsfeed_id!r}, {self._subscription_id!r})'
 
     @classmethod
     def from_serialized_data(cls, data: Tuple[str, str]) -> SubscriptionFQID:
@@ -33,12 +63,14 @@ class SubscriptionFQID:
     @property
     def serialized_data(self) -> Tuple[str, str]:
         """Return serialized data."""
-        return self.newsfeed_id, str(self.subscription_id)
+        return self._newsfeed_id, str(self._subscription_id)
 
 
 class Subscription:
     """Subscription entity."""
 
+    __slots__ = ('_id', '_newsfeed_id', '_fqid', '_to_newsfeed_id', '_subscribed_at')
+
     def __init__(self, id: UUID, newsfeed_id: str, to_newsfeed_id: str, subscribed_at: datetime):
         """Initialize entity."""
         assert isinstance(id, UUID)
@@ -47,6 +79,8 @@ class Subscription:
         assert isinstance(newsfeed_id, str)
         self._newsfeed_id = newsfeed_id
 
+        self._fqid = SubscriptionFQID(newsfeed_id, id)
+
         assert isinstance(to_newsfeed_id, str)
         self._to_newsfeed_id = to_newsfeed_id
 
@@ -71,7 +105,7 @@ class Subscription:
     @property
     def fqid(self) -> SubscriptionFQID:
         """Return FQID (Fully-Qualified ID)."""
-        return SubscriptionFQID(self.newsfeed_id, self.id)
+        return self._fqid
 
     @property
     def subscribed_at(self) -> datetime:
@@ -163,6 +197,10 @@ class SubscriptionRepository:
             for subscription_data in subscriptions_data
         ]
 
+    async def count_subscribers(self, newsfeed_ids: Sequence[str]) -> Dict[str, int]:
+        """Return numbers of subscribers of specified newsfeeds."""
+        return await self._storage.count_by_to_newsfeed_ids(newsfeed_ids)
+
     async def get_by_fqid(self, newsfeed_id: str, subscription_id: UUID) -> Subscription:
         """Return subscription by its FQID."""
         subscription_data = await self._storage.get_by_fqid(newsfeed_id, str(subscription_id))
@@ -173,10 +211,18 @@ class SubscriptionRepository:
         subscription_data = await self._storage.get_between(newsfeed_id, to_newsfeed_id)
         return self._factory.create_from_serialized(subscription_data)
 
+    async def get_existing_between(self, pairs: Sequence[Tuple[str, str]]) -> Set[Tuple[str, str]]:
+        """Return pairs of newsfeed ids that have subscriptions between them."""
+        return await self._storage.get_existing_between(pairs)
+
     async def add(self, subscription: Subscription) -> None:
         """Add subscription to repository."""
         await self._storage.add(subscription.serialized_data)
 
+    async def add_many(self, subscriptions: Sequence[Subscription]) -> None:
+        """Add multiple subscriptions to repository at once."""
+        await self._storage.add_many([subscription.serialized_data for subscription in subscriptions])
+
     async def delete_by_fqid(self, fqid: SubscriptionFQID) -> None:
         """Delete subscription by its FQID."""
         await self._storage.delete_by_fqid(
@@ -184,6 +230,12 @@ class SubscriptionRepository:
             subscription_id=str(fqid.subscription_id),
         )
 
+    async def delete_many(self, fqids: Sequence[SubscriptionFQID]) -> List[bool]:
+        """Delete multiple subscriptions by their FQIDs, return whether every one has been deleted."""
+        return await self._storage.delete_many(
+            [(fqid.newsfeed_id, str(fqid.subscription_id)) for fqid in fqids],
+        )
+
 
 class SubscriptionService:
     """Subscription service."""
@@ -232,11 +284,57 @@ class SubscriptionService:
 
         return subscription
 
+    async def create_subscriptions(
+            self,
+            pairs: Sequence[Tuple[str, str]],
+    ) -> List[Union[Subscription, DomainError]]:
+        """Create multiple subscriptions at once.
+
+        Subscriptions are specified by pairs of newsfeed id and id of newsfeed to subscribe to.
+        Results are returned in the same order: created subscription or error. Pair that is
+        repeated in the batch is created once and its subscription is returned for every
+        repetition.
+        """
+        subscriptions: Dict[Tuple[str, str], Subscription] = {}
+        errors: Dict[Tuple[str, str], DomainError] = {}
+        for newsfeed_id, to_newsfeed_id in dict.fromkeys(pairs):
+            subscription = self._factory.create_new(
+                newsfeed_id=newsfeed_id,
+                to_newsfeed_id=to_newsfeed_id,
+            )
+            try:
+                self._specification.is_satisfied_by(subscription)
+            except DomainError as exception:
+                errors[(newsfeed_id, to_newsfeed_id)] = exception
+            else:
+                subscriptions[(newsfeed_id, to_newsfeed_id)] = subscription
+
+        for newsfeed_id, to_newsfeed_id in await self._repository.get_existing_between(list(subscriptions)):
+            del subscriptions[(newsfeed_id, to_newsfeed_id)]
+            errors[(newsfeed_id, to_newsfeed_id)] = SubscriptionAlreadyExistsError(
+                newsfeed_id=newsfeed_id,
+                to_newsfeed_id=to_newsfeed_id,
+            )
+
+        await self._repository.add_many(list(subscriptions.values()))
+
+        return [subscriptions[pair] if pair in subscriptions else errors[pair] for pair in pairs]
+
     async def delete_subscription(self, newsfeed_id: str, subscription_id: str) -> None:
         """Delete newsfeed subscription."""
         subscription = await self._repository.get_by_fqid(newsfeed_id, UUID(subscription_id))
         await self._repository.delete_by_fqid(subscription.fqid)
 
+    async def delete_subscriptions(self, fqids: Sequence[Tuple[str, UUID]]) -> List[bool]:
+        """Delete multiple subscriptions at once.
+
+        Subscriptions are specified by pairs of newsfeed id and subscription id. For every
+        subscription it is returned whether it has been found and deleted.
+        """
+        return await self._repository.delete_many(
+            [SubscriptionFQID(newsfeed_id, subscription_id) for newsfeed_id, subscription_id in fqids],
+        )
+
     async def _check_subscription_exists_between(self, newsfeed_id: str, to_newsfeed_id: str) \
             -> bool:
         try:
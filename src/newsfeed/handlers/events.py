@@ -1,6 +1,6 @@
 """Event API handlers."""
 
-from typing import Dict, List, Tuple, Union, Any
+from typing import Dict, List, Optional, Tuple, Union, Any
 
 from aiohttp import web
 from dependency_injector.wiring import Provide
@@ -10,10 +10,16 @@ from newsfeed.domain.event import (
     EventRepository,
 )
 from newsfeed.containers import Container
-from newsfeed.domain.event_dispatcher import EventDispatcherService
+from newsfeed.infrastructure.serializers import Serializer
+from newsfeed.domain.event_dispatcher import DispatchResult, EventDispatcherService
 from newsfeed.domain.error import DomainError
+from newsfeed.infrastructure.event_queues import QueueFull
 
 
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+MAX_BATCH_SIZE = 1000
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+
 SerializedEventFQID = Tuple[str, str]
 SerializedEvent = Dict[
     str,
@@ -33,17 +39,64 @@ async def get_events_handler(
         event_repository: EventRepository = Provide[
             Container.event_repository
         ],
+        serializer: Serializer = Provide[
+            Container.serializer
+        ],
 ) -> web.Response:
-    """Handle events getting requests."""
+    """Handle events getting requests.
+
+    Events could be paginated with ``limit`` and ``cursor`` query parameters, where cursor is
+    ``next_cursor`` value of the previous page. Child FQIDs are stored separately from events,
+    they are loaded for the whole page at once and are omitted if ``include_child_fqids`` query
+    parameter is false.
+    """
     newsfeed_id = request.match_info['newsfeed_id']
-    newsfeed_events = await event_repository.get_by_newsfeed_id(newsfeed_id)
+
+    try:
+        limit = _parse_limit(request.query.get('limit'))
+        cursor = request.query.get('cursor')
+        include_child_fqids = _parse_flag(request.query.get('include_child_fqids'), default=True)
+    except ValueError as exception:
+        return web.json_response(
+            status=400,
+            body=serializer.dumps({
+                'message': str(exception),
+            }),
+        )
+
+    try:
+        newsfeed_events = await event_repository.get_serialized_by_newsfeed_id(
+            newsfeed_id=newsfeed_id,
+            limit=limit + 1 if limit is not None else None,
+            cursor=cursor,
+        )
+    except DomainError as exception:
+        return web.json_response(
+            status=400,
+            body=serializer.dumps({
+                'message': exception.message,
+            }),
+        )
+
+    next_cursor = None
+    if limit is not None and len(newsfeed_events) > limit:
+        newsfeed_events = newsfeed_events[:limit]
+        next_cursor = event_repository.get_next_cursor(newsfeed_events, cursor)
+
+    results = [_project_event(event_data) for event_data in newsfeed_events]
+    if include_child_fqids:
+        child_fqids_of_events = await event_repository.get_serialized_child_fqids_many([
+            (str(result['newsfeed_id']), str(result['id']))
+            for result in results
+        ])
+        for result, child_fqids in zip(results, child_fqids_of_events):
+            result['child_fqids'] = child_fqids
+
     return web.json_response(
-        data={
-            'results': [
-                _serialize_event(event)
-                for event in newsfeed_events
-            ],
-        },
+        body=serializer.dumps({
+            'results': results,
+            'next_cursor': next_cursor,
+        }),
     )
 
 
@@ -52,26 +105,90 @@ async def post_event_handler(
         event_dispatcher_service: EventDispatcherService = Provide[
             Container.event_dispatcher_service
         ],
+        serializer: Serializer = Provide[
+            Container.serializer
+        ],
 ) -> web.Response:
-    """Handle events posting requests."""
-    event_data = await request.json()
+    """Handle events posting requests.
+
+    If ``Idempotency-Key`` header is specified, repeated requests with the same key return the
+    originally posted event instead of posting a new one.
+    """
+    try:
+        idempotency_key = _parse_idempotency_key(request.headers.get('Idempotency-Key'))
+    except ValueError as exception:
+        return web.json_response(
+            status=400,
+            body=serializer.dumps({
+                'message': str(exception),
+            }),
+        )
+
+    event_data = await request.json(loads=serializer.loads)
 
     try:
         event = await event_dispatcher_service.dispatch_new_event(
             newsfeed_id=request.match_info['newsfeed_id'],
             data=event_data['data'],
+            idempotency_key=idempotency_key,
         )
     except DomainError as exception:
         return web.json_response(
             status=400,
-            data={
+            body=serializer.dumps({
                 'message': exception.message,
-            }
+            }),
         )
+    except QueueFull as exception:
+        return _queue_full_response(exception, serializer)
 
     return web.json_response(
         status=202,
-        data=_serialize_event(event),
+        body=serializer.dumps(_serialize_event(event)),
+    )
+
+
+async def post_newsfeed_events_batch_handler(
+        request: web.Request, *,
+        event_dispatcher_service: EventDispatcherService = Provide[
+            Container.event_dispatcher_service
+        ],
+        serializer: Serializer = Provide[
+            Container.serializer
+        ],
+) -> web.Response:
+    """Handle batch events posting requests to a newsfeed.
+
+    Body is an array of events, or a stream of events in NDJSON format, every event has ``data``
+    field. Result of every event is returned in order of events.
+    """
+    return await _post_events_batch(
+        request,
+        request.match_info['newsfeed_id'],
+        event_dispatcher_service,
+        serializer,
+    )
+
+
+async def post_events_batch_handler(
+        request: web.Request, *,
+        event_dispatcher_service: EventDispatcherService = Provide[
+            Container.event_dispatcher_service
+        ],
+        serializer: Serializer = Provide[
+            Container.serializer
+        ],
+) -> web.Response:
+    """Handle batch events posting requests to multiple newsfeeds.
+
+    Body is the same as for batch posting to a newsfeed, but every event also has
+    ``newsfeed_id`` field.
+    """
+    return await _post_events_batch(
+        request,
+        None,
+        event_dispatcher_service,
+        serializer,
     )
 
 
@@ -80,15 +197,167 @@ async def delete_event_handler(
         event_dispatcher_service: EventDispatcherService = Provide[
             Container.event_dispatcher_service
         ],
+        serializer: Serializer = Provide[
+            Container.serializer
+        ],
 ) -> web.Response:
     """Handle events posting requests."""
-    await event_dispatcher_service.dispatch_event_deletion(
-        newsfeed_id=request.match_info['newsfeed_id'],
-        event_id=request.match_info['event_id'],
-    )
+    try:
+        await event_dispatcher_service.dispatch_event_deletion(
+            newsfeed_id=request.match_info['newsfeed_id'],
+            event_id=request.match_info['event_id'],
+        )
+    except QueueFull as exception:
+        return _queue_full_response(exception, serializer)
+
     return web.json_response(status=204)
 
 
+async def _post_events_batch(
+        request: web.Request,
+        newsfeed_id: Optional[str],
+        event_dispatcher_service: EventDispatcherService,
+        serializer: Serializer,
+) -> web.Response:
+    try:
+        items = await _read_batch(request, serializer)
+    except ValueError as exception:
+        return web.json_response(
+            status=400,
+            body=serializer.dumps({
+                'message': str(exception),
+            }),
+        )
+
+    required_fields = ('data',) if newsfeed_id is not None else ('newsfeed_id', 'data')
+    invalid_event_message = (
+        'Event should be an object with "data" field'
+        if newsfeed_id is not None
+        else 'Event should be an object with "newsfeed_id" and "data" fields'
+    )
+    results: List[Optional[Dict[str, Any]]] = []
+    events_data = []
+    for item in items:
+        if not isinstance(item, dict) or any(field not in item for field in required_fields):
+            results.append({
+                'status': 400,
+                'message': invalid_event_message,
+            })
+            continue
+        events_data.append((
+            newsfeed_id if newsfeed_id is not None else item['newsfeed_id'],
+            item['data'],
+        ))
+        results.append(None)
+
+    dispatch_results = iter(await event_dispatcher_service.dispatch_new_events(events_data))
+    headers = {}
+    for position, result in enumerate(results):
+        if result is None:
+            dispatch_result = next(dispatch_results)
+            results[position] = _serialize_dispatch_result(dispatch_result)
+            if isinstance(dispatch_result, QueueFull):
+                headers['Retry-After'] = str(dispatch_result.retry_after)
+
+    return web.json_response(
+        status=202,
+        headers=headers,
+        body=serializer.dumps({
+            'results': results,
+        }),
+    )
+
+
+async def _read_batch(request: web.Request, serializer: Serializer) -> List[Any]:
+    """Read events batch, NDJSON body is parsed line by line as it arrives."""
+    if request.content_type == NDJSON_CONTENT_TYPE:
+        items: List[Any] = []
+        async for line in request.content:
+            if not line.strip():
+                continue
+            if len(items) >= MAX_BATCH_SIZE:
+                raise ValueError(_get_batch_size_message())
+            items.append(serializer.loads(line))
+        return items
+
+    items = serializer.loads(await request.read())
+    if not isinstance(items, list):
+        raise ValueError('Events batch should be an array')
+    if len(items) > MAX_BATCH_SIZE:
+        raise ValueError(_get_batch_size_message())
+    return items
+
+
+def _get_batch_size_message() -> str:
+    return f'Events batch should contain no more than {MAX_BATCH_SIZE} events'
+
+
+def _serialize_dispatch_result(result: DispatchResult) -> Dict[str, Any]:
+    if isinstance(result, Event):
+        return {
+            'status': 202,
+            'event': _serialize_event(result),
+        }
+    return {
+        'status': 503 if isinstance(result, QueueFull) else 400,
+        'message': result.message,
+    }
+
+
+def _parse_limit(value: Optional[str]) -> Optional[int]:
+    if value is None:
+        return None
+    if not value.isdigit() or int(value) < 1:
+        raise ValueError(f'Limit "{value}" should be a positive integer')
+    return int(value)
+
+
+def _parse_flag(value: Optional[str], default: bool = False) -> bool:
+    if value is None:
+        return default
+    if value.lower() not in ('true', 'false', '1', '0'):
+        raise ValueError(f'Flag value "{value}" should be "true" or "false"')
+    return value.lower() in ('true', '1')
+
+
+def _parse_idempotency_key(value: Optional[str]) -> Optional[str]:
+    if value is None:
+        return None
+    if not value or len(value) > MAX_IDEMPOTENCY_KEY_LENGTH:
+        raise ValueError(
+            f'Idempotency key should be from 1 to {MAX_IDEMPOTENCY_KEY_LENGTH} characters long',
+        )
+    return value
+
+
+def _queue_full_response(exception: QueueFull, serializer: Serializer) -> web.Response:
+    return web.json_response(
+        status=503,
+        headers={
+            'Retry-After': str(exception.retry_after),
+        },
+        body=serializer.dumps({
+            'message': exception.message,
+        }),
+    )
+
+
+def _project_event(event_data: Dict[str, Any]) -> SerializedEvent:
+    """Project stored event data to its API representation without creating event entity.
+
+    Child FQIDs are not the part of projection, they are stored separately from event data.
+    """
+    published_at = event_data['published_at']
+    return {
+        'id': event_data['id'],
+        'newsfeed_id': event_data['newsfeed_id'],
+        'data': event_data['data'],
+        'parent_fqid': event_data['parent_fqid'],
+        'first_seen_at': int(event_data['first_seen_at']),
+        'published_at': int(published_at) if published_at else None,
+    }
+
+
 def _serialize_event(event: Event) -> SerializedEvent:
     return {
         'id': str(event.id),
@@ -7,11 +7,45 @@ from aiohttp import web
 from dependency_injector.wiring import Provide
 
 from newsfeed.containers import Container
+from newsfeed.infrastructure.event_queues import EventQueue
+from newsfeed.infrastructure.event_storages import EventStorage
+from newsfeed.infrastructure.redis_clients import RedisClientManager
+from newsfeed.infrastructure.serializers import Serializer
 
 
-async def get_status_handler(_: web.Request) -> web.Response:
+async def get_status_handler(
+        _: web.Request, *,
+        serializer: Serializer = Provide[
+            Container.serializer
+        ],
+) -> web.Response:
     """Handle status requests."""
-    return web.json_response({'status': 'OK'})
+    return web.json_response(body=serializer.dumps({'status': 'OK'}))
+
+
+async def get_metrics_handler(
+        _: web.Request, *,
+        event_queue: EventQueue = Provide[
+            Container.event_queue
+        ],
+        event_storage: EventStorage = Provide[
+            Container.event_storage
+        ],
+        redis_client_manager: RedisClientManager = Provide[
+            Container.redis_client_manager
+        ],
+        serializer: Serializer = Provide[
+            Container.serializer
+        ],
+) -> web.Response:
+    """Handle metrics requests."""
+    return web.json_response(
+        body=serializer.dumps({
+            'event_queue': await event_queue.get_metrics(),
+            'event_storage': await event_storage.get_metrics(),
+            'redis': redis_client_manager.get_metrics(),
+        }),
+    )
 
 
 async def get_openapi_schema_handler(
@@ -19,11 +53,14 @@ async def get_openapi_schema_handler(
         base_path: AnyStr = Provide[
             Container.config.webapi.base_path
         ],
+        serializer: Serializer = Provide[
+            Container.serializer
+        ],
 ) -> web.Response:
     """Handle OpenAPI schema requests."""
     schema: Dict[str, Any] = copy.deepcopy(OPENAPI_SCHEMA)
     schema['servers'] = [{'url': base_path}]
-    return web.json_response(schema)
+    return web.json_response(body=serializer.dumps(schema))
 
 
 OPENAPI_SCHEMA = {
@@ -49,6 +86,35 @@ OPENAPI_SCHEMA = {
                             'type': 'string',
                         },
                     },
+                    {
+                        'in': 'query',
+                        'name': 'limit',
+                        'required': False,
+                        'description': 'Maximum number of events on the page',
+                        'schema': {
+                            'type': 'integer',
+                            'minimum': 1,
+                        },
+                    },
+                    {
+                        'in': 'query',
+                        'name': 'cursor',
+                        'required': False,
+                        'description': 'Value of "next_cursor" field of the previous page',
+                        'schema': {
+                            'type': 'string',
+                        },
+                    },
+                    {
+                        'in': 'query',
+                        'name': 'include_child_fqids',
+                        'required': False,
+                        'description': 'Include "child_fqids" field to the events',
+                        'schema': {
+                            'type': 'boolean',
+                            'default': True,
+                        },
+                    },
                 ],
                 'responses': {
                     '200': {
@@ -61,6 +127,9 @@ OPENAPI_SCHEMA = {
                             },
                         },
                     },
+                    '400': {
+                        'description': 'Pagination parameters are invalid',
+                    },
                 },
             },
             'post': {
@@ -78,6 +147,15 @@ OPENAPI_SCHEMA = {
                             'type': 'string',
                         },
                     },
+                    {
+                        'in': 'header',
+                        'name': 'Idempotency-Key',
+                        'description': 'Repeated requests with the same key return the originally posted event',
+                        'schema': {
+                            'type': 'string',
+                            'maxLength': 255,
+                        },
+                    },
                 ],
                 'requestBody': {
                     'required': True,
@@ -109,6 +187,12 @@ OPENAPI_SCHEMA = {
                             },
                         },
                     },
+                    '400': {
+                        'description': 'Event or idempotency key is invalid',
+                    },
+                    '503': {
+                        '$ref': '#/components/responses/QueueFull',
+                    },
                 },
             },
         },
@@ -142,6 +226,85 @@ OPENAPI_SCHEMA = {
                     '204': {
                         'description': 'Newsfeed event has been successfully deleted',
                     },
+                    '503': {
+                        '$ref': '#/components/responses/QueueFull',
+                    },
+                },
+            },
+        },
+        '/newsfeed/{newsfeed_id}/events:batch': {
+            'post': {
+                'summary': 'Post batch of newsfeed events',
+                'operationId': 'post_newsfeed_events_batch',
+                'tags': [
+                    'Events',
+                ],
+                'parameters': [
+                    {
+                        'in': 'path',
+                        'name': 'newsfeed_id',
+                        'required': True,
+                        'schema': {
+                            'type': 'string',
+                        },
+                    },
+                ],
+                'requestBody': {
+                    'required': True,
+                    'description': 'Array of events or stream of events in NDJSON format',
+                    'content': {
+                        'application/json': {
+                            'schema': {
+                                '$ref': '#/components/schemas/EventsBatch',
+                            },
+                        },
+                        'application/x-ndjson': {
+                            'schema': {
+                                '$ref': '#/components/schemas/EventsBatch',
+                            },
+                        },
+                    },
+                },
+                'responses': {
+                    '202': {
+                        '$ref': '#/components/responses/EventsBatchResults',
+                    },
+                    '400': {
+                        'description': 'Batch is invalid',
+                    },
+                },
+            },
+        },
+        '/events:batch': {
+            'post': {
+                'summary': 'Post batch of events to multiple newsfeeds',
+                'operationId': 'post_events_batch',
+                'tags': [
+                    'Events',
+                ],
+                'requestBody': {
+                    'required': True,
+                    'description': 'Array of events or stream of events in NDJSON format',
+                    'content': {
+                        'application/json': {
+                            'schema': {
+                                '$ref': '#/components/schemas/NewsfeedEventsBatch',
+                            },
+                        },
+                        'application/x-ndjson': {
+                            'schema': {
+                                '$ref': '#/components/schemas/NewsfeedEventsBatch',
+                            },
+                        },
+                    },
+                },
+                'responses': {
+                    '202': {
+                        '$ref': '#/components/responses/EventsBatchResults',
+                    },
+                    '400': {
+                        'description': 'Batch is invalid',
+                    },
                 },
             },
         },
@@ -284,6 +447,107 @@ OPENAPI_SCHEMA = {
                 },
             },
         },
+        '/subscriptions:batch': {
+            'post': {
+                'summary': 'Post batch of subscriptions',
+                'operationId': 'post_subscriptions_batch',
+                'tags': [
+                    'Subscriptions',
+                ],
+                'requestBody': {
+                    'required': True,
+                    'content': {
+                        'application/json': {
+                            'schema': {
+                                'type': 'array',
+                                'maxItems': 1000,
+                                'items': {
+                                    'properties': {
+                                        'newsfeed_id': {
+                                            'type': 'string',
+                                            'example': '123',
+                                        },
+                                        'to_newsfeed_id': {
+                                            'type': 'string',
+                                            'example': '124',
+                                        },
+                                    },
+                                },
+                            },
+                        },
+                    },
+                },
+                'responses': {
+                    '200': {
+                        'description': (
+                            'Results of subscriptions in order of subscriptions, every result has its own '
+                            'status: 200 if subscription has been created or 400 if it is invalid or exists'
+                        ),
+                        'content': {
+                            'application/json': {
+                                'schema': {
+                                    '$ref': '#/components/schemas/SubscriptionsBatchResults',
+                                },
+                            },
+                        },
+                    },
+                    '400': {
+                        'description': 'Batch is invalid or exceeds storage limits',
+                    },
+                },
+            },
+        },
+        '/subscriptions:batchDelete': {
+            'post': {
+                'summary': 'Delete batch of subscriptions',
+                'operationId': 'delete_subscriptions_batch',
+                'tags': [
+                    'Subscriptions',
+                ],
+                'requestBody': {
+                    'required': True,
+                    'content': {
+                        'application/json': {
+                            'schema': {
+                                'type': 'array',
+                                'maxItems': 1000,
+                                'items': {
+                                    'properties': {
+                                        'newsfeed_id': {
+                                            'type': 'string',
+                                            'example': '123',
+                                        },
+                                        'subscription_id': {
+                                            'type': 'string',
+                                            'format': 'uuid',
+                                        },
+                                    },
+                                },
+                            },
+                        },
+                    },
+                },
+                'responses': {
+                    '200': {
+                        'description': (
+                            'Results of subscriptions in order of subscriptions, every result has its own '
+                            'status: 204 if subscription has been deleted, 400 if it is invalid or 404 if '
+                            'it could not be found'
+                        ),
+                        'content': {
+                            'application/json': {
+                                'schema': {
+                                    '$ref': '#/components/schemas/SubscriptionsBatchResults',
+                                },
+                            },
+                        },
+                    },
+                    '400': {
+                        'description': 'Batch is invalid',
+                    },
+                },
+            },
+        },
         '/status/': {
             'get': {
                 'summary': 'Return current microservice status',
@@ -298,6 +562,24 @@ OPENAPI_SCHEMA = {
                 },
             },
         },
+        '/metrics/': {
+            'get': {
+                'summary': 'Return microservice metrics',
+                'operationId': 'get_metrics',
+                'tags': [
+                    'Miscellaneous',
+                ],
+                'responses': {
+                    '200': {
+                        'description': (
+                            'Event queue depth and wait time statistics in seconds per message action, '
+                            'event storage size and evictions, health, pool sizes and connection wait '
+                            'time statistics of redis clients'
+                        ),
+                    },
+                },
+            },
+        },
         '/docs/': {
             'get': {
                 'summary': 'Return microservice OpenAPI v3 documentation',
@@ -314,6 +596,40 @@ OPENAPI_SCHEMA = {
         },
     },
     'components': {
+        'responses': {
+            'QueueFull': {
+                'description': 'Event queue is full, request could be retried later',
+                'headers': {
+                    'Retry-After': {
+                        'description': 'Number of seconds to wait before retrying',
+                        'schema': {
+                            'type': 'integer',
+                        },
+                    },
+                },
+            },
+            'EventsBatchResults': {
+                'description': (
+                    'Results of events in order of events, every result has its own status: 202 if '
+                    'event has been posted, 400 if event is invalid or 503 if event queue is full'
+                ),
+                'headers': {
+                    'Retry-After': {
+                        'description': 'Number of seconds to wait before retrying events rejected by full queue',
+                        'schema': {
+                            'type': 'integer',
+                        },
+                    },
+                },
+                'content': {
+                    'application/json': {
+                        'schema': {
+                            '$ref': '#/components/schemas/EventsBatchResults',
+                        },
+                    },
+                },
+            },
+        },
         'schemas': {
             'Event': {
                 'properties': {
@@ -363,6 +679,64 @@ OPENAPI_SCHEMA = {
                             '$ref': '#/components/schemas/Event',
                         },
                     },
+                    'next_cursor': {
+                        'type': 'string',
+                        'nullable': True,
+                        'description': 'Cursor of the next page, null if there are no more events',
+                    },
+                },
+            },
+            'EventsBatch': {
+                'type': 'array',
+                'maxItems': 1000,
+                'items': {
+                    'properties': {
+                        'data': {
+                            'type': 'object',
+                            'example': {
+                                'payload_id': 835,
+                            },
+                        },
+                    },
+                },
+            },
+            'NewsfeedEventsBatch': {
+                'type': 'array',
+                'maxItems': 1000,
+                'items': {
+                    'properties': {
+                        'newsfeed_id': {
+                            'type': 'string',
+                            'example': '123',
+                        },
+                        'data': {
+                            'type': 'object',
+                            'example': {
+                                'payload_id': 835,
+                            },
+                        },
+                    },
+                },
+            },
+            'EventsBatchResults': {
+                'properties': {
+                    'results': {
+                        'type': 'array',
+                        'items': {
+                            'properties': {
+                                'status': {
+                                    'type': 'integer',
+                                    'example': 202,
+                                },
+                                'event': {
+                                    '$ref': '#/components/schemas/Event',
+                                },
+                                'message': {
+                                    'type': 'string',
+                                },
+                            },
+                        },
+                    },
                 },
             },
             'Subscription': {
@@ -385,6 +759,27 @@ OPENAPI_SCHEMA = {
                     },
                 },
             },
+            'SubscriptionsBatchResults': {
+                'properties': {
+                    'results': {
+                        'type': 'array',
+                        'items': {
+                            'properties': {
+                                'status': {
+                                    'type': 'integer',
+                                    'example': 200,
+                                },
+                                'subscription': {
+                                    '$ref': '#/components/schemas/Subscription',
+                                },
+                                'message': {
+                                    'type': 'string',
+                                },
+                            },
+                        },
+                    },
+                },
+            },
             'SubscriptionsList': {
                 'properties': {
                     'results': {
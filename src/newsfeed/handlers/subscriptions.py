@@ -1,6 +1,7 @@
 """Subscription API handlers."""
 
-from typing import Dict, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
+from uuid import UUID
 
 from aiohttp import web
 from dependency_injector.wiring import Provide
@@ -11,6 +12,11 @@ from newsfeed.domain.subscription import (
 )
 from newsfeed.domain.error import DomainError
 from newsfeed.containers import Container
+from newsfeed.infrastructure.serializers import Serializer
+from newsfeed.infrastructure.subscription_storages import SubscriptionStorageError
+
+
+MAX_BATCH_SIZE = 1000
 
 
 SerializedSubscription = Dict[
@@ -27,18 +33,21 @@ async def get_subscriptions_handler(
         subscription_service: SubscriptionService = Provide[
             Container.subscription_service
         ],
+        serializer: Serializer = Provide[
+            Container.serializer
+        ],
 ) -> web.Response:
     """Handle subscriptions getting requests."""
     newsfeed_subscriptions = await subscription_service.get_subscriptions(
         newsfeed_id=request.match_info['newsfeed_id'],
     )
     return web.json_response(
-        data={
+        body=serializer.dumps({
             'results': [
                 _serialize_subscription(subscription)
                 for subscription in newsfeed_subscriptions
             ],
-        },
+        }),
     )
 
 
@@ -47,9 +56,12 @@ async def post_subscription_handler(
         subscription_service: SubscriptionService = Provide[
             Container.subscription_service
         ],
+        serializer: Serializer = Provide[
+            Container.serializer
+        ],
 ) -> web.Response:
     """Handle subscriptions posting requests."""
-    data = await request.json()
+    data = await request.json(loads=serializer.loads)
 
     try:
         subscription = await subscription_service.create_subscription(
@@ -59,14 +71,14 @@ async def post_subscription_handler(
     except DomainError as exception:
         return web.json_response(
             status=400,
-            data={
+            body=serializer.dumps({
                 'message': exception.message,
-            }
+            }),
         )
 
     return web.json_response(
         status=200,
-        data=_serialize_subscription(subscription),
+        body=serializer.dumps(_serialize_subscription(subscription)),
     )
 
 
@@ -84,23 +96,131 @@ async def delete_subscription_handler(
     return web.json_response(status=204)
 
 
+async def post_subscriptions_batch_handler(
+        request: web.Request, *,
+        subscription_service: SubscriptionService = Provide[
+            Container.subscription_service
+        ],
+        serializer: Serializer = Provide[
+            Container.serializer
+        ],
+) -> web.Response:
+    """Handle batch subscriptions posting requests.
+
+    Body is an array of subscriptions with ``newsfeed_id`` and ``to_newsfeed_id`` fields. Result
+    of every subscription is returned in order of subscriptions.
+    """
+    try:
+        items = _parse_batch(await request.read(), serializer, ('newsfeed_id', 'to_newsfeed_id'))
+    except ValueError as exception:
+        return _bad_request_response(str(exception), serializer)
+
+    pairs = [(item['newsfeed_id'], item['to_newsfeed_id']) for item in items if item is not None]
+    try:
+        subscription_results = iter(await subscription_service.create_subscriptions(pairs))
+    except SubscriptionStorageError as exception:
+        return _bad_request_response(exception.message, serializer)
+
+    results: List[Dict[str, Any]] = []
+    for item in items:
+        if item is None:
+            results.append(_INVALID_ITEM_RESULT)
+            continue
+        subscription_result = next(subscription_results)
+        if isinstance(subscription_result, Subscription):
+            results.append({
+                'status': 200,
+                'subscription': _serialize_subscription(subscription_result),
+            })
+        else:
+            results.append({
+                'status': 400,
+                'message': subscription_result.message,
+            })
+
+    return web.json_response(
+        status=200,
+        body=serializer.dumps({
+            'results': results,
+        }),
+    )
+
+
+async def delete_subscriptions_batch_handler(
+        request: web.Request, *,
+        subscription_service: SubscriptionService = Provide[
+            Container.subscription_service
+        ],
+        serializer: Serializer = Provide[
+            Container.serializer
+        ],
+) -> web.Response:
+    """Handle batch subscriptions deleting requests.
+
+    Body is an array of subscriptions with ``newsfeed_id`` and ``subscription_id`` fields. Result
+    of every subscription is returned in order of subscriptions.
+    """
+    try:
+        items = _parse_batch(await request.read(), serializer, ('newsfeed_id', 'subscription_id'))
+    except ValueError as exception:
+        return _bad_request_response(str(exception), serializer)
+
+    fqids: List[Tuple[str, UUID]] = []
+    for position, item in enumerate(items):
+        if item is None:
+            continue
+        try:
+            fqids.append((item['newsfeed_id'], UUID(item['subscription_id'])))
+        except ValueError:
+            items[position] = None
+
+    deletion_results = iter(await subscription_service.delete_subscriptions(fqids))
+
+    results: List[Dict[str, Any]] = []
+    for item in items:
+        if item is None:
+            results.append(_INVALID_ITEM_RESULT)
+        elif next(deletion_results):
+            results.append({
+                'status': 204,
+            })
+        else:
+            results.append({
+                'status': 404,
+                'message': (
+                    f'Subscription "{item["subscription_id"]}" could not be found in newsfeed '
+                    f'"{item["newsfeed_id"]}"'
+                ),
+            })
+
+    return web.json_response(
+        status=200,
+        body=serializer.dumps({
+            'results': results,
+        }),
+    )
+
+
 async def get_subscriber_subscriptions_handler(
         request: web.Request, *,
         subscription_service: SubscriptionService = Provide[
             Container.subscription_service
         ],
+        serializer: Serializer = Provide[
+            Container.serializer
+        ],
 ) -> web.Response:  # noqa
     """Handle subscriber subscriptions getting requests."""
     newsfeed_subscriptions = await subscription_service.get_subscriber_subscriptions(
         newsfeed_id=request.match_info['newsfeed_id'],
     )
     return web.json_response(
-        data={
+        body=serializer.dumps({
             'results': [
                 _serialize_subscription(subscription)
                 for subscription in newsfeed_subscriptions
             ],
-        },
+        }),
     )
 
 
@@ -111,3 +231,34 @@ def _serialize_subscription(subscription: Subscription) -> SerializedSubscriptio
         'to_newsfeed_id': str(subscription.to_newsfeed_id),
         'subscribed_at': int(subscription.subscribed_at.timestamp()),
     }
+
+
+_INVALID_ITEM_RESULT = {
+    'status': 400,
+    'message': 'Subscription fields are missing or invalid',
+}
+
+
+def _parse_batch(body: bytes, serializer: Serializer, fields: Tuple[str, ...]) \
+        -> List[Optional[Dict[str, str]]]:
+    """Parse batch of subscriptions, items that do not have all string fields are ``None``."""
+    items = serializer.loads(body)
+    if not isinstance(items, list):
+        raise ValueError('Subscriptions batch should be an array')
+    if len(items) > MAX_BATCH_SIZE:
+        raise ValueError(f'Subscriptions batch should contain no more than {MAX_BATCH_SIZE} subscriptions')
+    return [
+        item
+        if isinstance(item, dict) and all(isinstance(item.get(field), str) for field in fields)
+        else None
+        for item in items
+    ]
+
+
+def _bad_request_response(message: str, serializer: Serializer) -> web.Response:
+    return web.json_response(
+        status=400,
+        body=serializer.dumps({
+            'message': message,
+        }),
+    )
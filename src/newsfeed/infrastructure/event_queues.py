@@ -1,57 +1,780 @@
 """Infrastructure event queues module."""
 
 import asyncio
-from typing import Dict, Tuple, Union
+import logging
+import math
+import os
+import socket
+import time
+from collections import defaultdict, deque
+from typing import TYPE_CHECKING, Any, DefaultDict, Deque, Dict, List, Optional, Sequence, Tuple
+
+import aioredis
+
+from .redis_clients import RedisClientManager, RedisScript
+from .serializers import Serializer
+from .utils import WaitTimes
 
 
 Action = str
-EventData = Dict[str, Union[str, int]]
-Message = Tuple[Action, EventData]
+MessageData = Dict[str, Any]
+Message = Tuple[Action, MessageData]
+
+OVERFLOW_POLICY_REJECT = 'reject'
+OVERFLOW_POLICY_WAIT = 'wait'
+OVERFLOW_POLICY_DROP_OLDEST = 'drop_oldest'
+OVERFLOW_POLICIES = (
+    OVERFLOW_POLICY_REJECT,
+    OVERFLOW_POLICY_WAIT,
+    OVERFLOW_POLICY_DROP_OLDEST,
+)
+
+
+logger = logging.getLogger(__name__)
 
 
 class EventQueue:
-    """Event queue."""
+    """Event queue.
+
+    Queue size is limited by ``max_size``. When queue is full, new message is handled according to
+    ``overflow_policy``:
+
+    - ``reject`` - message is rejected with ``QueueFull`` error.
+    - ``wait`` - putting waits for free space up to ``put_timeout`` seconds, then message is
+      rejected with ``QueueFull`` error.
+    - ``drop_oldest`` - the oldest post message that is not delivered yet is dropped from the queue
+      to free space. Fan-outs and deletions are never dropped, so if queue has no posts to drop,
+      message is rejected with ``QueueFull`` error.
+
+    Message that has failed to be processed is delivered again, until it has been delivered
+    ``max_deliveries`` times, then it is moved to dead letters.
+    """
 
     def __init__(self, config: Dict[str, str]):
         """Initialize queue."""
         self._config = config
 
+        self._max_size = int(config['max_size'])
+
+        self._overflow_policy = str(config.get('overflow_policy', OVERFLOW_POLICY_REJECT))
+        if self._overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f'Unknown event queue overflow policy "{self._overflow_policy}"')
+
+        self._put_timeout = float(config.get('put_timeout', 1))
+        self._retry_after = int(config.get('retry_after', 1))
+        self._max_deliveries = int(config.get('max_deliveries', 3))
+
+        self._wait_times = WaitTimes()
+
     async def get(self) -> Message:
         """Get message from queue."""
         raise NotImplementedError()
 
-    async def put(self, message: Message) -> None:
-        """Put message to queue."""
+    async def put(self, message: Message, bypass_limit: bool = False) -> None:
+        """Put message to queue.
+
+        Messages that are put by event processors themselves should bypass size limit, otherwise
+        processors would wait for free space that only they could free.
+        """
+        raise NotImplementedError()
+
+    async def put_many(self, messages: Sequence[Message]) -> int:
+        """Put multiple messages to queue at once and return number of accepted messages.
+
+        Messages are accepted in order while queue has free space, the rest of them are rejected
+        without waiting. With ``drop_oldest`` policy messages are accepted while there are posts to drop.
+        """
+        raise NotImplementedError()
+
+    def get_full_error(self) -> 'QueueFull':
+        """Return error of message rejection due to queue being full."""
+        return QueueFull(self._max_size, self._retry_after)
+
+    async def acknowledge(self, message: Message) -> None:
+        """Acknowledge that message has been processed."""
+        raise NotImplementedError()
+
+    async def reject(self, message: Message) -> None:
+        """Reject message that has failed to be processed.
+
+        Message is delivered again or, if it has been delivered ``max_deliveries`` times, it is
+        moved to dead letters.
+        """
         raise NotImplementedError()
 
     async def is_empty(self) -> bool:
         """Check if queue is empty."""
         raise NotImplementedError()
 
+    async def get_metrics(self) -> Dict[str, Any]:
+        """Return queue depth and statistics of time messages wait in the queue per action."""
+        raise NotImplementedError()
+
 
 class InMemoryEventQueue(EventQueue):
-    """Event queue that stores messages in memory."""
+    """Event queue that stores messages in memory.
+
+    Messages are scheduled by ``SchedulingQueue``: deletions have priority over other messages,
+    posts and fan-outs of different newsfeeds are served in turn, deletions of events that are
+    still waiting in the queue cancel them. Underlying queue is not bounded,
+    so messages could bypass size limit, that is checked on putting instead.
+    """
 
     def __init__(self, config: Dict[str, str]):
         """Initialize queue."""
         super().__init__(config)
-        self._queue: asyncio.Queue[Message] = asyncio.Queue()
+        self._queue = SchedulingQueue(quantum=int(config.get('scheduling_quantum', 1)))
+        self._free_space = asyncio.Condition()
+        self._dead_letters = 0
 
     async def get(self) -> Message:
         """Get message from queue."""
-        return await self._queue.get()
+        enqueued_at, message = await self._queue.get()
+        self._wait_times.add(message[0], time.monotonic() - enqueued_at)
+        async with self._free_space:
+            self._free_space.notify()
+
+        delivered_message = _DeliveredMessage(message)
+        delivered_message.delivery_count = _get_delivery_count(message) + 1
+        return delivered_message
 
-    async def put(self, message: Message) -> None:
+    async def put(self, message: Message, bypass_limit: bool = False) -> None:
         """Put message to queue."""
-        try:
-            self._queue.put_nowait(message)
-        except asyncio.QueueFull:
-            raise QueueFull(self._queue.maxsize)
+        if self._queue.is_cancelling(message):
+            self._queue.put_nowait((time.monotonic(), message))
+            async with self._free_space:
+                self._free_space.notify()
+            return
+
+        if bypass_limit or self._queue.qsize() < self._max_size:
+            self._queue.put_nowait((time.monotonic(), message))
+            return
+
+        if self._overflow_policy == OVERFLOW_POLICY_WAIT:
+            async with self._free_space:
+                try:
+                    await asyncio.wait_for(
+                        self._free_space.wait_for(lambda: self._queue.qsize() < self._max_size),
+                        timeout=self._put_timeout,
+                    )
+                except asyncio.TimeoutError:
+                    raise QueueFull(self._max_size, self._retry_after)
+                self._queue.put_nowait((time.monotonic(), message))
+            return
+
+        if self._overflow_policy == OVERFLOW_POLICY_DROP_OLDEST and self._drop_oldest():
+            self._queue.put_nowait((time.monotonic(), message))
+            return
+
+        raise QueueFull(self._max_size, self._retry_after)
+
+    async def put_many(self, messages: Sequence[Message]) -> int:
+        """Put multiple messages to queue at once and return number of accepted messages."""
+        accepted_number = 0
+        has_cancelled = False
+        for message in messages:
+            if self._queue.is_cancelling(message):
+                self._queue.put_nowait((time.monotonic(), message))
+                has_cancelled = True
+            elif self._queue.qsize() < self._max_size:
+                self._queue.put_nowait((time.monotonic(), message))
+            elif self._overflow_policy == OVERFLOW_POLICY_DROP_OLDEST and self._drop_oldest():
+                self._queue.put_nowait((time.monotonic(), message))
+            else:
+                break
+            accepted_number += 1
+
+        if has_cancelled:
+            async with self._free_space:
+                self._free_space.notify()
+        return accepted_number
+
+    def _drop_oldest(self) -> bool:
+        item = self._queue.drop_oldest()
+        if item is None:
+            return False
+        _, (action, _) = item
+        logger.warning('Event queue is full, oldest "%s" message has been dropped', action)
+        return True
+
+    async def acknowledge(self, message: Message) -> None:
+        """Acknowledge that message has been processed.
+
+        In-memory queue forgets messages as soon as they are got, so there is nothing to do.
+        """
+
+    async def reject(self, message: Message) -> None:
+        """Reject message that has failed to be processed.
+
+        Message is put back to the queue bypassing size limit. In-memory queue does not keep dead
+        letters, they are logged and counted.
+        """
+        action, data = message
+        if _get_delivery_count(message) < self._max_deliveries:
+            self._queue.put_nowait((time.monotonic(), message))
+            return
+        self._dead_letters += 1
+        logger.error('Event queue message "%s" has failed to be processed, it is dropped: %r', action, data)
 
     async def is_empty(self) -> bool:
         """Check if queue is empty."""
         return self._queue.empty()
 
+    async def get_metrics(self) -> Dict[str, Any]:
+        """Return queue depth and statistics of time messages wait in the queue per action."""
+        return {
+            'depth': self._queue.get_depths(),
+            'wait_time': self._wait_times.get_statistics(),
+            'cancelled': self._queue.get_cancellations(),
+            'dead_letters': self._dead_letters,
+        }
+
+
+QueueItem = Tuple[float, Message]
+EventKey = Tuple[str, str]
+
+if TYPE_CHECKING:
+    _BaseQueue = asyncio.Queue[QueueItem]
+else:
+    _BaseQueue = asyncio.Queue
+
+
+class SchedulingQueue(_BaseQueue):
+    """Queue that schedules event messages fairly.
+
+    Deletions have strict priority. Posts and fan-outs are queued per newsfeed and newsfeeds are
+    served with deficit round robin: every turn newsfeed gets ``quantum`` credits and could be
+    served while it has enough credits for its next message. Post costs one credit, fan-out costs
+    one credit per subscriber newsfeed, so newsfeed with a lot of subscribers could not delay posts
+    of other newsfeeds. Items are pairs of enqueue time and message.
+
+    Deletion of event which deletion is already waiting in the queue is coalesced with it.
+    Deletion of event which post is still waiting in the queue cancels the post instead of being
+    queued, its pending fan-outs are cancelled too. Cancelled items are left in the queue as
+    tombstones that are skipped on getting and are not counted in queue size.
+    """
+
+    def __init__(self, quantum: int = 1):
+        """Initialize queue."""
+        assert quantum > 0
+        self._quantum = quantum
+        super().__init__()
+
+    def is_cancelling(self, message: Message) -> bool:
+        """Check if message is a deletion that would be coalesced or would cancel a post.
+
+        Such message does not take place in the queue, so it is accepted even if queue is full.
+        """
+        action, data = message
+        if action != 'delete':
+            return False
+        event_key = _get_event_key(action, data)
+        return ('delete', event_key) in self._pending or ('post', event_key) in self._pending
+
+    def _init(self, maxsize: int) -> None:
+        self._priority_items: Deque[QueueItem] = deque()
+        self._newsfeed_items: Dict[str, Deque[QueueItem]] = {}
+        self._newsfeed_turns: Deque[str] = deque()
+        self._deficits: Dict[str, int] = {}
+        self._pending: Dict[Tuple[Action, EventKey], int] = {}
+        self._cancelled: Dict[EventKey, int] = {}
+        self._depths: DefaultDict[str, int] = defaultdict(int)
+        self._cancellations: DefaultDict[str, int] = defaultdict(int)
+
+    def _put(self, item: QueueItem) -> None:
+        _, (action, data) = item
+        event_key = _get_event_key(action, data)
+
+        if action == 'delete':
+            if ('delete', event_key) in self._pending:
+                self._cancellations['delete'] += 1
+                return
+            if ('post', event_key) in self._pending:
+                self._cancel(event_key, 'post')
+                self._cancellations['delete'] += 1
+                return
+            if ('fanout', event_key) in self._pending:
+                self._cancel(event_key, 'fanout')
+
+        self._pending[(action, event_key)] = self._pending.get((action, event_key), 0) + 1
+        self._depths[action] += 1
+
+        if action == 'delete':
+            self._priority_items.append(item)
+            return
+
+        newsfeed_id = _get_newsfeed_id(action, data)
+        if newsfeed_id not in self._newsfeed_items:
+            self._newsfeed_items[newsfeed_id] = deque()
+            self._newsfeed_turns.append(newsfeed_id)
+            self._deficits[newsfeed_id] = 0
+        self._newsfeed_items[newsfeed_id].append(item)
+
+    def _get(self) -> QueueItem:
+        if self._priority_items:
+            return self._forget(self._priority_items.popleft())
+
+        while True:
+            has_skipped_cancelled_item = False
+            for _ in range(len(self._newsfeed_turns)):
+                newsfeed_id = self._newsfeed_turns[0]
+                items = self._newsfeed_items[newsfeed_id]
+                if self._is_cancelled(items[0]):
+                    self._pop(newsfeed_id)
+                    has_skipped_cancelled_item = True
+                    break
+
+                cost = _get_cost(items[0])
+                if self._deficits[newsfeed_id] >= cost:
+                    self._deficits[newsfeed_id] -= cost
+                    return self._forget(self._pop(newsfeed_id))
+                self._deficits[newsfeed_id] += self._quantum
+                self._newsfeed_turns.rotate(-1)
+
+            if has_skipped_cancelled_item:
+                continue
+
+            # No newsfeed had enough credits, so turns in which nobody could be served are skipped
+            rounds = min(
+                math.ceil(
+                    (_get_cost(self._newsfeed_items[newsfeed_id][0]) - self._deficits[newsfeed_id]) / self._quantum,
+                )
+                for newsfeed_id in self._newsfeed_turns
+            )
+            for newsfeed_id in self._newsfeed_turns:
+                self._deficits[newsfeed_id] += max(rounds - 1, 0) * self._quantum
+
+    def qsize(self) -> int:
+        """Return number of items in the queue, cancelled items are not counted."""
+        return sum(self._depths.values())
+
+    def empty(self) -> bool:
+        """Return true if queue is empty."""
+        return self.qsize() == 0
+
+    def get_depths(self) -> Dict[str, int]:
+        """Return number of items in the queue per action."""
+        return {action: depth for action, depth in self._depths.items() if depth}
+
+    def get_cancellations(self) -> Dict[str, int]:
+        """Return number of cancelled posts and fan-outs and coalesced deletions."""
+        return dict(self._cancellations)
+
+    def drop_oldest(self) -> Optional[QueueItem]:
+        """Remove the oldest post.
+
+        Fan-outs and deletions are never removed, nothing is removed and ``None`` is returned if queue has no posts.
+        """
+        oldest = None
+        for newsfeed_id, items in self._newsfeed_items.items():
+            for index, item in enumerate(items):
+                _, (action, data) = item
+                if action == 'post' and ('post', _get_event_key(action, data)) in self._pending:
+                    if oldest is None or item[0] < oldest[2][0]:
+                        oldest = (newsfeed_id, index, item)
+                    break
+        if oldest is None:
+            return None
+
+        newsfeed_id, index, item = oldest
+        items = self._newsfeed_items[newsfeed_id]
+        del items[index]
+        if not items:
+            del self._newsfeed_items[newsfeed_id]
+            del self._deficits[newsfeed_id]
+            self._newsfeed_turns.remove(newsfeed_id)
+        return self._forget(item)
+
+    def _pop(self, newsfeed_id: str) -> QueueItem:
+        items = self._newsfeed_items[newsfeed_id]
+        item = items.popleft()
+        if not items:
+            del self._newsfeed_items[newsfeed_id]
+            del self._deficits[newsfeed_id]
+            self._newsfeed_turns.remove(newsfeed_id)
+        return item
+
+    def _cancel(self, event_key: EventKey, action: Action) -> None:
+        number = self._pending.pop((action, event_key))
+        self._depths[action] -= number
+        self._cancellations[action] += number
+        self._cancelled[event_key] = self._cancelled.get(event_key, 0) + number
+
+    def _is_cancelled(self, item: QueueItem) -> bool:
+        _, (action, data) = item
+        event_key = _get_event_key(action, data)
+        if event_key not in self._cancelled:
+            return False
+        self._cancelled[event_key] -= 1
+        if not self._cancelled[event_key]:
+            del self._cancelled[event_key]
+        return True
+
+    def _forget(self, item: QueueItem) -> QueueItem:
+        _, (action, data) = item
+        event_key = _get_event_key(action, data)
+        self._depths[action] -= 1
+        self._pending[(action, event_key)] -= 1
+        if not self._pending[(action, event_key)]:
+            del self._pending[(action, event_key)]
+        return item
+
+
+def _get_newsfeed_id(action: Action, data: MessageData) -> str:
+    if action == 'fanout':
+        return str(data['event']['newsfeed_id'])
+    return str(data.get('newsfeed_id'))
+
+
+def _get_event_key(action: Action, data: MessageData) -> EventKey:
+    if action == 'fanout':
+        data = data['event']
+    return str(data.get('newsfeed_id')), str(data.get('event_id', data.get('id')))
+
+
+def _get_cost(item: QueueItem) -> int:
+    _, (action, data) = item
+    if action == 'fanout':
+        return max(len(data['newsfeed_ids']), 1)
+    return 1
+
+
+# Adds messages to stream while it has free space or while there are posts to drop. Key is stream,
+# arguments are consumer group and maximum size, then action and serialized data of every message.
+# Only posts that are not delivered to consumer group yet are dropped, so pending messages are
+# never lost. Number of added messages and number of dropped posts are returned.
+_PUT_DROPPING_OLDEST_SCRIPT = RedisScript('''
+local stream_key = KEYS[1]
+local group = ARGV[1]
+local max_size = tonumber(ARGV[2])
+
+local start_id = '0-0'
+if redis.call('EXISTS', stream_key) == 1 then
+    for _, group_info in ipairs(redis.call('XINFO', 'GROUPS', stream_key)) do
+        local fields = {}
+        for i = 1, #group_info, 2 do
+            fields[group_info[i]] = group_info[i + 1]
+        end
+        if fields['name'] == group then
+            start_id = fields['last-delivered-id']
+        end
+    end
+end
+
+local function drop_oldest_post()
+    while true do
+        local entries = redis.call('XRANGE', stream_key, start_id, '+', 'COUNT', 100)
+        local has_new_entries = false
+        for _, entry in ipairs(entries) do
+            local entry_id, fields = entry[1], entry[2]
+            if entry_id ~= start_id then
+                has_new_entries = true
+                for i = 1, #fields, 2 do
+                    if fields[i] == 'action' and fields[i + 1] == 'post' then
+                        redis.call('XDEL', stream_key, entry_id)
+                        start_id = entry_id
+                        return true
+                    end
+                end
+            end
+        end
+        if not has_new_entries then
+            return false
+        end
+        start_id = entries[#entries][1]
+    end
+end
+
+local length = redis.call('XLEN', stream_key)
+local accepted_number = 0
+local dropped_number = 0
+for i = 3, #ARGV, 2 do
+    if length >= max_size then
+        if not drop_oldest_post() then
+            break
+        end
+        dropped_number = dropped_number + 1
+    else
+        length = length + 1
+    end
+    redis.call('XADD', stream_key, '*', 'action', ARGV[i], 'data', ARGV[i + 1])
+    accepted_number = accepted_number + 1
+end
+return {accepted_number, dropped_number}
+''')
+
+
+class RedisStreamEventQueue(EventQueue):
+    """Event queue that stores messages in redis stream.
+
+    Messages are read through a consumer group, so any number of processes could put messages to
+    the queue and get messages from it. Got message stays pending until it is acknowledged.
+    Messages that stay pending for more than ``claim_idle_time`` seconds, for example because
+    their consumer has crashed or they have been rejected, are claimed and delivered again. Number
+    of deliveries is tracked by consumer group, messages that have been delivered
+    ``max_deliveries`` times are moved to ``{stream}:dead_letters`` stream.
+    """
+
+    def __init__(self, config: Dict[str, str], serializer: Serializer,
+                 redis_client_manager: RedisClientManager):
+        """Initialize queue."""
+        super().__init__(config)
+
+        assert isinstance(serializer, Serializer)
+        self._serializer = serializer
+
+        assert isinstance(redis_client_manager, RedisClientManager)
+        self._redis_client = redis_client_manager.get_client(config['dsn'])
+        # Blocking reads hold their connections for up to ``block_timeout``, so they use separate
+        # client to not starve putting and acknowledging of messages
+        self._blocking_redis_client = redis_client_manager.get_client(config['dsn'], name='blocking')
+
+        self._stream = str(config.get('stream', 'event_queue'))
+        self._dead_letters_stream = f'{self._stream}:dead_letters'
+        self._group = str(config.get('group', 'event_processors'))
+        self._consumer = str(config.get('consumer') or f'{socket.gethostname()}:{os.getpid()}')
+        self._claim_idle_time = int(float(config.get('claim_idle_time', 60)) * 1000)
+        self._block_timeout = int(float(config.get('block_timeout', 1)) * 1000)
+        self._poll_interval = 0.05
+
+        self._is_group_created = False
+        self._claim_at = 0.0
+        self._claimed_messages: Deque[Message] = deque()
+
+    async def get(self) -> Message:
+        """Get message from queue."""
+        await self._create_group()
+
+        while True:
+            if not self._claimed_messages and time.monotonic() >= self._claim_at:
+                self._claim_at = time.monotonic() + self._claim_idle_time / 1000
+                await self._claim_idle_messages()
+
+            if self._claimed_messages:
+                return self._claimed_messages.popleft()
+
+            async with self._blocking_redis_client.get_connection() as redis:
+                entries = await redis.xread_group(
+                    self._group,
+                    self._consumer,
+                    [self._stream],
+                    timeout=self._block_timeout,
+                    count=1,
+                    latest_ids=['>'],
+                )
+            for _, entry_id, fields in entries:
+                return self._load_message(entry_id, fields)
+
+    async def put(self, message: Message, bypass_limit: bool = False) -> None:
+        """Put message to queue."""
+        action, data = message
+        fields = {
+            'action': action,
+            'data': self._serializer.dumps(data),
+        }
+
+        if self._max_size and not bypass_limit:
+            if self._overflow_policy == OVERFLOW_POLICY_DROP_OLDEST:
+                if not await self._put_dropping_oldest([message]):
+                    raise QueueFull(self._max_size, self._retry_after)
+                return
+            await self._wait_for_free_space()
+
+        async with self._redis_client.get_connection() as redis:
+            await redis.xadd(self._stream, fields)
+
+    async def put_many(self, messages: Sequence[Message]) -> int:
+        """Put multiple messages to queue at once and return number of accepted messages.
+
+        Free space is checked once, then accepted messages are added in a single pipeline.
+        """
+        if self._max_size and self._overflow_policy == OVERFLOW_POLICY_DROP_OLDEST:
+            return await self._put_dropping_oldest(messages)
+
+        accepted_number = len(messages)
+        async with self._redis_client.get_connection() as redis:
+            if self._max_size:
+                length = await redis.xlen(self._stream)
+                accepted_number = min(max(self._max_size - int(length), 0), accepted_number)
+
+            if not accepted_number:
+                return 0
+
+            pipeline = redis.pipeline()
+            for action, data in messages[:accepted_number]:
+                fields = {
+                    'action': action,
+                    'data': self._serializer.dumps(data),
+                }
+                pipeline.xadd(self._stream, fields)
+            await pipeline.execute()
+        return accepted_number
+
+    async def acknowledge(self, message: Message) -> None:
+        """Acknowledge that message has been processed."""
+        if not isinstance(message, _StreamMessage):
+            return
+        await self._delete_entries([message.entry_id])
+
+    async def reject(self, message: Message) -> None:
+        """Reject message that has failed to be processed.
+
+        Message stays pending, so it is claimed and delivered again after ``claim_idle_time``.
+        """
+        if not isinstance(message, _StreamMessage) or message.delivery_count < self._max_deliveries:
+            return
+
+        action, data = message
+        async with self._redis_client.get_connection() as redis:
+            transaction = redis.multi_exec()
+            transaction.xadd(
+                self._dead_letters_stream,
+                {
+                    'action': action,
+                    'data': self._serializer.dumps(data),
+                    'entry_id': message.entry_id,
+                },
+            )
+            transaction.xack(self._stream, self._group, message.entry_id)
+            transaction.xdel(self._stream, message.entry_id)
+            await transaction.execute()
+        logger.error('Event queue message "%s" has failed to be processed, it is moved to dead letters', action)
+
+    async def is_empty(self) -> bool:
+        """Check if queue is empty."""
+        async with self._redis_client.get_connection() as redis:
+            length = await redis.xlen(self._stream)
+        return bool(length == 0)
+
+    async def get_metrics(self) -> Dict[str, Any]:
+        """Return queue depth and statistics of time messages wait in the queue per action.
+
+        Stream does not know actions of its messages, so only total depth is returned. Wait times
+        are measured by entry ids, that contain time of adding, for messages got by this consumer.
+        """
+        async with self._redis_client.get_connection() as redis:
+            length = await redis.xlen(self._stream)
+            dead_letters_length = await redis.xlen(self._dead_letters_stream)
+        return {
+            'depth': {'all': int(length)},
+            'wait_time': self._wait_times.get_statistics(),
+            'dead_letters': int(dead_letters_length),
+        }
+
+    async def _create_group(self) -> None:
+        if self._is_group_created:
+            return
+
+        async with self._redis_client.get_connection() as redis:
+            try:
+                await redis.xgroup_create(self._stream, self._group, latest_id='0', mkstream=True)
+            except aioredis.errors.ReplyError as exception:
+                if not str(exception).startswith('BUSYGROUP'):
+                    raise
+        self._is_group_created = True
+
+    async def _claim_idle_messages(self) -> None:
+        async with self._redis_client.get_connection() as redis:
+            pending_entries = await redis.xpending(self._stream, self._group, '-', '+', 100)
+            delivery_counts = {
+                entry_id: int(delivery_count)
+                for entry_id, _, idle_time, delivery_count in pending_entries
+                if idle_time >= self._claim_idle_time
+            }
+            idle_entry_ids = list(delivery_counts)
+            if not idle_entry_ids:
+                return
+
+            claimed_entries = await redis.xclaim(
+                self._stream,
+                self._group,
+                self._consumer,
+                self._claim_idle_time,
+                *idle_entry_ids,
+            )
+
+        for entry_id, fields in claimed_entries:
+            # Claiming is a delivery too, so it is counted in addition to previous deliveries
+            self._claimed_messages.append(
+                self._load_message(entry_id, fields, delivery_count=delivery_counts[entry_id] + 1),
+            )
+
+        claimed_entry_ids = {entry_id for entry_id, _ in claimed_entries}
+        lost_entry_ids = [
+            entry_id
+            for entry_id in idle_entry_ids
+            if entry_id not in claimed_entry_ids
+        ]
+        if lost_entry_ids:
+            await self._delete_entries(lost_entry_ids)
+
+        logger.warning(
+            'Claimed %d idle messages from event queue, %d messages have been lost',
+            len(claimed_entries),
+            len(lost_entry_ids),
+        )
+
+    async def _put_dropping_oldest(self, messages: Sequence[Message]) -> int:
+        args: List[Any] = [self._group, self._max_size]
+        for action, data in messages:
+            args.extend((action, self._serializer.dumps(data)))
+
+        async with self._redis_client.get_connection() as redis:
+            accepted_number, dropped_number = await _PUT_DROPPING_OLDEST_SCRIPT.execute(
+                redis,
+                keys=[self._stream],
+                args=args,
+            )
+
+        if dropped_number:
+            logger.warning('Event queue is full, %d oldest "post" messages have been dropped', dropped_number)
+        return int(accepted_number)
+
+    async def _wait_for_free_space(self) -> None:
+        deadline = time.monotonic() + self._put_timeout
+        while True:
+            async with self._redis_client.get_connection() as redis:
+                length = await redis.xlen(self._stream)
+            if length < self._max_size:
+                return
+            if self._overflow_policy == OVERFLOW_POLICY_REJECT or time.monotonic() >= deadline:
+                raise QueueFull(self._max_size, self._retry_after)
+            await asyncio.sleep(self._poll_interval)
+
+    async def _delete_entries(self, entry_ids: List[str]) -> None:
+        async with self._redis_client.get_connection() as redis:
+            transaction = redis.multi_exec()
+            transaction.xack(self._stream, self._group, *entry_ids)
+            for entry_id in entry_ids:
+                transaction.xdel(self._stream, entry_id)
+            await transaction.execute()
+
+    def _load_message(self, entry_id: str, fields: Dict[str, str], delivery_count: int = 1) -> Message:
+        message = _StreamMessage((fields['action'], self._serializer.loads(fields['data'])))
+        message.entry_id = entry_id
+        message.delivery_count = delivery_count
+        added_at = int(entry_id.split('-')[0]) / 1000
+        self._wait_times.add(fields['action'], max(time.time() - added_at, 0.0))
+        return message
+
+
+class _DeliveredMessage(Tuple[Action, MessageData]):
+    """Message that remembers number of its deliveries."""
+
+    delivery_count: int
+
+
+class _StreamMessage(_DeliveredMessage):
+    """Message that remembers id of its redis stream entry."""
+
+    entry_id: str
+
+
+def _get_delivery_count(message: Message) -> int:
+    if isinstance(message, _DeliveredMessage):
+        return message.delivery_count
+    return 0
+
 
 class EventQueueError(Exception):
     """Event-queue-related error."""
@@ -65,9 +788,15 @@ class EventQueueError(Exception):
 class QueueFull(EventQueueError):
     """Error indicating situations when queue can not accept messages due to being full."""
 
-    def __init__(self, queue_size: int):
+    def __init__(self, queue_size: int, retry_after: int):
         """Initialize error."""
         self._queue_size = queue_size
+        self._retry_after = retry_after
+
+    @property
+    def retry_after(self) -> int:
+        """Return number of seconds after which putting could be retried."""
+        return self._retry_after
 
     @property
     def message(self) -> str:
@@ -1,129 +1,510 @@
 """Infrastructure event storages module."""
 
-import json
-from contextlib import asynccontextmanager
-from collections import defaultdict, deque
-from typing import Dict, Deque, Iterable, Union, cast
+import logging
+import sys
+import time
+from collections import defaultdict, OrderedDict
+from itertools import islice
+from typing import Any, DefaultDict, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union, cast
 
-import aioredis
-
-from .utils import parse_redis_dsn
+from .redis_clients import RedisClientManager, RedisScript
+from .serializers import Serializer
+from .utils import pack_fqids, unpack_fqids
 
 
 EventData = Dict[str, Union[str, int]]
+EventFQIDData = Tuple[str, str]
+
+
+logger = logging.getLogger(__name__)
 
 
 class EventStorage:
-    """Event storage."""
+    """Event storage.
+
+    Child FQIDs of events are not stored in events data, but in separate compact records, so
+    events of publishers with many subscribers stay small. They are returned only by
+    ``get_child_fqids()``.
+    """
 
     def __init__(self, config: Dict[str, str]):
         """Initialize storage."""
         self._config = config
 
-    async def get_by_newsfeed_id(self, newsfeed_id: str) -> Iterable[EventData]:
-        """Return events of specified newsfeed."""
+    async def get_by_newsfeed_id(
+            self,
+            newsfeed_id: str,
+            limit: Optional[int] = None,
+            after_event_id: Optional[str] = None,
+    ) -> Iterable[EventData]:
+        """Return events of specified newsfeed.
+
+        Events are returned newest first. If ``after_event_id`` is specified, only events that are
+        older than it are returned. If ``limit`` is specified, no more than ``limit`` events are
+        returned.
+        """
         raise NotImplementedError()
 
     async def get_by_fqid(self, newsfeed_id: str, event_id: str) -> EventData:
         """Return event of specified newsfeed."""
         raise NotImplementedError()
 
+    async def get_child_fqids(self, newsfeed_id: str, event_id: str) -> List[EventFQIDData]:
+        """Return child FQIDs of specified event."""
+        raise NotImplementedError()
+
+    async def get_child_fqids_many(self, fqids: Sequence[EventFQIDData]) -> List[List[EventFQIDData]]:
+        """Return child FQIDs of multiple events at once, in order of event FQIDs."""
+        raise NotImplementedError()
+
     async def add(self, event_data: EventData) -> None:
         """Add event to the storage."""
         raise NotImplementedError()
 
+    async def add_many(self, events_data: Sequence[EventData], parent_fqid: Optional[EventFQIDData] = None) -> None:
+        """Add multiple events to the storage at once.
+
+        Events that are already stored are skipped, so adding could be safely retried. Events that
+        have been deleted are skipped too, so event is not added if its posting is processed after
+        its deletion.
+
+        If ``parent_fqid`` is specified, events are added only if parent event exists, otherwise
+        ``EventNotFound`` is raised. Existence is checked atomically with adding, so copies of
+        event are not added after its deletion.
+        """
+        raise NotImplementedError()
+
     async def delete_by_fqid(self, newsfeed_id: str, event_id: str) -> None:
-        """Delete specified event."""
+        """Delete specified event, ``EventNotFound`` is raised if it is not stored."""
+        raise NotImplementedError()
+
+    async def record_deletion(self, newsfeed_id: str, event_id: str) -> None:
+        """Record deletion of event, so event is not added for ``deletions_ttl`` seconds."""
+        raise NotImplementedError()
+
+    async def add_fan_out_on_read_newsfeed(self, newsfeed_id: str) -> None:
+        """Mark newsfeed as having events that are merged into subscriber newsfeeds on reading."""
         raise NotImplementedError()
 
+    async def get_fan_out_on_read_newsfeeds(self, newsfeed_ids: Sequence[str]) -> Set[str]:
+        """Return ids of specified newsfeeds that are marked as having events merged on reading."""
+        raise NotImplementedError()
+
+    async def get_metrics(self) -> Dict[str, Any]:
+        """Return storage metrics."""
+        raise NotImplementedError()
+
+    @staticmethod
+    def _split_child_fqids(event_data: EventData) -> Tuple[EventData, List[EventFQIDData]]:
+        event_data = dict(event_data)
+        child_fqids = cast(List[Any], event_data.pop('child_fqids', None) or [])
+        return event_data, [(str(newsfeed_id), str(event_id)) for newsfeed_id, event_id in child_fqids]
+
 
 class InMemoryEventStorage(EventStorage):
-    """Event storage that stores events in memory."""
+    """Event storage that stores events in memory.
+
+    Events of each newsfeed are kept newest first in an ordered dictionary keyed by event id.
+    Child FQIDs are kept packed by ``pack_fqids()`` and keyed by parent event id.
+
+    Newsfeeds are kept in order of their use, reading or adding of events moves newsfeed to the
+    end. When there are more than ``max_newsfeeds`` newsfeeds or, if ``max_bytes`` is configured,
+    estimated size of events exceeds it, the least recently used newsfeeds are evicted entirely.
+
+    Deletions are kept in order of recording, that is also the order of their expiration, the
+    oldest ones are evicted when there are more than ``max_deletions`` of them.
+    """
 
     def __init__(self, config: Dict[str, str]):
         """Initialize storage."""
         super().__init__(config)
-        self._storage: Dict[str, Deque[EventData]] = defaultdict(deque)
+        self._storage: 'OrderedDict[str, OrderedDict[str, EventData]]' = OrderedDict()
+        self._child_fqids: Dict[str, bytes] = {}
+        self._fan_out_on_read_newsfeed_ids: Set[str] = set()
 
         self._max_newsfeed_ids = int(config['max_newsfeeds'])
         self._max_events_per_newsfeed_id = int(config['max_events_per_newsfeed'])
-
-    async def get_by_newsfeed_id(self, newsfeed_id: str) -> Iterable[EventData]:
+        self._max_bytes = int(config.get('max_bytes', 0))
+
+        self._deletions: 'OrderedDict[str, float]' = OrderedDict()
+        self._deletions_ttl = int(config.get('deletions_ttl', 0))
+        self._max_deletions = int(config.get('max_deletions', 0))
+
+        self._newsfeed_sizes: DefaultDict[str, int] = defaultdict(int)
+        self._size = 0
+        self._evicted_newsfeeds = 0
+        self._evicted_events = 0
+
+    async def get_by_newsfeed_id(
+            self,
+            newsfeed_id: str,
+            limit: Optional[int] = None,
+            after_event_id: Optional[str] = None,
+    ) -> Iterable[EventData]:
         """Get events data from storage."""
-        newsfeed_storage = self._storage[newsfeed_id]
-        return list(newsfeed_storage)
+        newsfeed_storage = self._get_newsfeed_storage(newsfeed_id)
+        event_ids = iter(newsfeed_storage)
+
+        if after_event_id is not None:
+            if after_event_id not in newsfeed_storage:
+                raise EventNotFound(
+                    newsfeed_id=newsfeed_id,
+                    event_id=after_event_id,
+                )
+            # Ids are skipped up to the cursor lazily, without copying ids of the whole newsfeed
+            for event_id in event_ids:
+                if event_id == after_event_id:
+                    break
+
+        return [newsfeed_storage[event_id] for event_id in islice(event_ids, limit)]
 
     async def get_by_fqid(self, newsfeed_id: str, event_id: str) -> EventData:
         """Return data of specified event."""
-        newsfeed_storage = self._storage[newsfeed_id]
-        for event in newsfeed_storage:
-            if event['id'] == event_id:
-                return event
-        else:
+        newsfeed_storage = self._get_newsfeed_storage(newsfeed_id)
+        try:
+            return newsfeed_storage[event_id]
+        except KeyError:
             raise EventNotFound(
                 newsfeed_id=newsfeed_id,
                 event_id=event_id,
             )
 
+    async def get_child_fqids(self, newsfeed_id: str, event_id: str) -> List[EventFQIDData]:
+        """Return child FQIDs of specified event."""
+        packed_child_fqids = self._child_fqids.get(event_id)
+        if not packed_child_fqids:
+            return []
+        return unpack_fqids(packed_child_fqids)
+
+    async def get_child_fqids_many(self, fqids: Sequence[EventFQIDData]) -> List[List[EventFQIDData]]:
+        """Return child FQIDs of multiple events at once."""
+        return [await self.get_child_fqids(newsfeed_id, event_id) for newsfeed_id, event_id in fqids]
+
     async def add(self, event_data: EventData) -> None:
         """Add event data to the storage."""
-        newsfeed_id = str(event_data['newsfeed_id'])
+        self._add(event_data)
 
-        if len(self._storage) >= self._max_newsfeed_ids:
-            raise NewsfeedNumberLimitExceeded(newsfeed_id, self._max_newsfeed_ids)
+    async def add_many(self, events_data: Sequence[EventData], parent_fqid: Optional[EventFQIDData] = None) -> None:
+        """Add multiple events data to the storage at once."""
+        if parent_fqid is not None:
+            parent_newsfeed_id, parent_event_id = parent_fqid
+            if parent_event_id not in self._storage.get(parent_newsfeed_id, {}):
+                raise EventNotFound(
+                    newsfeed_id=parent_newsfeed_id,
+                    event_id=parent_event_id,
+                )
+        for event_data in events_data:
+            self._add(event_data)
+
+    async def delete_by_fqid(self, newsfeed_id: str, event_id: str) -> None:
+        """Delete data of specified event."""
+        newsfeed_storage = self._storage.get(newsfeed_id)
+        if newsfeed_storage is None or event_id not in newsfeed_storage:
+            raise EventNotFound(
+                newsfeed_id=newsfeed_id,
+                event_id=event_id,
+            )
+        self._remove(newsfeed_id, event_id, newsfeed_storage.pop(event_id))
+        if not newsfeed_storage:
+            del self._storage[newsfeed_id]
+            del self._newsfeed_sizes[newsfeed_id]
+
+    async def record_deletion(self, newsfeed_id: str, event_id: str) -> None:
+        """Record deletion of event."""
+        if not self._deletions_ttl or not self._max_deletions:
+            return
+        self._deletions.pop(event_id, None)
+        self._deletions[event_id] = time.monotonic() + self._deletions_ttl
+        if len(self._deletions) > self._max_deletions:
+            self._deletions.popitem(last=False)
+
+    async def add_fan_out_on_read_newsfeed(self, newsfeed_id: str) -> None:
+        """Mark newsfeed as having events that are merged into subscriber newsfeeds on reading."""
+        self._fan_out_on_read_newsfeed_ids.add(newsfeed_id)
+
+    async def get_fan_out_on_read_newsfeeds(self, newsfeed_ids: Sequence[str]) -> Set[str]:
+        """Return ids of specified newsfeeds that are marked as having events merged on reading."""
+        return self._fan_out_on_read_newsfeed_ids.intersection(newsfeed_ids)
+
+    async def get_metrics(self) -> Dict[str, Any]:
+        """Return numbers of newsfeeds and events, estimated size of events and evictions."""
+        return {
+            'newsfeeds': len(self._storage),
+            'events': sum(len(newsfeed_storage) for newsfeed_storage in self._storage.values()),
+            'size': self._size,
+            'evicted_newsfeeds': self._evicted_newsfeeds,
+            'evicted_events': self._evicted_events,
+        }
+
+    def _get_newsfeed_storage(self, newsfeed_id: str) -> 'OrderedDict[str, EventData]':
+        newsfeed_storage = self._storage.get(newsfeed_id)
+        if newsfeed_storage is None:
+            return OrderedDict()
+        self._storage.move_to_end(newsfeed_id)
+        return newsfeed_storage
 
+    def _add(self, event_data: EventData) -> None:
+        newsfeed_id = str(event_data['newsfeed_id'])
+        event_id = str(event_data['id'])
+        if self._is_deleted(event_id):
+            return
+        event_data, child_fqids = self._split_child_fqids(event_data)
+
+        if newsfeed_id not in self._storage:
+            self._storage[newsfeed_id] = OrderedDict()
+        self._storage.move_to_end(newsfeed_id)
         newsfeed_storage = self._storage[newsfeed_id]
 
+        if event_id in newsfeed_storage:
+            # Event is delivered again, it keeps its data and position as redis storage does
+            return
         if len(newsfeed_storage) >= self._max_events_per_newsfeed_id:
-            newsfeed_storage.pop()
+            evicted_event_id, evicted_event_data = newsfeed_storage.popitem(last=True)
+            self._remove(newsfeed_id, evicted_event_id, evicted_event_data)
 
-        newsfeed_storage.appendleft(event_data)
+        newsfeed_storage[event_id] = event_data
+        newsfeed_storage.move_to_end(event_id, last=False)
 
-    async def delete_by_fqid(self, newsfeed_id: str, event_id: str) -> None:
-        """Delete data of specified event."""
-        newsfeed_storage = self._storage[newsfeed_id]
-        event_index = None
-        for index, event in enumerate(newsfeed_storage):
-            if event['id'] == event_id:
-                event_index = index
+        if child_fqids:
+            self._child_fqids[event_id] = pack_fqids(child_fqids)
+
+        event_size = _estimate_size(event_data) + len(self._child_fqids.get(event_id, b''))
+        self._newsfeed_sizes[newsfeed_id] += event_size
+        self._size += event_size
+
+        self._evict_newsfeeds()
+
+    def _is_deleted(self, event_id: str) -> bool:
+        if not self._deletions:
+            return False
+        now = time.monotonic()
+        while self._deletions:
+            oldest_event_id, expires_at = next(iter(self._deletions.items()))
+            if expires_at > now:
                 break
-        if event_index is not None:
-            del newsfeed_storage[event_index]
+            del self._deletions[oldest_event_id]
+        return event_id in self._deletions
+
+    def _is_over_limits(self) -> bool:
+        if len(self._storage) > self._max_newsfeed_ids:
+            return True
+        return bool(self._max_bytes) and self._size > self._max_bytes
+
+    def _remove(self, newsfeed_id: str, event_id: str, event_data: EventData) -> None:
+        event_size = _estimate_size(event_data) + len(self._child_fqids.pop(event_id, b''))
+        self._newsfeed_sizes[newsfeed_id] -= event_size
+        self._size -= event_size
+
+    def _evict_newsfeeds(self) -> None:
+        # The most recently used newsfeed is never evicted, even if it exceeds size limit alone
+        while len(self._storage) > 1 and self._is_over_limits():
+            newsfeed_id, newsfeed_storage = self._storage.popitem(last=False)
+            for event_id in newsfeed_storage:
+                self._child_fqids.pop(event_id, None)
+            self._size -= self._newsfeed_sizes.pop(newsfeed_id)
+            self._evicted_newsfeeds += 1
+            self._evicted_events += len(newsfeed_storage)
+
+
+def _estimate_size(data: Any) -> int:
+    """Estimate size of data in memory, sizes of shared objects are counted every time."""
+    size = sys.getsizeof(data)
+    if isinstance(data, dict):
+        size += sum(_estimate_size(key) + _estimate_size(value) for key, value in data.items())
+    elif isinstance(data, (list, tuple)):
+        size += sum(_estimate_size(item) for item in data)
+    return size
+
+
+# Adds events that are not stored yet. Keys are newsfeeds sorted set, events sequence and parent
+# event hash, then newsfeed sorted set and event hash of every event. Arguments are limits, ttl,
+# current time and flag of parent requirement, then newsfeed id, event id, serialized event and
+# packed child FQIDs, that are empty if there are none, of every event. Newsfeeds are trimmed to
+# ``max_events`` newest events, evicted events are deleted, their keys are built from their ids.
+# Events with recorded deletions are skipped, keys of deletions are built from event ids too.
+# Nothing is added and 0 is returned if parent is required, but its hash does not exist. Events of
+# newsfeeds that would exceed ``max_newsfeeds`` are skipped, ids of such newsfeeds are returned.
+_ADD_EVENTS_SCRIPT = RedisScript('''
+local newsfeeds_key = KEYS[1]
+local sequence_key = KEYS[2]
+local max_newsfeeds = tonumber(ARGV[1])
+local max_events = tonumber(ARGV[2])
+local ttl = tonumber(ARGV[3])
+local now = tonumber(ARGV[4])
+local events_number = (#KEYS - 3) / 2
+
+if ARGV[5] == '1' and redis.call('EXISTS', KEYS[3]) == 0 then
+    return 0
+end
+
+redis.call('ZREMRANGEBYSCORE', newsfeeds_key, '-inf', now)
+local newsfeeds_number = redis.call('ZCARD', newsfeeds_key)
+local new_newsfeed_ids = {}
+local skipped_newsfeed_ids = {}
+local is_skipped = {}
+for i = 1, events_number do
+    local newsfeed_id = ARGV[i * 4 + 2]
+    if not new_newsfeed_ids[newsfeed_id] and not is_skipped[newsfeed_id]
+            and not redis.call('ZSCORE', newsfeeds_key, newsfeed_id) then
+        if newsfeeds_number >= max_newsfeeds then
+            is_skipped[newsfeed_id] = true
+            skipped_newsfeed_ids[#skipped_newsfeed_ids + 1] = newsfeed_id
+        else
+            new_newsfeed_ids[newsfeed_id] = true
+            newsfeeds_number = newsfeeds_number + 1
+        end
+    end
+end
+
+local expires_at = '+inf'
+if ttl > 0 then
+    expires_at = now + ttl
+end
+for i = 1, events_number do
+    local newsfeed_key = KEYS[i * 2 + 2]
+    local event_key = KEYS[i * 2 + 3]
+    local newsfeed_id = ARGV[i * 4 + 2]
+    local child_fqids = ARGV[i * 4 + 5]
+    if not is_skipped[newsfeed_id] and redis.call('EXISTS', event_key) == 0
+            and redis.call('EXISTS', 'deleted_event:' .. ARGV[i * 4 + 3]) == 0 then
+        if child_fqids == '' then
+            redis.call('HSET', event_key, 'data', ARGV[i * 4 + 4])
+        else
+            redis.call('HSET', event_key, 'data', ARGV[i * 4 + 4], 'child_fqids', child_fqids)
+        end
+        redis.call('ZADD', newsfeed_key, redis.call('INCR', sequence_key), ARGV[i * 4 + 3])
+
+        local evicted_event_ids = redis.call('ZRANGE', newsfeed_key, 0, -max_events - 1)
+        if #evicted_event_ids > 0 then
+            redis.call('ZREMRANGEBYRANK', newsfeed_key, 0, -max_events - 1)
+            for _, evicted_event_id in ipairs(evicted_event_ids) do
+                redis.call('DEL', 'event:' .. evicted_event_id)
+            end
+        end
+
+        if ttl > 0 then
+            redis.call('EXPIRE', event_key, ttl)
+            redis.call('EXPIRE', newsfeed_key, ttl)
+        end
+        redis.call('ZADD', newsfeeds_key, expires_at, newsfeed_id)
+    end
+end
+return skipped_newsfeed_ids
+''')
+
+# Returns serialized events of newsfeed sorted set newest first, starting after specified event if
+# it is not empty and no more than ``limit`` of them if it is not 0. Ids of expired events are
+# removed from the sorted set and are not counted in the limit. Returns nothing if event to start
+# after is not found.
+_GET_EVENTS_SCRIPT = RedisScript('''
+local newsfeed_key = KEYS[1]
+local after_event_id = ARGV[1]
+local limit = tonumber(ARGV[2])
+
+local start = 0
+if after_event_id ~= '' then
+    local rank = redis.call('ZREVRANK', newsfeed_key, after_event_id)
+    if not rank then
+        return false
+    end
+    start = rank + 1
+end
+
+local events = {}
+while true do
+    local stop = -1
+    if limit > 0 then
+        stop = start + limit - #events - 1
+    end
+    local event_ids = redis.call('ZREVRANGE', newsfeed_key, start, stop)
+    for _, event_id in ipairs(event_ids) do
+        local event = redis.call('HGET', 'event:' .. event_id, 'data')
+        if event then
+            events[#events + 1] = event
+            start = start + 1
+        else
+            redis.call('ZREM', newsfeed_key, event_id)
+        end
+    end
+    if stop == -1 or #event_ids == 0 or #events >= limit then
+        return events
+    end
+end
+''')
+
+# Deletes event from newsfeed sorted set and its hash, newsfeed is removed from newsfeeds sorted set
+# when its last event is deleted. Returns 0 if event is not found.
+_DELETE_EVENT_SCRIPT = RedisScript('''
+local is_deleted = redis.call('ZREM', KEYS[2], ARGV[2]) + redis.call('DEL', KEYS[3])
+if redis.call('EXISTS', KEYS[2]) == 0 then
+    redis.call('ZREM', KEYS[1], ARGV[1])
+end
+return is_deleted
+''')
 
 
 class RedisEventStorage(EventStorage):
-    """Event storage that stores events in redis."""
-
-    def __init__(self, config: Dict[str, str]):
+    """Event storage that stores events in redis.
+
+    Ids of newsfeed events are kept in ``newsfeed_events:{newsfeed_id}`` sorted set scored by
+    sequence of adding, so newsfeeds are trimmed by rank and events are deleted and found for
+    pagination in logarithmic time. Event data and its child FQIDs packed by ``pack_fqids()`` are
+    kept in ``event:{event_id}`` hash. Ids of newsfeeds are kept in ``newsfeeds`` sorted set scored
+    by time of their expiration to limit number of newsfeeds.
+
+    If ``ttl`` is configured, events and newsfeeds expire in ``ttl`` seconds after adding of their
+    latest event. Deletions are recorded in ``deleted_event:{event_id}`` keys that expire in
+    ``deletions_ttl`` seconds. Events are added, read and deleted by Lua scripts, so every operation is atomic
+    and takes a single round trip.
+
+    Events of newsfeeds that would exceed ``max_newsfeeds`` are not added. Single event is rejected
+    with ``NewsfeedNumberLimitExceeded`` error, but when multiple events are added, only events of
+    such newsfeeds are skipped, they are logged and counted in metrics.
+    """
+
+    def __init__(self, config: Dict[str, str], serializer: Serializer,
+                 redis_client_manager: RedisClientManager):
         """Initialize storage."""
         super().__init__(config)
 
-        redis_config = parse_redis_dsn(config['dsn'])
-        self._pool = aioredis.pool.ConnectionsPool(
-            address=redis_config['address'],
-            db=int(redis_config['db']),
-            create_connection_timeout=int(redis_config['connection_timeout']),
-            minsize=int(redis_config['minsize']),
-            maxsize=int(redis_config['maxsize']),
-            encoding='utf-8',
-        )
+        assert isinstance(serializer, Serializer)
+        self._serializer = serializer
+
+        assert isinstance(redis_client_manager, RedisClientManager)
+        self._redis_client = redis_client_manager.get_client(config['dsn'])
 
-    async def get_by_newsfeed_id(self, newsfeed_id: str) -> Iterable[EventData]:
+        self._max_newsfeed_ids = int(config['max_newsfeeds'])
+        self._max_events_per_newsfeed_id = int(config['max_events_per_newsfeed'])
+        self._ttl = int(config.get('ttl', 0))
+        self._deletions_ttl = int(config.get('deletions_ttl', 0))
+
+        self._skipped_events = 0
+
+    async def get_by_newsfeed_id(
+            self,
+            newsfeed_id: str,
+            limit: Optional[int] = None,
+            after_event_id: Optional[str] = None,
+    ) -> Iterable[EventData]:
         """Get events data from storage."""
-        async with self._get_connection() as redis:
-            newsfeed_storage = []
-            # TODO:
-            #  - Check async
-            for event in await redis.lrange(key=f'newsfeed_id:{newsfeed_id}',
-                                            start=0,
-                                            stop=-1):
-                newsfeed_storage.append(json.loads(event))
-        return newsfeed_storage
+        async with self._redis_client.get_connection() as redis:
+            events = await _GET_EVENTS_SCRIPT.execute(
+                redis,
+                keys=[f'newsfeed_events:{newsfeed_id}'],
+                args=[after_event_id or '', limit or 0],
+            )
+
+        if events is None:
+            raise EventNotFound(
+                newsfeed_id=newsfeed_id,
+                event_id=str(after_event_id),
+            )
+        return [self._serializer.loads(event) for event in events]
 
     async def get_by_fqid(self, newsfeed_id: str, event_id: str) -> EventData:
         """Return data of specified event."""
-        async with self._get_connection() as redis:
-            event = await redis.get(f'event:{event_id}')
+        async with self._redis_client.get_connection() as redis:
+            event = await redis.hget(f'event:{event_id}', 'data')
 
         if not event:
             raise EventNotFound(
@@ -131,42 +512,143 @@ class RedisEventStorage(EventStorage):
                 event_id=event_id,
             )
         else:
-            return cast(EventData, json.loads(event))
+            return cast(EventData, self._serializer.loads(event))
+
+    async def get_child_fqids(self, newsfeed_id: str, event_id: str) -> List[EventFQIDData]:
+        """Return child FQIDs of specified event."""
+        async with self._redis_client.get_connection() as redis:
+            packed_child_fqids = await redis.hget(f'event:{event_id}', 'child_fqids', encoding=None)
+
+        if not packed_child_fqids:
+            return []
+        return unpack_fqids(packed_child_fqids)
+
+    async def get_child_fqids_many(self, fqids: Sequence[EventFQIDData]) -> List[List[EventFQIDData]]:
+        """Return child FQIDs of multiple events in a single pipeline."""
+        if not fqids:
+            return []
+        async with self._redis_client.get_connection() as redis:
+            pipeline = redis.pipeline()
+            for _, event_id in fqids:
+                pipeline.hget(f'event:{event_id}', 'child_fqids', encoding=None)
+            packed_child_fqids_of_events = await pipeline.execute()
+        return [
+            unpack_fqids(packed_child_fqids) if packed_child_fqids else []
+            for packed_child_fqids in packed_child_fqids_of_events
+        ]
 
     async def add(self, event_data: EventData) -> None:
         """Add event data to the storage."""
-        newsfeed_id = str(event_data['newsfeed_id'])
+        skipped_newsfeed_ids = await self._add_many([event_data])
+        if skipped_newsfeed_ids:
+            raise NewsfeedNumberLimitExceeded(skipped_newsfeed_ids[0], self._max_newsfeed_ids)
+
+    async def add_many(self, events_data: Sequence[EventData], parent_fqid: Optional[EventFQIDData] = None) -> None:
+        """Add multiple events data to the storage atomically.
+
+        Events that are already stored are skipped, so adding could be safely retried. Events of
+        newsfeeds that would exceed maximum number of newsfeeds are skipped too.
+        """
+        skipped_newsfeed_ids = await self._add_many(events_data, parent_fqid)
+        if not skipped_newsfeed_ids:
+            return
+
+        skipped_events_number = sum(
+            1
+            for event_data in events_data
+            if event_data['newsfeed_id'] in skipped_newsfeed_ids
+        )
+        self._skipped_events += skipped_events_number
+        logger.warning(
+            'Skipped %d events of %d newsfeeds, number of newsfeeds exceeds maximum %d',
+            skipped_events_number,
+            len(skipped_newsfeed_ids),
+            self._max_newsfeed_ids,
+        )
 
-        async with self._get_connection() as redis:
-            await redis.lpush(
-                key=f'newsfeed_id:{newsfeed_id}',
-                value=json.dumps(event_data),
-            )
-            await redis.append(
-                key=f"event:{event_data['id']}",
-                value=json.dumps(event_data),
+    async def _add_many(
+            self,
+            events_data: Sequence[EventData],
+            parent_fqid: Optional[EventFQIDData] = None,
+    ) -> List[str]:
+        parent_event_id = parent_fqid[1] if parent_fqid is not None else ''
+        keys: List[str] = ['newsfeeds', 'events_sequence', f'event:{parent_event_id}']
+        args: List[Any] = [
+            self._max_newsfeed_ids,
+            self._max_events_per_newsfeed_id,
+            self._ttl,
+            time.time(),
+            int(parent_fqid is not None),
+        ]
+        for event_data in events_data:
+            event_data, child_fqids = self._split_child_fqids(event_data)
+            keys.extend((
+                f"newsfeed_events:{event_data['newsfeed_id']}",
+                f"event:{event_data['id']}",
+            ))
+            args.extend((
+                event_data['newsfeed_id'],
+                event_data['id'],
+                self._serializer.dumps(event_data),
+                pack_fqids(child_fqids) if child_fqids else b'',
+            ))
+
+        async with self._redis_client.get_connection() as redis:
+            skipped_newsfeed_ids = await _ADD_EVENTS_SCRIPT.execute(redis, keys=keys, args=args)
+
+        if skipped_newsfeed_ids == 0 and parent_fqid is not None:
+            raise EventNotFound(
+                newsfeed_id=parent_fqid[0],
+                event_id=parent_fqid[1],
             )
+        return cast(List[str], skipped_newsfeed_ids)
 
     async def delete_by_fqid(self, newsfeed_id: str, event_id: str) -> None:
         """Delete data of specified event."""
-        async with self._get_connection() as redis:
-            event_key = f'event:{event_id}'
-            newsfeed = f'newsfeed_id:{newsfeed_id}'
-            event = await redis.get(event_key)
-            if not event:
-                raise EventNotFound(
-                    newsfeed_id=newsfeed_id,
-                    event_id=event_id,
-                )
-            else:
-                await redis.lrem(newsfeed, 1, event)
-                await redis.delete(event_key)
-
-    @asynccontextmanager
-    async def _get_connection(self) -> aioredis.commands.Redis:
-        async with self._pool.get() as connection:
-            redis = aioredis.commands.Redis(connection)
-            yield redis
+        async with self._redis_client.get_connection() as redis:
+            is_deleted = await _DELETE_EVENT_SCRIPT.execute(
+                redis,
+                keys=['newsfeeds', f'newsfeed_events:{newsfeed_id}', f'event:{event_id}'],
+                args=[newsfeed_id, event_id],
+            )
+
+        if not is_deleted:
+            raise EventNotFound(
+                newsfeed_id=newsfeed_id,
+                event_id=event_id,
+            )
+
+    async def record_deletion(self, newsfeed_id: str, event_id: str) -> None:
+        """Record deletion of event."""
+        if not self._deletions_ttl:
+            return
+        async with self._redis_client.get_connection() as redis:
+            await redis.set(f'deleted_event:{event_id}', 1, expire=self._deletions_ttl)
+
+    async def add_fan_out_on_read_newsfeed(self, newsfeed_id: str) -> None:
+        """Mark newsfeed as having events that are merged into subscriber newsfeeds on reading."""
+        async with self._redis_client.get_connection() as redis:
+            await redis.sadd('fan_out_on_read_newsfeeds', newsfeed_id)
+
+    async def get_fan_out_on_read_newsfeeds(self, newsfeed_ids: Sequence[str]) -> Set[str]:
+        """Return ids of specified newsfeeds that are marked as having events merged on reading."""
+        if not newsfeed_ids:
+            return set()
+        async with self._redis_client.get_connection() as redis:
+            pipeline = redis.pipeline()
+            for newsfeed_id in newsfeed_ids:
+                pipeline.sismember('fan_out_on_read_newsfeeds', newsfeed_id)
+            are_marked = await pipeline.execute()
+        return {newsfeed_id for newsfeed_id, is_marked in zip(newsfeed_ids, are_marked) if is_marked}
+
+    async def get_metrics(self) -> Dict[str, Any]:
+        """Return number of newsfeeds that have not expired and number of skipped events."""
+        async with self._redis_client.get_connection() as redis:
+            newsfeeds_number = await redis.zcount('newsfeeds', min=time.time())
+        return {
+            'newsfeeds': int(newsfeeds_number),
+            'skipped_events': self._skipped_events,
+        }
 
 
 class EventStorageError(Exception):
@@ -0,0 +1,117 @@
+"""Infrastructure idempotency key storages module."""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple, cast
+
+from .redis_clients import RedisClientManager
+from .serializers import Serializer
+
+
+OperationData = Dict[str, Any]
+
+
+class IdempotencyKeyStorage:
+    """Idempotency key storage.
+
+    Storage keeps data of operations by their idempotency keys for ``ttl`` seconds, so repeated
+    operation with the same key could be answered with data of the original one.
+    """
+
+    def __init__(self, config: Dict[str, str]):
+        """Initialize storage."""
+        self._config = config
+        self._ttl = int(config['ttl'])
+
+    async def add(self, key: str, data: OperationData) -> Optional[OperationData]:
+        """Add operation data by key.
+
+        If key is already known, data is not added and data added by the key before is returned.
+        """
+        raise NotImplementedError()
+
+    async def delete(self, key: str) -> None:
+        """Delete key, so it could be used again."""
+        raise NotImplementedError()
+
+
+class InMemoryIdempotencyKeyStorage(IdempotencyKeyStorage):
+    """Idempotency key storage that stores keys in memory.
+
+    Keys are kept in an ordered dictionary in order of adding, that is also the order of their
+    expiration. Expired keys are purged on adding, the oldest keys are evicted when there are
+    more than ``max_keys`` of them.
+    """
+
+    def __init__(self, config: Dict[str, str]):
+        """Initialize storage."""
+        super().__init__(config)
+        self._storage: 'OrderedDict[str, Tuple[float, OperationData]]' = OrderedDict()
+        self._max_keys = int(config['max_keys'])
+
+    async def add(self, key: str, data: OperationData) -> Optional[OperationData]:
+        """Add operation data by key if key is not known, return known data otherwise."""
+        now = time.monotonic()
+        self._purge_expired(now)
+
+        if key in self._storage:
+            return self._storage[key][1]
+
+        self._storage[key] = (now + self._ttl, data)
+        if len(self._storage) > self._max_keys:
+            self._storage.popitem(last=False)
+        return None
+
+    async def delete(self, key: str) -> None:
+        """Delete key."""
+        self._storage.pop(key, None)
+
+    def _purge_expired(self, now: float) -> None:
+        while self._storage:
+            key, (expires_at, _) = next(iter(self._storage.items()))
+            if expires_at > now:
+                break
+            del self._storage[key]
+
+
+class RedisIdempotencyKeyStorage(IdempotencyKeyStorage):
+    """Idempotency key storage that stores keys in redis.
+
+    Every key is stored with ``SET NX EX``, so concurrent operations with the same key are
+    resolved by redis and keys are expired by redis too.
+    """
+
+    def __init__(self, config: Dict[str, str], serializer: Serializer,
+                 redis_client_manager: RedisClientManager):
+        """Initialize storage."""
+        super().__init__(config)
+
+        assert isinstance(serializer, Serializer)
+        self._serializer = serializer
+
+        assert isinstance(redis_client_manager, RedisClientManager)
+        self._redis_client = redis_client_manager.get_client(config['dsn'])
+
+    async def add(self, key: str, data: OperationData) -> Optional[OperationData]:
+        """Add operation data by key if key is not known, return known data otherwise."""
+        serialized_data = self._serializer.dumps(data)
+        async with self._redis_client.get_connection() as redis:
+            while True:
+                is_added = await redis.set(
+                    f'idempotency_keys:{key}',
+                    serialized_data,
+                    expire=self._ttl,
+                    exist=redis.SET_IF_NOT_EXIST,
+                )
+                if is_added:
+                    return None
+
+                known_data = await redis.get(f'idempotency_keys:{key}')
+                if known_data is not None:
+                    return cast(OperationData, self._serializer.loads(known_data))
+                # Key has expired between commands, so adding is tried again
+
+    async def delete(self, key: str) -> None:
+        """Delete key."""
+        async with self._redis_client.get_connection() as redis:
+            await redis.delete(f'idempotency_keys:{key}')
@@ -0,0 +1,186 @@
+"""Infrastructure redis clients module."""
+
+import asyncio
+import hashlib
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import aioredis
+
+from .utils import WaitTimes, parse_redis_dsn
+
+
+logger = logging.getLogger(__name__)
+
+
+class RedisClient:
+    """Redis client with a pool of connections.
+
+    Connections are checked out from the pool for every operation, time of waiting for a free
+    connection is measured. Commands wrapper is created once for every connection of the pool.
+    """
+
+    def __init__(self, dsn: str, health_check_interval: float):
+        """Initialize client."""
+        redis_config = parse_redis_dsn(dsn)
+        self._pool = aioredis.pool.ConnectionsPool(
+            address=redis_config['address'],
+            db=int(redis_config['db']),
+            create_connection_timeout=int(redis_config['connection_timeout']),
+            minsize=int(redis_config['minsize']),
+            maxsize=int(redis_config['maxsize']),
+            encoding='utf-8',
+        )
+        self._commands: Dict[aioredis.RedisConnection, aioredis.commands.Redis] = {}
+
+        self._health_check_interval = health_check_interval
+        self._health_check_task: Optional['asyncio.Task[None]'] = None
+        self._is_healthy: Optional[bool] = None
+
+        self._wait_times = WaitTimes()
+
+    @asynccontextmanager
+    async def get_connection(self) -> AsyncIterator[aioredis.commands.Redis]:
+        """Check out connection from the pool and return commands wrapper of it."""
+        start = time.monotonic()
+        connection = await self._pool.acquire()
+        self._wait_times.add('acquire', time.monotonic() - start)
+        try:
+            commands = self._commands.get(connection)
+            if commands is None:
+                # Pool has opened a new connection, wrappers of closed ones are not needed anymore
+                self._commands = {
+                    known_connection: known_commands
+                    for known_connection, known_commands in self._commands.items()
+                    if not known_connection.closed
+                }
+                commands = self._commands[connection] = aioredis.commands.Redis(connection)
+            yield commands
+        finally:
+            self._pool.release(connection)
+
+    async def start(self) -> None:
+        """Open ``minsize`` connections and start periodic health checks."""
+        await self.check_health()
+        if self._health_check_interval and self._health_check_task is None:
+            self._health_check_task = asyncio.ensure_future(self._check_health_periodically())
+
+    async def check_health(self) -> bool:
+        """Check that redis responds to ping.
+
+        Broken connections are closed by the pool and replaced on the next checkout.
+        """
+        try:
+            async with self.get_connection() as redis:
+                await redis.ping()
+        except (aioredis.RedisError, OSError, asyncio.TimeoutError) as exception:
+            logger.warning('Redis health check has failed: %r', exception)
+            self._is_healthy = False
+        else:
+            self._is_healthy = True
+        return self._is_healthy
+
+    async def close(self) -> None:
+        """Stop health checks and close all connections."""
+        if self._health_check_task is not None:
+            self._health_check_task.cancel()
+            await asyncio.gather(self._health_check_task, return_exceptions=True)
+            self._health_check_task = None
+        self._pool.close()
+        await self._pool.wait_closed()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Return pool size, number of free connections and time of waiting for a connection."""
+        return {
+            'healthy': self._is_healthy,
+            'size': self._pool.size,
+            'free': self._pool.freesize,
+            'minsize': self._pool.minsize,
+            'maxsize': self._pool.maxsize,
+            'wait_time': self._wait_times.get_statistics().get('acquire'),
+        }
+
+    async def _check_health_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self._health_check_interval)
+            await self.check_health()
+
+
+class RedisClientManager:
+    """Manager of redis clients shared by all redis-backed components.
+
+    Components that use the same dsn share the same client, unless they ask for clients with
+    different names, e.g. for connections that are held by blocking commands.
+    """
+
+    def __init__(self, health_check_interval: float = 30):
+        """Initialize manager."""
+        self._health_check_interval = float(health_check_interval)
+        self._clients: Dict[Tuple[str, str], RedisClient] = {}
+        self._is_started = False
+
+    def get_client(self, dsn: str, name: str = 'default') -> RedisClient:
+        """Return client of specified dsn, client is created on the first request."""
+        if (dsn, name) not in self._clients:
+            client = RedisClient(dsn, self._health_check_interval)
+            self._clients[(dsn, name)] = client
+            if self._is_started:
+                asyncio.ensure_future(client.start())
+        return self._clients[(dsn, name)]
+
+    async def start(self) -> None:
+        """Prewarm connections of all clients and start their health checks.
+
+        Clients that are created later are started on creation.
+        """
+        self._is_started = True
+        await asyncio.gather(*(client.start() for client in self._clients.values()))
+
+    async def close(self) -> None:
+        """Close all clients."""
+        self._is_started = False
+        await asyncio.gather(*(client.close() for client in self._clients.values()))
+        self._clients.clear()
+
+    def get_metrics(self) -> List[Dict[str, Any]]:
+        """Return metrics of all clients, dsn passwords are masked."""
+        return [
+            {
+                'dsn': _mask_password(dsn),
+                'name': name,
+                **client.get_metrics(),
+            }
+            for (dsn, name), client in self._clients.items()
+        ]
+
+
+class RedisScript:
+    """Lua script that is executed by its SHA1 digest.
+
+    Redis caches scripts, so source of the script is sent only if redis does not know it yet, e.g.
+    after restart or ``SCRIPT FLUSH``.
+    """
+
+    def __init__(self, source: str):
+        """Initialize script."""
+        self._source = source
+        self._digest = hashlib.sha1(source.encode('utf-8')).hexdigest()
+
+    async def execute(self, redis: aioredis.commands.Redis, keys: List[str], args: List[Any]) -> Any:
+        """Execute script with specified keys and arguments."""
+        try:
+            return await redis.evalsha(self._digest, keys=keys, args=args)
+        except aioredis.errors.ReplyError as exception:
+            if not str(exception).startswith('NOSCRIPT'):
+                raise
+        return await redis.eval(self._source, keys=keys, args=args)
+
+
+def _mask_password(dsn: str) -> str:
+    parsed_dsn = urlparse(dsn)
+    if not parsed_dsn.password:
+        return dsn
+    return parsed_dsn._replace(netloc=parsed_dsn.netloc.replace(parsed_dsn.password, '***', 1)).geturl()
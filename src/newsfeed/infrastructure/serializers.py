@@ -0,0 +1,126 @@
+"""Infrastructure serializers module.
+
+All serializers produce UTF-8 encoded JSON without whitespace between items and without escaping
+of non-ASCII characters, so output is more compact than output of ``json.dumps()`` with default
+arguments. Output of different backends is the same JSON, but not always the same bytes: floats
+in exponent notation are produced as ``1e+16`` and ``1.5e-07`` by standard library and as
+``1e16`` and ``1.5e-7`` by ``orjson`` and ``msgspec``. Non-finite floats are produced as ``NaN``
+and ``Infinity``, that are not valid JSON, by standard library and as ``null`` by other backends.
+"""
+
+import json
+import logging
+from typing import Any, Optional, Union
+
+
+logger = logging.getLogger(__name__)
+
+
+AUTO_BACKEND = 'auto'
+ORJSON_BACKEND = 'orjson'
+MSGSPEC_BACKEND = 'msgspec'
+JSON_BACKEND = 'json'
+BACKENDS = (ORJSON_BACKEND, MSGSPEC_BACKEND, JSON_BACKEND)
+
+
+class Serializer:
+    """Serializer that uses standard library ``json`` module."""
+
+    name = JSON_BACKEND
+
+    def dumps(self, data: Any) -> bytes:
+        """Serialize data to JSON."""
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        """Deserialize data from JSON."""
+        return json.loads(data)
+
+
+class OrjsonSerializer(Serializer):
+    """Serializer that uses ``orjson``.
+
+    Data that ``orjson`` can not serialize, like integers that do not fit 64 bits or non-string
+    dictionary keys, is serialized with standard library.
+    """
+
+    name = ORJSON_BACKEND
+
+    def __init__(self) -> None:
+        """Initialize serializer."""
+        import orjson
+        self._orjson = orjson
+
+    def dumps(self, data: Any) -> bytes:
+        """Serialize data to JSON."""
+        try:
+            return bytes(self._orjson.dumps(data))
+        except TypeError:
+            return super().dumps(data)
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        """Deserialize data from JSON."""
+        return self._orjson.loads(data)
+
+
+class MsgspecSerializer(Serializer):
+    """Serializer that uses ``msgspec``.
+
+    Data that ``msgspec`` can not serialize is serialized with standard library.
+    """
+
+    name = MSGSPEC_BACKEND
+
+    def __init__(self) -> None:
+        """Initialize serializer."""
+        import msgspec
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+        self._decode_error = msgspec.DecodeError
+
+    def dumps(self, data: Any) -> bytes:
+        """Serialize data to JSON."""
+        try:
+            return bytes(self._encoder.encode(data))
+        except (TypeError, OverflowError):
+            return super().dumps(data)
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        """Deserialize data from JSON."""
+        try:
+            return self._decoder.decode(data)
+        except self._decode_error as exception:
+            raise ValueError(str(exception))
+
+
+SERIALIZERS = {
+    ORJSON_BACKEND: OrjsonSerializer,
+    MSGSPEC_BACKEND: MsgspecSerializer,
+    JSON_BACKEND: Serializer,
+}
+
+
+def create_serializer(backend: Optional[str] = None) -> Serializer:
+    """Create serializer of specified backend.
+
+    If backend is not specified or is ``auto``, the fastest installed backend is used.
+    """
+    backend = backend or AUTO_BACKEND
+    if backend != AUTO_BACKEND and backend not in SERIALIZERS:
+        raise ValueError(
+            f'Unknown serializer backend "{backend}", should be one of: '
+            f'{", ".join((AUTO_BACKEND,) + BACKENDS)}'
+        )
+
+    backends = BACKENDS if backend == AUTO_BACKEND else (backend,)
+    for backend_name in backends:
+        try:
+            serializer = SERIALIZERS[backend_name]()
+        except ImportError:
+            if backend != AUTO_BACKEND:
+                logger.warning('Serializer backend "%s" is not installed', backend_name)
+        else:
+            logger.debug('Serializer backend: %s', serializer.name)
+            return serializer
+
+    return Serializer()
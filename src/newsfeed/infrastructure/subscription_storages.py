@@ -1,10 +1,16 @@
 """Infrastructure subscription storages module."""
 
-from collections import defaultdict, deque
-from typing import Iterable, Deque, Dict, Union
+from collections import defaultdict, OrderedDict
+from typing import DefaultDict, Iterable, Dict, List, Sequence, Set, Tuple, Union, cast
+
+import aioredis
+
+from .redis_clients import RedisClientManager, RedisScript
+from .serializers import Serializer
 
 
 SubscriptionData = Dict[str, Union[str, int]]
+NewsfeedIDsPair = Tuple[str, str]
 
 
 class SubscriptionStorage:
@@ -22,6 +28,10 @@ class SubscriptionStorage:
         """Return subscriptions to specified newsfeed."""
         raise NotImplementedError()
 
+    async def count_by_to_newsfeed_ids(self, newsfeed_ids: Sequence[str]) -> Dict[str, int]:
+        """Return numbers of subscriptions to specified newsfeeds."""
+        raise NotImplementedError()
+
     async def get_by_fqid(self, newsfeed_id: str, subscription_id: str) -> SubscriptionData:
         """Return subscription of specified newsfeed."""
         raise NotImplementedError()
@@ -30,44 +40,105 @@ class SubscriptionStorage:
         """Return subscription between specified newsfeeds."""
         raise NotImplementedError()
 
+    async def get_existing_between(self, pairs: Sequence[NewsfeedIDsPair]) -> Set[NewsfeedIDsPair]:
+        """Return pairs of newsfeed ids that have subscriptions between them."""
+        raise NotImplementedError()
+
     async def add(self, subscription_data: SubscriptionData) -> None:
         """Add subscription data to the storage."""
         raise NotImplementedError()
 
+    async def add_many(self, subscriptions_data: Sequence[SubscriptionData]) -> None:
+        """Add multiple subscriptions data to the storage at once.
+
+        Limits are checked for all subscriptions before adding, so either all of them are added or
+        none of them.
+        """
+        raise NotImplementedError()
+
     async def delete_by_fqid(self, newsfeed_id: str, subscription_id: str) -> None:
         """Delete specified subscription."""
         raise NotImplementedError()
 
+    async def delete_many(self, fqids: Sequence[Tuple[str, str]]) -> List[bool]:
+        """Delete multiple subscriptions at once.
+
+        Subscriptions are specified by pairs of newsfeed id and subscription id. For every
+        subscription it is returned whether it has been found and deleted.
+        """
+        raise NotImplementedError()
+
+    def _check_limits_of_many(
+            self,
+            subscriptions_data: Sequence[SubscriptionData],
+            newsfeeds_number: int,
+            known_newsfeed_ids: Set[str],
+            subscriptions_numbers: Dict[str, int],
+    ) -> None:
+        max_newsfeed_ids = int(self._config['max_newsfeeds'])
+        max_subscriptions_per_newsfeed = int(self._config['max_subscriptions_per_newsfeed'])
+
+        added_numbers: DefaultDict[str, int] = defaultdict(int)
+        for subscription_data in subscriptions_data:
+            newsfeed_id = str(subscription_data['newsfeed_id'])
+            if newsfeed_id not in known_newsfeed_ids:
+                if newsfeeds_number >= max_newsfeed_ids:
+                    raise NewsfeedNumberLimitExceeded(newsfeed_id, max_newsfeed_ids)
+                known_newsfeed_ids.add(newsfeed_id)
+                newsfeeds_number += 1
+
+            if subscriptions_numbers.get(newsfeed_id, 0) + added_numbers[newsfeed_id] \
+                    >= max_subscriptions_per_newsfeed:
+                raise SubscriptionNumberLimitExceeded(
+                    str(subscription_data['id']),
+                    newsfeed_id,
+                    str(subscription_data['to_newsfeed_id']),
+                    max_subscriptions_per_newsfeed,
+                )
+            added_numbers[newsfeed_id] += 1
+
 
 class InMemorySubscriptionStorage(SubscriptionStorage):
-    """Subscription storage that stores subscriptions in memory."""
+    """Subscription storage that stores subscriptions in memory.
+
+    Subscriptions are kept newest first in ordered dictionaries keyed by subscription id for both
+    directions and indexed by pair of newsfeeds they connect.
+    """
 
     def __init__(self, config: Dict[str, str]):
         """Initialize queue."""
         super().__init__(config)
-        self._subscriptions_storage: Dict[str, Deque[SubscriptionData]] = defaultdict(deque)
-        self._subscribers_storage: Dict[str, Deque[SubscriptionData]] = defaultdict(deque)
+        self._subscriptions_storage: Dict[str, 'OrderedDict[str, SubscriptionData]'] = {}
+        self._subscribers_storage: Dict[str, 'OrderedDict[str, SubscriptionData]'] = {}
+        self._between_index: Dict[Tuple[str, str], SubscriptionData] = {}
 
         self._max_newsfeed_ids = int(config['max_newsfeeds'])
         self._max_subscriptions_per_newsfeed = int(config['max_subscriptions_per_newsfeed'])
 
     async def get_by_newsfeed_id(self, newsfeed_id: str) -> Iterable[SubscriptionData]:
         """Return subscriptions of specified newsfeed."""
-        newsfeed_subscriptions_storage = self._subscriptions_storage[newsfeed_id]
-        return list(newsfeed_subscriptions_storage)
+        if newsfeed_id not in self._subscriptions_storage:
+            return []
+        return list(self._subscriptions_storage[newsfeed_id].values())
 
     async def get_by_to_newsfeed_id(self, newsfeed_id: str) -> Iterable[SubscriptionData]:
         """Return subscriptions to specified newsfeed."""
-        newsfeed_subscribers_storage = self._subscribers_storage[newsfeed_id]
-        return list(newsfeed_subscribers_storage)
+        if newsfeed_id not in self._subscribers_storage:
+            return []
+        return list(self._subscribers_storage[newsfeed_id].values())
+
+    async def count_by_to_newsfeed_ids(self, newsfeed_ids: Sequence[str]) -> Dict[str, int]:
+        """Return numbers of subscriptions to specified newsfeeds."""
+        return {
+            newsfeed_id: len(self._subscribers_storage.get(newsfeed_id, ()))
+            for newsfeed_id in newsfeed_ids
+        }
 
     async def get_by_fqid(self, newsfeed_id: str, subscription_id: str) -> SubscriptionData:
         """Return subscription of specified newsfeed."""
-        newsfeed_subscriptions_storage = self._subscriptions_storage[newsfeed_id]
-        for subscription_data in newsfeed_subscriptions_storage:
-            if subscription_data['id'] == subscription_id:
-                return subscription_data
-        else:
+        try:
+            return self._subscriptions_storage[newsfeed_id][subscription_id]
+        except KeyError:
             raise SubscriptionNotFound(
                 newsfeed_id=newsfeed_id,
                 subscription_id=subscription_id,
@@ -75,16 +146,9 @@ class InMemorySubscriptionStorage(SubscriptionStorage):
 
     async def get_between(self, newsfeed_id: str, to_newsfeed_id: str) -> SubscriptionData:
         """Return subscription between specified newsfeeds."""
-        if newsfeed_id not in self._subscriptions_storage:
-            raise SubscriptionBetweenNotFound(
-                newsfeed_id=newsfeed_id,
-                to_newsfeed_id=to_newsfeed_id,
-            )
-        newsfeed_subscriptions_storage = self._subscriptions_storage[newsfeed_id]
-        for subscription_data in newsfeed_subscriptions_storage:
-            if subscription_data['to_newsfeed_id'] == to_newsfeed_id:
-                return subscription_data
-        else:
+        try:
+            return self._between_index[(newsfeed_id, to_newsfeed_id)]
+        except KeyError:
             raise SubscriptionBetweenNotFound(
                 newsfeed_id=newsfeed_id,
                 to_newsfeed_id=to_newsfeed_id,
@@ -96,13 +160,11 @@ class InMemorySubscriptionStorage(SubscriptionStorage):
         newsfeed_id = str(subscription_data['newsfeed_id'])
         to_newsfeed_id = str(subscription_data['to_newsfeed_id'])
 
-        if len(self._subscriptions_storage) >= self._max_newsfeed_ids:
+        if newsfeed_id not in self._subscriptions_storage \
+                and len(self._subscriptions_storage) >= self._max_newsfeed_ids:
             raise NewsfeedNumberLimitExceeded(newsfeed_id, self._max_newsfeed_ids)
 
-        subscriptions_storage = self._subscriptions_storage[newsfeed_id]
-        subscribers_storage = self._subscribers_storage[to_newsfeed_id]
-
-        if len(subscriptions_storage) >= self._max_subscriptions_per_newsfeed:
+        if len(self._subscriptions_storage.get(newsfeed_id, ())) >= self._max_subscriptions_per_newsfeed:
             raise SubscriptionNumberLimitExceeded(
                 subscription_id,
                 newsfeed_id,
@@ -110,30 +172,337 @@ class InMemorySubscriptionStorage(SubscriptionStorage):
                 self._max_subscriptions_per_newsfeed,
             )
 
-        subscriptions_storage.appendleft(subscription_data)
-        subscribers_storage.appendleft(subscription_data)
+        self._store(subscription_data)
+
+    async def add_many(self, subscriptions_data: Sequence[SubscriptionData]) -> None:
+        """Add multiple subscriptions data to the storage at once."""
+        self._check_limits_of_many(
+            subscriptions_data,
+            newsfeeds_number=len(self._subscriptions_storage),
+            known_newsfeed_ids={
+                str(subscription_data['newsfeed_id'])
+                for subscription_data in subscriptions_data
+                if subscription_data['newsfeed_id'] in self._subscriptions_storage
+            },
+            subscriptions_numbers={
+                str(subscription_data['newsfeed_id']): len(
+                    self._subscriptions_storage.get(str(subscription_data['newsfeed_id']), ()),
+                )
+                for subscription_data in subscriptions_data
+            },
+        )
+        for subscription_data in subscriptions_data:
+            self._store(subscription_data)
+
+    async def get_existing_between(self, pairs: Sequence[NewsfeedIDsPair]) -> Set[NewsfeedIDsPair]:
+        """Return pairs of newsfeed ids that have subscriptions between them."""
+        return {pair for pair in pairs if pair in self._between_index}
 
     async def delete_by_fqid(self, newsfeed_id: str, subscription_id: str) -> None:
         """Delete specified subscription."""
-        newsfeed_subscriptions_storage = self._subscriptions_storage[newsfeed_id]
+        try:
+            newsfeed_subscriptions_storage = self._subscriptions_storage[newsfeed_id]
+            subscription_data = newsfeed_subscriptions_storage.pop(subscription_id)
+        except KeyError:
+            raise SubscriptionNotFound(
+                newsfeed_id=newsfeed_id,
+                subscription_id=subscription_id,
+            )
+        if not newsfeed_subscriptions_storage:
+            del self._subscriptions_storage[newsfeed_id]
+
+        to_newsfeed_id = str(subscription_data['to_newsfeed_id'])
+        newsfeed_subscribers_storage = self._subscribers_storage[to_newsfeed_id]
+
+        del newsfeed_subscribers_storage[subscription_id]
+        if not newsfeed_subscribers_storage:
+            del self._subscribers_storage[to_newsfeed_id]
+        del self._between_index[(newsfeed_id, to_newsfeed_id)]
+
+    async def delete_many(self, fqids: Sequence[Tuple[str, str]]) -> List[bool]:
+        """Delete multiple subscriptions at once."""
+        results = []
+        for newsfeed_id, subscription_id in fqids:
+            try:
+                await self.delete_by_fqid(newsfeed_id, subscription_id)
+            except SubscriptionNotFound:
+                results.append(False)
+            else:
+                results.append(True)
+        return results
+
+    def _store(self, subscription_data: SubscriptionData) -> None:
+        subscription_id = str(subscription_data['id'])
+        newsfeed_id = str(subscription_data['newsfeed_id'])
+        to_newsfeed_id = str(subscription_data['to_newsfeed_id'])
+
+        subscriptions_storage = self._subscriptions_storage.setdefault(newsfeed_id, OrderedDict())
+        subscriptions_storage[subscription_id] = subscription_data
+        subscriptions_storage.move_to_end(subscription_id, last=False)
+
+        subscribers_storage = self._subscribers_storage.setdefault(to_newsfeed_id, OrderedDict())
+        subscribers_storage[subscription_id] = subscription_data
+        subscribers_storage.move_to_end(subscription_id, last=False)
+
+        self._between_index[(newsfeed_id, to_newsfeed_id)] = subscription_data
+
+
+# Deletes subscriptions from their three hashes, newsfeed is removed from the set of newsfeeds
+# counted to the limit when its last subscription is deleted.
+_DELETE_SUBSCRIPTIONS_SCRIPT = RedisScript('''
+for i = 0, #ARGV / 3 - 1 do
+    local subscriptions_key = KEYS[i * 3 + 2]
+    redis.call('HDEL', subscriptions_key, ARGV[i * 3 + 2])
+    redis.call('HDEL', KEYS[i * 3 + 3], ARGV[i * 3 + 2])
+    redis.call('HDEL', KEYS[i * 3 + 4], ARGV[i * 3 + 3])
+    if redis.call('EXISTS', subscriptions_key) == 0 then
+        redis.call('SREM', KEYS[1], ARGV[i * 3 + 1])
+    end
+end
+''')
+
+
+class RedisSubscriptionStorage(SubscriptionStorage):
+    """Subscription storage that stores subscriptions in redis.
+
+    Every subscription is stored in three hashes: subscriptions of a newsfeed and subscribers of a
+    newsfeed are keyed by subscription id, subscriptions between newsfeeds are keyed by id of
+    newsfeed subscribed to.
+    """
 
-        subscription_data = None
-        for subscription in newsfeed_subscriptions_storage:
-            if subscription['id'] == subscription_id:
-                subscription_data = subscription
-                break
+    def __init__(self, config: Dict[str, str], serializer: Serializer,
+                 redis_client_manager: RedisClientManager):
+        """Initialize storage."""
+        super().__init__(config)
+
+        assert isinstance(serializer, Serializer)
+        self._serializer = serializer
+
+        assert isinstance(redis_client_manager, RedisClientManager)
+        self._redis_client = redis_client_manager.get_client(config['dsn'])
+
+        self._max_newsfeed_ids = int(config['max_newsfeeds'])
+        self._max_subscriptions_per_newsfeed = int(config['max_subscriptions_per_newsfeed'])
+
+    async def get_by_newsfeed_id(self, newsfeed_id: str) -> Iterable[SubscriptionData]:
+        """Return subscriptions of specified newsfeed."""
+        async with self._redis_client.get_connection() as redis:
+            subscriptions = await redis.hvals(f'subscriptions:{newsfeed_id}')
+        return self._load_ordered(subscriptions)
+
+    async def get_by_to_newsfeed_id(self, newsfeed_id: str) -> Iterable[SubscriptionData]:
+        """Return subscriptions to specified newsfeed."""
+        async with self._redis_client.get_connection() as redis:
+            subscriptions = await redis.hvals(f'subscribers:{newsfeed_id}')
+        return self._load_ordered(subscriptions)
+
+    async def count_by_to_newsfeed_ids(self, newsfeed_ids: Sequence[str]) -> Dict[str, int]:
+        """Return numbers of subscriptions to specified newsfeeds."""
+        if not newsfeed_ids:
+            return {}
+        async with self._redis_client.get_connection() as redis:
+            pipeline = redis.pipeline()
+            for newsfeed_id in newsfeed_ids:
+                pipeline.hlen(f'subscribers:{newsfeed_id}')
+            numbers = await pipeline.execute()
+        return dict(zip(newsfeed_ids, (int(number) for number in numbers)))
+
+    async def get_by_fqid(self, newsfeed_id: str, subscription_id: str) -> SubscriptionData:
+        """Return subscription of specified newsfeed."""
+        async with self._redis_client.get_connection() as redis:
+            subscription = await redis.hget(f'subscriptions:{newsfeed_id}', subscription_id)
 
-        if subscription_data is None:
+        if not subscription:
             raise SubscriptionNotFound(
                 newsfeed_id=newsfeed_id,
                 subscription_id=subscription_id,
             )
+        return cast(SubscriptionData, self._serializer.loads(subscription))
 
+    async def get_between(self, newsfeed_id: str, to_newsfeed_id: str) -> SubscriptionData:
+        """Return subscription between specified newsfeeds."""
+        async with self._redis_client.get_connection() as redis:
+            subscription = await redis.hget(f'subscriptions_between:{newsfeed_id}', to_newsfeed_id)
+
+        if not subscription:
+            raise SubscriptionBetweenNotFound(
+                newsfeed_id=newsfeed_id,
+                to_newsfeed_id=to_newsfeed_id,
+            )
+        return cast(SubscriptionData, self._serializer.loads(subscription))
+
+    async def add(self, subscription_data: SubscriptionData) -> None:
+        """Add subscription data to the storage."""
+        subscription_id = str(subscription_data['id'])
+        newsfeed_id = str(subscription_data['newsfeed_id'])
         to_newsfeed_id = str(subscription_data['to_newsfeed_id'])
-        newsfeed_subscribers_storage = self._subscribers_storage[to_newsfeed_id]
 
-        newsfeed_subscribers_storage.remove(subscription_data)
-        newsfeed_subscriptions_storage.remove(subscription_data)
+        async with self._redis_client.get_connection() as redis:
+            pipeline = redis.pipeline()
+            is_known_newsfeed_future = pipeline.sismember('subscriptions_newsfeed_ids', newsfeed_id)
+            newsfeeds_number_future = pipeline.scard('subscriptions_newsfeed_ids')
+            subscriptions_number_future = pipeline.hlen(f'subscriptions:{newsfeed_id}')
+            await pipeline.execute()
+
+            if not await is_known_newsfeed_future \
+                    and await newsfeeds_number_future >= self._max_newsfeed_ids:
+                raise NewsfeedNumberLimitExceeded(newsfeed_id, self._max_newsfeed_ids)
+
+            if await subscriptions_number_future >= self._max_subscriptions_per_newsfeed:
+                raise SubscriptionNumberLimitExceeded(
+                    subscription_id,
+                    newsfeed_id,
+                    to_newsfeed_id,
+                    self._max_subscriptions_per_newsfeed,
+                )
+
+            serialized_subscription_data = self._serializer.dumps(subscription_data)
+            transaction = redis.multi_exec()
+            transaction.sadd('subscriptions_newsfeed_ids', newsfeed_id)
+            transaction.hset(
+                f'subscriptions:{newsfeed_id}',
+                subscription_id,
+                serialized_subscription_data,
+            )
+            transaction.hset(
+                f'subscribers:{to_newsfeed_id}',
+                subscription_id,
+                serialized_subscription_data,
+            )
+            transaction.hset(
+                f'subscriptions_between:{newsfeed_id}',
+                to_newsfeed_id,
+                serialized_subscription_data,
+            )
+            await transaction.execute()
+
+    async def add_many(self, subscriptions_data: Sequence[SubscriptionData]) -> None:
+        """Add multiple subscriptions data to the storage at once.
+
+        Limits are checked with a single pipeline, subscriptions are added with a single
+        transaction.
+        """
+        if not subscriptions_data:
+            return
+
+        newsfeed_ids = list(dict.fromkeys(
+            str(subscription_data['newsfeed_id'])
+            for subscription_data in subscriptions_data
+        ))
+
+        async with self._redis_client.get_connection() as redis:
+            pipeline = redis.pipeline()
+            newsfeeds_number_future = pipeline.scard('subscriptions_newsfeed_ids')
+            is_known_newsfeed_futures = [
+                pipeline.sismember('subscriptions_newsfeed_ids', newsfeed_id)
+                for newsfeed_id in newsfeed_ids
+            ]
+            subscriptions_number_futures = [
+                pipeline.hlen(f'subscriptions:{newsfeed_id}')
+                for newsfeed_id in newsfeed_ids
+            ]
+            await pipeline.execute()
+
+            self._check_limits_of_many(
+                subscriptions_data,
+                newsfeeds_number=int(await newsfeeds_number_future),
+                known_newsfeed_ids={
+                    newsfeed_id
+                    for newsfeed_id, is_known_newsfeed_future in zip(newsfeed_ids, is_known_newsfeed_futures)
+                    if await is_known_newsfeed_future
+                },
+                subscriptions_numbers={
+                    newsfeed_id: int(await subscriptions_number_future)
+                    for newsfeed_id, subscriptions_number_future in zip(newsfeed_ids, subscriptions_number_futures)
+                },
+            )
+
+            transaction = redis.multi_exec()
+            transaction.sadd('subscriptions_newsfeed_ids', *newsfeed_ids)
+            for subscription_data in subscriptions_data:
+                subscription_id = str(subscription_data['id'])
+                newsfeed_id = str(subscription_data['newsfeed_id'])
+                to_newsfeed_id = str(subscription_data['to_newsfeed_id'])
+                serialized_subscription_data = self._serializer.dumps(subscription_data)
+                transaction.hset(
+                    f'subscriptions:{newsfeed_id}',
+                    subscription_id,
+                    serialized_subscription_data,
+                )
+                transaction.hset(
+                    f'subscribers:{to_newsfeed_id}',
+                    subscription_id,
+                    serialized_subscription_data,
+                )
+                transaction.hset(
+                    f'subscriptions_between:{newsfeed_id}',
+                    to_newsfeed_id,
+                    serialized_subscription_data,
+                )
+            await transaction.execute()
+
+    async def get_existing_between(self, pairs: Sequence[NewsfeedIDsPair]) -> Set[NewsfeedIDsPair]:
+        """Return pairs of newsfeed ids that have subscriptions between them."""
+        if not pairs:
+            return set()
+        async with self._redis_client.get_connection() as redis:
+            pipeline = redis.pipeline()
+            for newsfeed_id, to_newsfeed_id in pairs:
+                pipeline.hexists(f'subscriptions_between:{newsfeed_id}', to_newsfeed_id)
+            existence = await pipeline.execute()
+        return {pair for pair, exists in zip(pairs, existence) if exists}
+
+    async def delete_by_fqid(self, newsfeed_id: str, subscription_id: str) -> None:
+        """Delete specified subscription."""
+        subscription_data = await self.get_by_fqid(newsfeed_id, subscription_id)
+        to_newsfeed_id = str(subscription_data['to_newsfeed_id'])
+
+        async with self._redis_client.get_connection() as redis:
+            await self._delete(redis, [(newsfeed_id, subscription_id, to_newsfeed_id)])
+
+    async def delete_many(self, fqids: Sequence[Tuple[str, str]]) -> List[bool]:
+        """Delete multiple subscriptions at once.
+
+        Subscriptions are got with a single pipeline, found ones are deleted with a single script
+        call.
+        """
+        if not fqids:
+            return []
+
+        async with self._redis_client.get_connection() as redis:
+            pipeline = redis.pipeline()
+            for newsfeed_id, subscription_id in fqids:
+                pipeline.hget(f'subscriptions:{newsfeed_id}', subscription_id)
+            subscriptions = await pipeline.execute()
+
+            await self._delete(redis, [
+                (newsfeed_id, subscription_id, str(self._serializer.loads(subscription)['to_newsfeed_id']))
+                for (newsfeed_id, subscription_id), subscription in zip(fqids, subscriptions)
+                if subscription
+            ])
+
+        return [bool(subscription) for subscription in subscriptions]
+
+    async def _delete(self, redis: aioredis.commands.Redis, subscriptions: List[Tuple[str, str, str]]) -> None:
+        if not subscriptions:
+            return
+        keys = ['subscriptions_newsfeed_ids']
+        args = []
+        for newsfeed_id, subscription_id, to_newsfeed_id in subscriptions:
+            keys += [
+                f'subscriptions:{newsfeed_id}',
+                f'subscribers:{to_newsfeed_id}',
+                f'subscriptions_between:{newsfeed_id}',
+            ]
+            args += [newsfeed_id, subscription_id, to_newsfeed_id]
+        await _DELETE_SUBSCRIPTIONS_SCRIPT.execute(redis, keys=keys, args=args)
+
+    def _load_ordered(self, subscriptions: Iterable[str]) -> List[SubscriptionData]:
+        return sorted(
+            (self._serializer.loads(subscription) for subscription in subscriptions),
+            key=lambda subscription_data: float(subscription_data['subscribed_at']),
+            reverse=True,
+        )
 
 
 class SubscriptionStorageError(Exception):
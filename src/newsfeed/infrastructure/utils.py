@@ -1,9 +1,21 @@
 """Utils module for infrastructure."""
 
-from typing import Any, Dict
+import json
+import struct
+from collections import defaultdict, deque
+from typing import Any, DefaultDict, Deque, Dict, List, Optional, Sequence, Tuple
 from urllib.parse import urlparse, parse_qsl
+from uuid import UUID
 
 DEFAULT_REDIS_PORT = 6379
+IN_MEMORY_SCHEME = 'memory'
+
+
+def parse_dsn_scheme(dsn: Optional[str]) -> str:
+    """Return scheme of dsn, in-memory scheme is returned for empty dsn."""
+    if not dsn:
+        return IN_MEMORY_SCHEME
+    return urlparse(dsn).scheme
 
 
 def parse_redis_dsn(dsn: str) -> Dict[str, Any]:
@@ -14,3 +26,89 @@ def parse_redis_dsn(dsn: str) -> Dict[str, Any]:
         'address': (parsed_dsn.hostname, int(parsed_dsn.port or DEFAULT_REDIS_PORT)),
         **dict(parse_qsl(parsed_dsn.query))
     }
+
+
+# Sizes in bytes of groups of UUID that are separated with hyphens in its string representation
+_UUID_GROUP_SIZES = (4, 2, 2, 2, 6)
+
+
+def pack_fqids(fqids: Sequence[Tuple[str, str]]) -> bytes:
+    """Pack event FQIDs to bytes.
+
+    Distinct newsfeed ids are packed once into a table, that is a JSON array of them, then every
+    FQID is packed as an index in the table. Event UUIDs take 16 bytes each and are packed by
+    columns of their groups, so they are unpacked without formatting every UUID separately.
+    """
+    newsfeed_ids: Dict[str, int] = {}
+    indexes = []
+    event_ids = []
+    for newsfeed_id, event_id in fqids:
+        indexes.append(newsfeed_ids.setdefault(newsfeed_id, len(newsfeed_ids)))
+        event_ids.append(UUID(event_id).bytes)
+
+    newsfeed_ids_table = json.dumps(list(newsfeed_ids), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    packed_data = bytearray(struct.pack('<II', len(newsfeed_ids_table), len(indexes)))
+    packed_data += newsfeed_ids_table
+    packed_data += struct.pack(f'<{len(indexes)}I', *indexes)
+
+    start = 0
+    for size in _UUID_GROUP_SIZES:
+        packed_data += b''.join(event_id[start:start + size] for event_id in event_ids)
+        start += size
+    return bytes(packed_data)
+
+
+def unpack_fqids(packed_data: bytes) -> List[Tuple[str, str]]:
+    """Unpack event FQIDs packed with ``pack_fqids()``."""
+    newsfeed_ids_table_size, fqids_number = struct.unpack_from('<II', packed_data)
+    if not fqids_number:
+        return []
+    offset = struct.calcsize('<II')
+
+    newsfeed_ids = json.loads(packed_data[offset:offset + newsfeed_ids_table_size])
+    offset += newsfeed_ids_table_size
+
+    indexes = struct.unpack_from(f'<{fqids_number}I', packed_data, offset)
+    offset += struct.calcsize(f'<{fqids_number}I')
+
+    # Every column of UUID groups is formatted to hex at once, groups are joined in C loops
+    columns = []
+    for size in _UUID_GROUP_SIZES:
+        column = packed_data[offset:offset + fqids_number * size]
+        columns.append(column.hex(' ', size).split(' '))
+        offset += fqids_number * size
+    return list(zip(map(newsfeed_ids.__getitem__, indexes), map('-'.join, zip(*columns))))
+
+
+class WaitTimes:
+    """Statistics of wait times, per kind of waiting.
+
+    Only the latest ``window`` wait times of every kind are kept.
+    """
+
+    def __init__(self, window: int = 1024):
+        """Initialize statistics."""
+        self._window = window
+        self._wait_times: Dict[str, Deque[float]] = {}
+        self._counts: DefaultDict[str, int] = defaultdict(int)
+
+    def add(self, kind: str, wait_time: float) -> None:
+        """Add wait time."""
+        if kind not in self._wait_times:
+            self._wait_times[kind] = deque(maxlen=self._window)
+        self._wait_times[kind].append(wait_time)
+        self._counts[kind] += 1
+
+    def get_statistics(self) -> Dict[str, Dict[str, float]]:
+        """Return total number of waits, mean, median, 99th percentile and maximum wait times."""
+        statistics = {}
+        for kind, wait_times in self._wait_times.items():
+            sorted_wait_times = sorted(wait_times)
+            statistics[kind] = {
+                'count': self._counts[kind],
+                'mean': sum(sorted_wait_times) / len(sorted_wait_times),
+                'p50': sorted_wait_times[int(len(sorted_wait_times) * 0.5)],
+                'p99': sorted_wait_times[int(len(sorted_wait_times) * 0.99)],
+                'max': sorted_wait_times[-1],
+            }
+        return statistics
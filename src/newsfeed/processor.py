@@ -0,0 +1,46 @@
+"""Event processor module.
+
+Runs event processors in a standalone process without web application:
+
+    python -m newsfeed.processor
+
+Standalone processors make sense only with event queue that is shared between processes, so web
+application should be started with ``WEBAPI_RUN_PROCESSORS=false`` in this case.
+"""
+
+import asyncio
+import logging
+import signal
+
+from .containers import create_container, start_redis_clients
+
+
+logger = logging.getLogger('newsfeed.processor')
+
+
+def run_processor() -> None:
+    """Run event processor until SIGINT or SIGTERM is received."""
+    container = create_container()
+    event_processor = container.event_processor_service()
+
+    loop = asyncio.get_event_loop()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signal_number, loop.stop)
+
+    loop.run_until_complete(start_redis_clients(container))
+    event_processor.start_processing()
+    logger.info('Event processor has been started')
+    try:
+        loop.run_forever()
+    finally:
+        event_processor.stop_processing()
+        pending_tasks = asyncio.all_tasks(loop)
+        # Closing of redis clients stops their health checks, that are pending until then
+        loop.run_until_complete(
+            asyncio.gather(*pending_tasks, container.redis_client_manager().close(), return_exceptions=True),
+        )
+        logger.info('Event processor has been stopped')
+
+
+if __name__ == '__main__':
+    run_processor()
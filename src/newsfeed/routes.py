@@ -25,6 +25,14 @@ def setup_routes(app: web.Application) -> None:
             path='/newsfeed/{newsfeed_id}/subscribers/subscriptions/',
             handler=subscriptions.get_subscriber_subscriptions_handler,
         ),
+        web.post(
+            path='/subscriptions:batch',
+            handler=subscriptions.post_subscriptions_batch_handler,
+        ),
+        web.post(
+            path='/subscriptions:batchDelete',
+            handler=subscriptions.delete_subscriptions_batch_handler,
+        ),
 
         # Events
 
@@ -40,6 +48,14 @@ def setup_routes(app: web.Application) -> None:
             path='/newsfeed/{newsfeed_id}/events/{event_id}/',
             handler=events.delete_event_handler,
         ),
+        web.post(
+            path='/newsfeed/{newsfeed_id}/events:batch',
+            handler=events.post_newsfeed_events_batch_handler,
+        ),
+        web.post(
+            path='/events:batch',
+            handler=events.post_events_batch_handler,
+        ),
 
         # Miscellaneous
 
@@ -47,6 +63,10 @@ def setup_routes(app: web.Application) -> None:
             path='/status/',
             handler=misc.get_status_handler,
         ),
+        web.get(
+            path='/metrics/',
+            handler=misc.get_metrics_handler,
+        ),
         web.get(
             path='/docs/',
             handler=misc.get_openapi_schema_handler,
@@ -0,0 +1,157 @@
+"""Supervisor module.
+
+Supervisor runs web application in several pre-forked worker processes that share the same port
+through ``SO_REUSEPORT``, so the service could use every core of a host. Worker processes that
+exit unexpectedly are restarted. Each worker has its own container, so storages and event queue
+have to be shared between processes (e.g. Redis) when more than one worker is used.
+"""
+
+import logging
+import multiprocessing
+import signal
+import time
+from multiprocessing.context import SpawnProcess
+from types import FrameType
+from typing import Dict, Callable, Optional, Tuple, Any
+
+from aiohttp import web
+
+from .app import create_app
+from .containers import create_container
+from .infrastructure.utils import IN_MEMORY_SCHEME, parse_dsn_scheme
+from .processor import run_processor
+
+
+logger = logging.getLogger('newsfeed.supervisor')
+
+
+def run_web_worker(port: int, run_processors: bool) -> None:
+    """Run web application worker that shares port with other workers."""
+    container = create_container()
+    container.config.webapi.run_processors.from_value(run_processors)
+
+    app = create_app(container)
+    web.run_app(app, port=port, reuse_port=True)
+
+
+class Supervisor:
+    """Supervisor of web application worker processes."""
+
+    def __init__(
+            self,
+            port: int,
+            workers: int,
+            dedicated_processor: bool,
+            run_processors: bool,
+            restart_delay: float,
+            shutdown_timeout: float,
+    ) -> None:
+        """Initialize supervisor."""
+        assert workers > 0
+        self._port = port
+        self._workers = workers
+        self._dedicated_processor = dedicated_processor
+        self._run_processors = run_processors
+        self._restart_delay = restart_delay
+        self._shutdown_timeout = shutdown_timeout
+
+        self._context = multiprocessing.get_context('spawn')
+        self._processes: Dict[str, SpawnProcess] = {}
+        self._stopping = False
+
+    def run(self) -> None:
+        """Run worker processes until SIGINT or SIGTERM is received."""
+        signal.signal(signal.SIGINT, self._handle_stop_signal)
+        signal.signal(signal.SIGTERM, self._handle_stop_signal)
+
+        targets = self._get_targets()
+        for name in targets:
+            self._start_process(name, targets[name])
+
+        while not self._stopping:
+            for name, process in self._processes.items():
+                if process.is_alive() or self._stopping:
+                    continue
+                logger.warning(
+                    'Process "%s" (pid %s) exited with code %s, restarting it in %s s',
+                    name, process.pid, process.exitcode, self._restart_delay,
+                )
+                time.sleep(self._restart_delay)
+                if not self._stopping:
+                    self._start_process(name, targets[name])
+            time.sleep(0.5)
+
+        self._stop_processes()
+
+    def stop(self) -> None:
+        """Stop worker processes, ``run()`` returns when they are stopped."""
+        self._stopping = True
+
+    def _get_targets(self) -> Dict[str, Tuple[Callable[..., None], Tuple[Any, ...]]]:
+        run_processors_in_workers = self._run_processors and not self._dedicated_processor
+
+        targets: Dict[str, Tuple[Callable[..., None], Tuple[Any, ...]]] = {
+            f'web-worker-{number}': (run_web_worker, (self._port, run_processors_in_workers))
+            for number in range(self._workers)
+        }
+        if self._run_processors and self._dedicated_processor:
+            targets['processor'] = (run_processor, ())
+        return targets
+
+    def _start_process(self, name: str, target: Tuple[Callable[..., None], Tuple[Any, ...]]) -> None:
+        function, args = target
+        process = self._context.Process(target=function, args=args, name=name, daemon=False)
+        process.start()
+        self._processes[name] = process
+        logger.info('Process "%s" (pid %s) has been started', name, process.pid)
+
+    def _stop_processes(self) -> None:
+        for process in self._processes.values():
+            if process.is_alive():
+                process.terminate()
+
+        deadline = time.monotonic() + self._shutdown_timeout
+        for name, process in self._processes.items():
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                logger.warning('Process "%s" (pid %s) has not stopped in time, killing it', name, process.pid)
+                process.kill()
+                process.join()
+        logger.info('All processes have been stopped')
+
+    def _handle_stop_signal(self, signal_number: int, _: Optional[FrameType]) -> None:
+        logger.info('Received signal %s, stopping processes', signal_number)
+        self.stop()
+
+
+def run_server(port: int) -> None:
+    """Run web application in one or several worker processes depending on configuration."""
+    container = create_container()
+    config = container.config.webapi
+    workers = int(config.workers())
+
+    if workers == 1 and not config.dedicated_processor():
+        web.run_app(create_app(container), port=port)
+        return
+
+    infrastructure_config = container.config.infrastructure()
+    in_memory_components = [
+        name
+        for name in ('event_queue', 'event_storage', 'subscription_storage', 'idempotency_key_storage')
+        if parse_dsn_scheme(infrastructure_config[name]['dsn']) == IN_MEMORY_SCHEME
+    ]
+    if in_memory_components:
+        logger.warning(
+            'In-memory %s are not shared between processes, every process would have its own',
+            ', '.join(in_memory_components),
+        )
+
+    supervisor = Supervisor(
+        port=port,
+        workers=workers,
+        dedicated_processor=bool(config.dedicated_processor()),
+        run_processors=bool(config.run_processors()),
+        restart_delay=float(config.restart_delay()),
+        shutdown_timeout=float(config.shutdown_timeout()),
+    )
+    supervisor.run()
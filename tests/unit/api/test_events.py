@@ -3,6 +3,9 @@
 import datetime
 import uuid
 
+from newsfeed.handlers.events import MAX_BATCH_SIZE
+from newsfeed.infrastructure.event_queues import InMemoryEventQueue
+
 
 async def test_get_events(web_client, container):
     """Check events posting handler."""
@@ -62,9 +65,68 @@ async def test_get_events(web_client, container):
                 'published_at': event_1['published_at'],
             },
         ],
+        'next_cursor': None,
     }
 
 
+async def test_get_events_without_child_fqids(web_client, container):
+    """Check events getting handler omits child FQIDs on request."""
+    newsfeed_id = '123'
+    event = _create_event_data(newsfeed_id)
+    event['child_fqids'] = [
+        ['124', str(uuid.uuid4())],
+        ['125', str(uuid.uuid4())],
+    ]
+
+    event_storage = container.event_storage()
+    await event_storage.add(event)
+
+    response = await web_client.get(f'/newsfeed/{newsfeed_id}/events/?include_child_fqids=false')
+
+    assert response.status == 200
+    data = await response.json()
+    assert 'child_fqids' not in data['results'][0]
+
+    response = await web_client.get(f'/newsfeed/{newsfeed_id}/events/?include_child_fqids=maybe')
+
+    assert response.status == 400
+
+
+async def test_get_events_paginated(web_client, container):
+    """Check events getting handler pagination."""
+    newsfeed_id = '123'
+    event_storage = container.event_storage()
+    events = [_create_event_data(newsfeed_id) for _ in range(3)]
+    for event in events:
+        await event_storage.add(event)
+
+    response = await web_client.get(f'/newsfeed/{newsfeed_id}/events/?limit=2')
+
+    assert response.status == 200
+    data = await response.json()
+    assert [event['id'] for event in data['results']] == [events[2]['id'], events[1]['id']]
+    assert data['next_cursor']
+
+    response = await web_client.get(
+        f'/newsfeed/{newsfeed_id}/events/?limit=2&cursor={data["next_cursor"]}',
+    )
+
+    assert response.status == 200
+    data = await response.json()
+    assert [event['id'] for event in data['results']] == [events[0]['id']]
+    assert data['next_cursor'] is None
+
+
+async def test_get_events_with_invalid_pagination(web_client):
+    """Check events getting handler with invalid pagination parameters."""
+    for query in ('limit=0', 'limit=abc', 'cursor=abc', f'cursor={uuid.uuid4()}'):
+        response = await web_client.get(f'/newsfeed/123/events/?{query}')
+
+        assert response.status == 400
+        data = await response.json()
+        assert data['message']
+
+
 async def test_post_events(web_client, container):
     """Check events posting handler."""
     newsfeed_id = '123'
@@ -91,6 +153,73 @@ async def test_post_events(web_client, container):
     }
 
 
+async def test_post_events_with_idempotency_key(web_client, container):
+    """Check events posting handler does not post event again with the same idempotency key."""
+    newsfeed_id = '123'
+
+    responses = []
+    for _ in range(2):
+        response = await web_client.post(
+            f'/newsfeed/{newsfeed_id}/events/',
+            headers={
+                'Idempotency-Key': 'some_key',
+            },
+            json={
+                'data': {
+                    'event_data': 'some_data',
+                },
+            },
+        )
+        assert response.status == 202
+        responses.append(await response.json())
+
+    assert responses[0] == responses[1]
+
+    event_queue = container.event_queue()
+    action, event_data = await event_queue.get()
+    assert action == 'post'
+    assert event_data['id'] == responses[0]['id']
+    assert await event_queue.is_empty()
+
+
+async def test_post_events_with_reused_idempotency_key(web_client, container):
+    """Check events posting handler rejects idempotency key used for another event."""
+    for event_data, status in (('some_data_1', 202), ('some_data_2', 400)):
+        response = await web_client.post(
+            '/newsfeed/123/events/',
+            headers={
+                'Idempotency-Key': 'some_key',
+            },
+            json={
+                'data': {
+                    'event_data': event_data,
+                },
+            },
+        )
+        assert response.status == status
+
+    data = await response.json()
+    assert data['message'] == 'Idempotency key "some_key" has been used for another event'
+
+
+async def test_post_events_with_invalid_idempotency_key(web_client, container):
+    """Check events posting handler rejects too long idempotency key."""
+    response = await web_client.post(
+        '/newsfeed/123/events/',
+        headers={
+            'Idempotency-Key': 'x' * 256,
+        },
+        json={
+            'data': {
+                'event_data': 'some_data',
+            },
+        },
+    )
+
+    assert response.status == 400
+    assert await container.event_queue().is_empty()
+
+
 async def test_post_event_with_abnormally_long_newsfeed_id(web_client, container):
     """Check events posting handler."""
     newsfeed_id_max_length = container.newsfeed_id_specification().max_length
@@ -115,6 +244,198 @@ async def test_post_event_with_abnormally_long_newsfeed_id(web_client, container
     assert await event_queue.is_empty()
 
 
+async def test_post_event_with_invalid_data(web_client):
+    """Check events posting handler with data that is not an object."""
+    response = await web_client.post(
+        '/newsfeed/123/events/',
+        json={
+            'data': ['some_data'],
+        },
+    )
+
+    assert response.status == 400
+    data = await response.json()
+    assert data['message']
+
+
+async def test_post_event_when_queue_is_full(web_client, container):
+    """Check events posting handler."""
+    event_queue = InMemoryEventQueue(config={'max_size': 1, 'retry_after': 3})
+    await event_queue.put(('delete', {'newsfeed_id': '123', 'event_id': str(uuid.uuid4())}))
+
+    with container.event_queue.override(event_queue):
+        response = await web_client.post(
+            '/newsfeed/123/events/',
+            json={
+                'data': {
+                    'event_data': 'some_data',
+                },
+            },
+        )
+
+    assert response.status == 503
+    assert response.headers['Retry-After'] == '3'
+    data = await response.json()
+    assert data['message'] == (
+        'Newsfeed event queue can not accept message because queue size limit exceeds maximum 1'
+    )
+
+
+async def test_post_event_when_queue_has_no_space_and_nothing_to_drop(web_client, container):
+    """Check events posting handler responds with 503 if ``drop_oldest`` queue has nothing to drop."""
+    event_queue = InMemoryEventQueue(config={'max_size': 0, 'overflow_policy': 'drop_oldest', 'retry_after': 3})
+
+    with container.event_queue.override(event_queue):
+        response = await web_client.post(
+            '/newsfeed/123/events/',
+            json={
+                'data': {
+                    'event_data': 'some_data',
+                },
+            },
+        )
+
+    assert response.status == 503
+    assert response.headers['Retry-After'] == '3'
+
+
+async def test_post_event_with_idempotency_key_when_queue_is_full(web_client, container):
+    """Check events posting handler releases idempotency key of event that is not posted."""
+    event_queue = InMemoryEventQueue(config={'max_size': 1})
+    await event_queue.put(('delete', {'newsfeed_id': '123', 'event_id': str(uuid.uuid4())}))
+
+    with container.event_queue.override(event_queue):
+        statuses = []
+        for _ in range(2):
+            response = await web_client.post(
+                '/newsfeed/123/events/',
+                headers={
+                    'Idempotency-Key': 'some_key',
+                },
+                json={
+                    'data': {
+                        'event_data': 'some_data',
+                    },
+                },
+            )
+            statuses.append(response.status)
+            await event_queue.get()
+
+    assert statuses == [503, 202]
+
+
+async def test_post_newsfeed_events_batch(web_client, container):
+    """Check batch events posting handler."""
+    response = await web_client.post(
+        '/newsfeed/123/events:batch',
+        json=[
+            {
+                'data': {
+                    'event_data': 'some_data_1',
+                },
+            },
+            {
+                'event_data': 'some_data_2',
+            },
+            {
+                'data': {
+                    'event_data': 'some_data_3',
+                },
+            },
+        ],
+    )
+
+    assert response.status == 202
+    results = (await response.json())['results']
+    assert [result['status'] for result in results] == [202, 400, 202]
+    assert results[1]['message'] == 'Event should be an object with "data" field'
+
+    event_queue = container.event_queue()
+    for result in (results[0], results[2]):
+        action, event_data = await event_queue.get()
+        assert action == 'post'
+        assert event_data['id'] == result['event']['id']
+        assert event_data['newsfeed_id'] == '123'
+        assert event_data['data'] == result['event']['data']
+    assert await event_queue.is_empty()
+
+
+async def test_post_events_batch_in_ndjson(web_client, container):
+    """Check batch events posting handler with events of multiple newsfeeds in NDJSON format."""
+    newsfeed_id_max_length = container.newsfeed_id_specification().max_length
+    response = await web_client.post(
+        '/events:batch',
+        headers={
+            'Content-Type': 'application/x-ndjson',
+        },
+        data='\n'.join([
+            '{"newsfeed_id": "123", "data": {"event_data": "some_data_1"}}',
+            '{"newsfeed_id": "124", "data": {"event_data": "some_data_2"}}',
+            f'{{"newsfeed_id": "{"x" * (newsfeed_id_max_length + 1)}", "data": {{}}}}',
+            '',
+        ]),
+    )
+
+    assert response.status == 202
+    results = (await response.json())['results']
+    assert [result['status'] for result in results] == [202, 202, 400]
+    assert [result['event']['newsfeed_id'] for result in results[:2]] == ['123', '124']
+
+
+async def test_post_events_batch_in_ndjson_with_too_many_events(web_client, container):
+    """Check batch events posting handler rejects NDJSON stream with too many events."""
+    response = await web_client.post(
+        '/events:batch',
+        headers={
+            'Content-Type': 'application/x-ndjson',
+        },
+        data='\n'.join(['{"newsfeed_id": "123", "data": {}}'] * (MAX_BATCH_SIZE + 1)),
+    )
+
+    assert response.status == 400
+    assert await container.event_queue().is_empty()
+
+
+async def test_post_events_batch_when_queue_is_full(web_client, container):
+    """Check batch events posting handler rejects events that queue does not accept."""
+    event_queue = InMemoryEventQueue(config={'max_size': 1, 'retry_after': 3})
+
+    with container.event_queue.override(event_queue):
+        response = await web_client.post(
+            '/events:batch',
+            json=[
+                {
+                    'newsfeed_id': '123',
+                    'data': {},
+                },
+                {
+                    'newsfeed_id': '124',
+                    'data': {},
+                },
+            ],
+        )
+
+    assert response.status == 202
+    assert response.headers['Retry-After'] == '3'
+    results = (await response.json())['results']
+    assert [result['status'] for result in results] == [202, 503]
+
+
+async def test_post_events_batch_with_invalid_body(web_client):
+    """Check batch events posting handler rejects body that is not an array."""
+    response = await web_client.post(
+        '/events:batch',
+        json={
+            'newsfeed_id': '123',
+            'data': {},
+        },
+    )
+
+    assert response.status == 400
+    data = await response.json()
+    assert data['message'] == 'Events batch should be an array'
+
+
 async def test_delete_events(web_client, container):
     """Check events deletion handler."""
     newsfeed_id = '123'
@@ -129,3 +450,29 @@ async def test_delete_events(web_client, container):
     assert action == 'delete'
     assert event_data['newsfeed_id'] == newsfeed_id
     assert event_data['event_id'] == str(event_id)
+
+
+async def test_delete_event_when_queue_is_full(web_client, container):
+    """Check events deletion handler."""
+    event_queue = InMemoryEventQueue(config={'max_size': 1, 'retry_after': 3})
+    await event_queue.put(('delete', {'newsfeed_id': '123', 'event_id': str(uuid.uuid4())}))
+
+    with container.event_queue.override(event_queue):
+        response = await web_client.delete(f'/newsfeed/123/events/{uuid.uuid4()}/')
+
+    assert response.status == 503
+    assert response.headers['Retry-After'] == '3'
+
+
+def _create_event_data(newsfeed_id):
+    return {
+        'id': str(uuid.uuid4()),
+        'newsfeed_id': newsfeed_id,
+        'data': {
+            'event_data': 'some_data',
+        },
+        'parent_fqid': None,
+        'child_fqids': [],
+        'first_seen_at': datetime.datetime.utcnow().timestamp(),
+        'published_at': datetime.datetime.utcnow().timestamp(),
+    }
@@ -1,5 +1,7 @@
 """Miscellaneous handler tests."""
 
+from newsfeed.infrastructure.event_queues import InMemoryEventQueue
+
 
 async def test_status(web_client):
     """Check status handler."""
@@ -8,3 +10,21 @@ async def test_status(web_client):
     assert response.status == 200
     data = await response.json()
     assert data == {'status': 'OK'}
+
+
+async def test_metrics(web_client, container):
+    """Check metrics handler."""
+    event_queue = InMemoryEventQueue(config={'max_size': 16})
+    await event_queue.put(('post', {'id': '1', 'newsfeed_id': '123'}))
+    await event_queue.put(('delete', {'event_id': '2', 'newsfeed_id': '123'}))
+    await event_queue.get()
+
+    with container.event_queue.override(event_queue):
+        response = await web_client.get('/metrics/')
+
+    assert response.status == 200
+    data = await response.json()
+    assert data['event_queue']['depth'] == {'post': 1}
+    assert data['event_queue']['wait_time']['delete']['count'] == 1
+    assert data['event_storage']['newsfeeds'] == 0
+    assert data['redis'] == []
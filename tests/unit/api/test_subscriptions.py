@@ -224,6 +224,85 @@ async def test_delete_subscriptions(web_client, container):
     assert len(await subscription_storage.get_by_to_newsfeed_id('126')) == 1
 
 
+async def test_post_subscriptions_batch(web_client, container):
+    """Check batch subscriptions posting handler."""
+    subscription_storage = container.subscription_storage()
+    await subscription_storage.add(
+        {
+            'id': str(uuid.uuid4()),
+            'newsfeed_id': '123',
+            'to_newsfeed_id': '125',
+            'subscribed_at': datetime.datetime.utcnow().timestamp(),
+        },
+    )
+
+    response = await web_client.post(
+        '/subscriptions:batch',
+        json=[
+            {'newsfeed_id': '123', 'to_newsfeed_id': '124'},
+            {'newsfeed_id': '123', 'to_newsfeed_id': '125'},
+            {'newsfeed_id': '123', 'to_newsfeed_id': '124'},
+            {'newsfeed_id': '123', 'to_newsfeed_id': '123'},
+            {'newsfeed_id': '123'},
+            {'newsfeed_id': '126', 'to_newsfeed_id': '124'},
+        ],
+    )
+
+    assert response.status == 200
+    results = (await response.json())['results']
+    assert [result['status'] for result in results] == [200, 400, 200, 400, 400, 200]
+    assert results[0]['subscription'] == results[2]['subscription']
+    assert results[1]['message'] == 'Subscription from newsfeed "123" to "125" already exists'
+
+    subscriptions = await subscription_storage.get_by_to_newsfeed_id('124')
+    assert [subscription['id'] for subscription in subscriptions] == [
+        results[5]['subscription']['id'],
+        results[0]['subscription']['id'],
+    ]
+
+
+async def test_delete_subscriptions_batch(web_client, container):
+    """Check batch subscriptions deleting handler."""
+    subscription_id_1 = uuid.uuid4()
+    subscription_id_2 = uuid.uuid4()
+
+    subscription_storage = container.subscription_storage()
+    for subscription_id, newsfeed_id in ((subscription_id_1, '123'), (subscription_id_2, '125')):
+        await subscription_storage.add(
+            {
+                'id': str(subscription_id),
+                'newsfeed_id': newsfeed_id,
+                'to_newsfeed_id': '124',
+                'subscribed_at': datetime.datetime.utcnow().timestamp(),
+            },
+        )
+
+    response = await web_client.post(
+        '/subscriptions:batchDelete',
+        json=[
+            {'newsfeed_id': '123', 'subscription_id': str(subscription_id_1)},
+            {'newsfeed_id': '123', 'subscription_id': str(subscription_id_2)},
+            {'newsfeed_id': '123', 'subscription_id': 'invalid'},
+            {'newsfeed_id': '125', 'subscription_id': str(subscription_id_2)},
+        ],
+    )
+
+    assert response.status == 200
+    results = (await response.json())['results']
+    assert [result['status'] for result in results] == [204, 404, 400, 204]
+    assert await subscription_storage.get_by_to_newsfeed_id('124') == []
+
+
+async def test_subscriptions_batch_with_invalid_body(web_client):
+    """Check batch subscriptions handlers reject body that is not an array."""
+    for path in ('/subscriptions:batch', '/subscriptions:batchDelete'):
+        response = await web_client.post(path, json={'newsfeed_id': '123'})
+
+        assert response.status == 400
+        data = await response.json()
+        assert data['message'] == 'Subscriptions batch should be an array'
+
+
 async def test_get_subscriber_subscriptions(web_client, container):
     """Check subscriber subscriptions getting handler."""
     newsfeed_id = '123'
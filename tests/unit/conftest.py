@@ -3,11 +3,15 @@
 from pytest import fixture
 
 from newsfeed.app import create_app
+from newsfeed.containers import create_container
 
 
 @fixture
 def app():
-    app = create_app()
+    container = create_container()
+    # Tests process queued messages themselves, background processors would take them first
+    container.config.webapi.run_processors.from_value(False)
+    app = create_app(container)
     yield app
     app.container.unwire()
 
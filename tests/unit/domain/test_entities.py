@@ -0,0 +1,76 @@
+"""Entity and value object tests."""
+
+import uuid
+
+from pytest import raises
+
+from newsfeed.domain.event import EventFactory, EventFQID, InvalidEventError
+from newsfeed.domain.subscription import SubscriptionFactory, SubscriptionFQID
+
+
+def test_fqids_are_hashable_value_objects():
+    """Check FQIDs equality and hashing."""
+    event_id = uuid.uuid4()
+    subscription_id = uuid.uuid4()
+
+    assert EventFQID('123', event_id) == EventFQID('123', event_id)
+    assert EventFQID('123', event_id) != EventFQID('124', event_id)
+    assert len({EventFQID('123', event_id), EventFQID('123', event_id)}) == 1
+
+    assert SubscriptionFQID('123', subscription_id) == SubscriptionFQID('123', subscription_id)
+    assert SubscriptionFQID('123', subscription_id) != SubscriptionFQID('123', uuid.uuid4())
+    assert len({SubscriptionFQID('123', subscription_id), SubscriptionFQID('123', subscription_id)}) == 1
+
+    with raises(AttributeError):
+        EventFQID('123', event_id).newsfeed_id = '124'
+
+
+def test_event_exposes_read_only_views():
+    """Check event data and child FQIDs can not be modified through the entity."""
+    event = EventFactory().create_new(newsfeed_id='123', data={'event_data': 'some_data'})
+    child_fqid = EventFQID('124', uuid.uuid4())
+    event.track_child_fqids([child_fqid])
+
+    with raises(TypeError):
+        event.data['event_data'] = 'other_data'
+    assert event.data == {'event_data': 'some_data'}
+    assert event.child_fqids == (child_fqid,)
+    assert event.fqid is event.fqid
+    assert event.fqid == EventFQID('123', event.id)
+    assert not hasattr(event, '__dict__')
+
+
+def test_subscription_fqid_is_cached():
+    """Check subscription FQID is not created on every access."""
+    subscription = SubscriptionFactory().create_new(newsfeed_id='123', to_newsfeed_id='124')
+
+    assert subscription.fqid is subscription.fqid
+    assert subscription.fqid == SubscriptionFQID('123', subscription.id)
+    assert not hasattr(subscription, '__dict__')
+
+
+def test_event_factory_validates_events():
+    """Check event factory validation of events created from external data."""
+    with raises(InvalidEventError):
+        EventFactory().create_new(newsfeed_id=123, data={})
+    with raises(InvalidEventError):
+        EventFactory().create_new(newsfeed_id='123', data=[1, 2])
+    with raises(InvalidEventError):
+        EventFactory().create_new(newsfeed_id='123', data={}, parent_fqid=EventFQID('124', 'not-uuid'))
+
+    event_data = EventFactory().create_new(newsfeed_id='123', data={}).serialized_data
+    event = EventFactory().create_from_serialized(event_data)
+    assert event.id == uuid.UUID(event_data['id'])
+
+
+def test_event_factory_creates_child_events():
+    """Check event factory creation of child events."""
+    parent = EventFactory().create_new(newsfeed_id='123', data={'event_data': 'some_data'})
+
+    child = EventFactory().create_child(parent=parent, newsfeed_id='124')
+
+    assert child.newsfeed_id == '124'
+    assert child.data == parent.data
+    assert child.serialized_data['data'] is parent.serialized_data['data']
+    assert child.parent_fqid == parent.fqid
+    assert child.child_fqids == ()
@@ -91,6 +91,84 @@ async def test_event_deletion_from_subscriber(container):
     assert subscriber_events[0].data == event_2.data
 
 
+async def test_event_deletion_before_processing(container):
+    """Check deletion of event that has not been processed yet cancels its processing."""
+    newsfeed_id = '123'
+
+    event_dispatcher_service = container.event_dispatcher_service()
+    event = await event_dispatcher_service.dispatch_new_event(
+        newsfeed_id=newsfeed_id,
+        data={
+            'event_data': 'some_data',
+        },
+    )
+    await event_dispatcher_service.dispatch_event_deletion(
+        newsfeed_id=newsfeed_id,
+        event_id=str(event.id),
+    )
+
+    assert await container.event_queue().is_empty()
+
+    event_repository = container.event_repository()
+    assert await event_repository.get_by_newsfeed_id(newsfeed_id) == []
+
+
+async def test_event_deletion_processed_before_posting(container):
+    """Check event is not added if its posting is processed after its deletion."""
+    newsfeed_id = '123'
+    subscriber_newsfeed_id = '124'
+
+    subscription_service = container.subscription_service()
+    await subscription_service.create_subscription(
+        newsfeed_id=subscriber_newsfeed_id,
+        to_newsfeed_id=newsfeed_id,
+    )
+
+    event = container.event_factory().create_new(
+        newsfeed_id=newsfeed_id,
+        data={
+            'event_data': 'some_data',
+        },
+    )
+    event_processor_service = container.event_processor_service()
+    await event_processor_service.process_event_deletion({
+        'newsfeed_id': newsfeed_id,
+        'event_id': str(event.id),
+    })
+    await event_processor_service.process_new_event(event.serialized_data)
+
+    event_repository = container.event_repository()
+    assert await event_repository.get_by_newsfeed_id(newsfeed_id) == []
+    assert await event_repository.get_by_newsfeed_id(subscriber_newsfeed_id) == []
+
+
+async def test_repeated_event_deletion(container):
+    """Check repeated deletion of event is ignored."""
+    newsfeed_id = '123'
+
+    event_dispatcher_service = container.event_dispatcher_service()
+    event_processor_service = container.event_processor_service()
+
+    event = await _process_new_event(
+        event_dispatcher_service,
+        event_processor_service,
+        newsfeed_id=newsfeed_id,
+        data={
+            'event_data': 'some_data',
+        },
+    )
+    for _ in range(2):
+        await _process_event_deletion(
+            event_dispatcher_service,
+            event_processor_service,
+            newsfeed_id=newsfeed_id,
+            event_id=event.id,
+        )
+
+    event_repository = container.event_repository()
+    assert await event_repository.get_by_newsfeed_id(newsfeed_id) == []
+
+
 async def _process_new_event(event_dispatcher_service, event_processor_service, newsfeed_id, data):
     event = await event_dispatcher_service.dispatch_new_event(
         newsfeed_id=newsfeed_id,
@@ -0,0 +1,125 @@
+"""Event fan-out tests."""
+
+from pytest import fixture
+
+
+@fixture
+def container(container):
+    container.config.domain.fan_out_chunk_size.from_value(2)
+    return container
+
+
+async def test_event_fan_out_in_chunks(container):
+    """Check event is copied to subscriber newsfeeds in chunks."""
+    newsfeed_id = '123'
+    subscriber_newsfeed_ids = ['124', '125', '126', '127', '128']
+    await _subscribe(container, subscriber_newsfeed_ids, newsfeed_id)
+
+    event_dispatcher_service = container.event_dispatcher_service()
+    event_processor_service = container.event_processor_service()
+    event_repository = container.event_repository()
+
+    event = await event_dispatcher_service.dispatch_new_event(newsfeed_id=newsfeed_id, data={})
+    await event_processor_service.process_event()
+
+    child_fqids = await event_repository.get_child_fqids(event.fqid)
+    assert sorted(child_fqid.newsfeed_id for child_fqid in child_fqids) == subscriber_newsfeed_ids
+    assert await _count_copies(event_repository, subscriber_newsfeed_ids) == 2
+
+    await event_processor_service.process_event()
+    await event_processor_service.process_event()
+
+    assert await _count_copies(event_repository, subscriber_newsfeed_ids) == 5
+    assert await container.event_queue().is_empty()
+    for child_fqid in child_fqids:
+        child_event = await event_repository.get_by_fqid(child_fqid)
+        assert child_event.parent_fqid == event.fqid
+
+
+async def test_event_fan_out_retry(container):
+    """Check repeated fan-out of event does not create duplicates."""
+    newsfeed_id = '123'
+    subscriber_newsfeed_ids = ['124', '125', '126']
+    await _subscribe(container, subscriber_newsfeed_ids, newsfeed_id)
+
+    event_processor_service = container.event_processor_service()
+    event_repository = container.event_repository()
+
+    event = container.event_factory().create_new(newsfeed_id=newsfeed_id, data={})
+    for _ in range(2):
+        await event_processor_service.process_new_event(event.serialized_data)
+        await event_processor_service.process_event()
+
+    assert await _count_copies(event_repository, subscriber_newsfeed_ids) == 3
+    assert len(await event_repository.get_by_newsfeed_id(newsfeed_id)) == 1
+
+
+async def test_event_deletion_during_fan_out(container):
+    """Check event deletion before its fan-out has been finished."""
+    newsfeed_id = '123'
+    subscriber_newsfeed_ids = ['124', '125', '126', '127', '128']
+    await _subscribe(container, subscriber_newsfeed_ids, newsfeed_id)
+
+    event_dispatcher_service = container.event_dispatcher_service()
+    event_processor_service = container.event_processor_service()
+    event_repository = container.event_repository()
+
+    event = await event_dispatcher_service.dispatch_new_event(newsfeed_id=newsfeed_id, data={})
+    await event_processor_service.process_event()
+    await event_dispatcher_service.dispatch_event_deletion(
+        newsfeed_id=newsfeed_id,
+        event_id=str(event.id),
+    )
+    while not await container.event_queue().is_empty():
+        await event_processor_service.process_event()
+
+    assert await event_repository.get_by_newsfeed_id(newsfeed_id) == []
+    assert await _count_copies(event_repository, subscriber_newsfeed_ids) == 0
+
+
+async def test_event_fan_out_racing_with_deletion(container, monkeypatch):
+    """Check event copies are not left when fan-out chunk is copied while event is being deleted."""
+    newsfeed_id = '123'
+    subscriber_newsfeed_ids = ['124', '125', '126', '127', '128']
+    await _subscribe(container, subscriber_newsfeed_ids, newsfeed_id)
+
+    event_dispatcher_service = container.event_dispatcher_service()
+    event_processor_service = container.event_processor_service()
+    event_repository = container.event_repository()
+    event_queue = container.event_queue()
+
+    event = await event_dispatcher_service.dispatch_new_event(newsfeed_id=newsfeed_id, data={})
+    await event_processor_service.process_event()
+    fan_out_messages = [await event_queue.get(), await event_queue.get()]
+
+    delete_by_fqid = event_repository.delete_by_fqid
+
+    async def delete_by_fqid_racing_with_fan_out(fqid):
+        if fqid == event.fqid:
+            # The first chunk is copied after deletion of copies, but before deletion of event
+            await event_processor_service.process_event_fan_out(fan_out_messages[0][1])
+        await delete_by_fqid(fqid)
+        if fqid == event.fqid:
+            await event_processor_service.process_event_fan_out(fan_out_messages[1][1])
+
+    monkeypatch.setattr(event_repository, 'delete_by_fqid', delete_by_fqid_racing_with_fan_out)
+    await event_processor_service.process_event_deletion({'newsfeed_id': newsfeed_id, 'event_id': str(event.id)})
+
+    assert await event_repository.get_by_newsfeed_id(newsfeed_id) == []
+    assert await _count_copies(event_repository, subscriber_newsfeed_ids) == 0
+
+
+async def _subscribe(container, newsfeed_ids, to_newsfeed_id):
+    subscription_service = container.subscription_service()
+    for newsfeed_id in newsfeed_ids:
+        await subscription_service.create_subscription(
+            newsfeed_id=newsfeed_id,
+            to_newsfeed_id=to_newsfeed_id,
+        )
+
+
+async def _count_copies(event_repository, newsfeed_ids):
+    copies_number = 0
+    for newsfeed_id in newsfeed_ids:
+        copies_number += len(await event_repository.get_by_newsfeed_id(newsfeed_id))
+    return copies_number
@@ -1,5 +1,7 @@
 """Event publishing tests."""
 
+from newsfeed.infrastructure.event_queues import InMemoryEventQueue
+
 
 async def test_event_publishing(container):
     """Check event publishing."""
@@ -84,6 +86,50 @@ async def test_event_publishing_to_subscriber(container):
     }
 
 
+async def test_event_publishing_when_storage_fails(container, monkeypatch):
+    """Check failed message is delivered again and processing of other messages goes on."""
+    newsfeed_id = '123'
+    event_queue = InMemoryEventQueue(config={'max_size': 16, 'max_deliveries': 2})
+    container.event_queue.override(event_queue)
+
+    event_dispatcher_service = container.event_dispatcher_service()
+    event_processor_service = container.event_processor_service()
+    event_repository = container.event_repository()
+    event_storage = container.event_storage()
+
+    add = event_storage.add
+    failures = []
+
+    async def add_failing_for_first_event(event_data):
+        if event_data['data'] == {'event_data': 'some_data_1'}:
+            failures.append(event_data['id'])
+            raise RuntimeError('Storage is not available')
+        await add(event_data)
+
+    monkeypatch.setattr(event_storage, 'add', add_failing_for_first_event)
+
+    await event_dispatcher_service.dispatch_new_event(newsfeed_id=newsfeed_id, data={'event_data': 'some_data_1'})
+    await event_processor_service.process_event()
+    assert len(failures) == 1
+    assert not await event_queue.is_empty()
+
+    await _process_event(
+        event_dispatcher_service,
+        event_processor_service,
+        newsfeed_id=newsfeed_id,
+        data={
+            'event_data': 'some_data_2',
+        },
+    )
+    await event_processor_service.process_event()
+
+    assert len(failures) == 2
+    assert await event_queue.is_empty()
+    assert (await event_queue.get_metrics())['dead_letters'] == 1
+    events = await event_repository.get_by_newsfeed_id(newsfeed_id)
+    assert [event.data for event in events] == [{'event_data': 'some_data_2'}]
+
+
 async def _process_event(event_dispatcher_service, event_processor_service, newsfeed_id, data):
     await event_dispatcher_service.dispatch_new_event(
         newsfeed_id=newsfeed_id,
@@ -0,0 +1,184 @@
+"""Fan-out-on-read tests."""
+
+import datetime
+
+from pytest import fixture
+
+
+@fixture
+def container(container):
+    container.config.domain.fan_out_on_read_threshold.from_value(1)
+    container.event_repository.reset()
+    return container
+
+
+async def test_event_publishing_to_many_subscribers(container):
+    """Check events of newsfeed with many subscribers are merged into subscriber newsfeeds."""
+    publisher_newsfeed_id = '123'
+    subscriber_newsfeed_id = '124'
+
+    event_dispatcher_service = container.event_dispatcher_service()
+    event_processor_service = container.event_processor_service()
+    event_repository = container.event_repository()
+
+    await _subscribe(container, '125', publisher_newsfeed_id)
+    await _process_event(event_dispatcher_service, event_processor_service, publisher_newsfeed_id, 'before')
+
+    await _subscribe(container, subscriber_newsfeed_id, publisher_newsfeed_id)
+    await _process_event(event_dispatcher_service, event_processor_service, publisher_newsfeed_id, '1')
+    await _process_event(event_dispatcher_service, event_processor_service, subscriber_newsfeed_id, '2')
+    await _process_event(event_dispatcher_service, event_processor_service, publisher_newsfeed_id, '3')
+
+    publisher_events = await event_repository.get_by_newsfeed_id(publisher_newsfeed_id)
+    assert [event.data['title'] for event in publisher_events] == ['3', '1', 'before']
+    assert [event.fan_out_on_read for event in publisher_events] == [True, True, False]
+    assert await event_repository.get_child_fqids(publisher_events[0].fqid) == []
+
+    subscriber_events = await event_repository.get_by_newsfeed_id(subscriber_newsfeed_id)
+    assert [event.data['title'] for event in subscriber_events] == ['3', '2', '1']
+
+
+async def test_events_are_merged_after_subscribers_number_drops(container):
+    """Check events fanned out on read stay in subscriber newsfeeds when publisher loses subscribers."""
+    publisher_newsfeed_id = '123'
+    subscriber_newsfeed_id = '124'
+
+    event_dispatcher_service = container.event_dispatcher_service()
+    event_processor_service = container.event_processor_service()
+    event_repository = container.event_repository()
+    subscription_service = container.subscription_service()
+
+    subscription = await subscription_service.create_subscription('125', publisher_newsfeed_id)
+    await _subscribe(container, subscriber_newsfeed_id, publisher_newsfeed_id)
+    await _process_event(event_dispatcher_service, event_processor_service, publisher_newsfeed_id, '1')
+    await _process_event(event_dispatcher_service, event_processor_service, publisher_newsfeed_id, '2')
+
+    await subscription_service.delete_subscription('125', str(subscription.id))
+    await _process_event(event_dispatcher_service, event_processor_service, publisher_newsfeed_id, '3')
+
+    subscriber_events = await event_repository.get_by_newsfeed_id(subscriber_newsfeed_id)
+    assert [event.data['title'] for event in subscriber_events] == ['3', '2', '1']
+
+
+async def test_event_deletion_from_many_subscribers(container):
+    """Check deleted event is not merged into subscriber newsfeeds."""
+    publisher_newsfeed_id = '123'
+    subscriber_newsfeed_id = '124'
+
+    event_dispatcher_service = container.event_dispatcher_service()
+    event_processor_service = container.event_processor_service()
+    event_repository = container.event_repository()
+
+    await _subscribe(container, '125', publisher_newsfeed_id)
+    await _subscribe(container, subscriber_newsfeed_id, publisher_newsfeed_id)
+    await _process_event(event_dispatcher_service, event_processor_service, publisher_newsfeed_id, '1')
+    await _process_event(event_dispatcher_service, event_processor_service, publisher_newsfeed_id, '2')
+
+    event = (await event_repository.get_by_newsfeed_id(publisher_newsfeed_id))[0]
+    await event_dispatcher_service.dispatch_event_deletion(
+        newsfeed_id=publisher_newsfeed_id,
+        event_id=str(event.id),
+    )
+    await event_processor_service.process_event()
+
+    subscriber_events = await event_repository.get_by_newsfeed_id(subscriber_newsfeed_id)
+    assert [event.data['title'] for event in subscriber_events] == ['1']
+
+
+async def test_merged_newsfeed_pagination(container):
+    """Check pagination of newsfeed merged with newsfeeds of many subscribers."""
+    subscriber_newsfeed_id = '124'
+
+    event_dispatcher_service = container.event_dispatcher_service()
+    event_processor_service = container.event_processor_service()
+    event_repository = container.event_repository()
+
+    for publisher_newsfeed_id in ('122', '123'):
+        await _subscribe(container, '125', publisher_newsfeed_id)
+        await _subscribe(container, subscriber_newsfeed_id, publisher_newsfeed_id)
+
+    titles = []
+    for number in range(7):
+        newsfeed_id = ('122', '123', subscriber_newsfeed_id)[number % 3]
+        await _process_event(event_dispatcher_service, event_processor_service, newsfeed_id, str(number))
+        titles.insert(0, str(number))
+
+    cursor = None
+    pages = []
+    while True:
+        events_data = await event_repository.get_serialized_by_newsfeed_id(
+            subscriber_newsfeed_id,
+            limit=3,
+            cursor=cursor,
+        )
+        pages.append([event_data['data']['title'] for event_data in events_data])
+        if len(events_data) < 3:
+            break
+        cursor = event_repository.get_next_cursor(events_data, cursor)
+
+    assert pages == [titles[0:3], titles[3:6], titles[6:7]]
+
+
+async def test_merged_newsfeed_with_events_stored_out_of_publishing_order(container):
+    """Check merging and pagination of newsfeeds whose storage order differs from publishing order."""
+    publisher_newsfeed_id = '123'
+    subscriber_newsfeed_id = '124'
+
+    event_repository = container.event_repository()
+    event_storage = container.event_storage()
+
+    await _subscribe(container, '125', publisher_newsfeed_id)
+    await _subscribe(container, subscriber_newsfeed_id, publisher_newsfeed_id)
+    await event_storage.add_fan_out_on_read_newsfeed(publisher_newsfeed_id)
+
+    # Newsfeeds are read newest added first: publisher - c, d; subscriber - y, x, w
+    published_at = datetime.datetime.utcnow().timestamp()
+    for newsfeed_id, title, publishing_delay in (
+            (publisher_newsfeed_id, 'd', 15),
+            (publisher_newsfeed_id, 'c', 20),
+            (subscriber_newsfeed_id, 'w', 0),
+            (subscriber_newsfeed_id, 'x', 30),
+            (subscriber_newsfeed_id, 'y', 10),
+    ):
+        event = container.event_factory().create_new(newsfeed_id=newsfeed_id, data={'title': title})
+        await event_storage.add({
+            **event.serialized_data,
+            'published_at': published_at + publishing_delay,
+            'fan_out_on_read': newsfeed_id == publisher_newsfeed_id,
+        })
+
+    events_data = await event_repository.get_serialized_by_newsfeed_id(subscriber_newsfeed_id)
+    assert [event_data['data']['title'] for event_data in events_data] == ['c', 'd', 'y', 'x', 'w']
+
+    cursor = None
+    pages = []
+    while True:
+        events_data = await event_repository.get_serialized_by_newsfeed_id(
+            subscriber_newsfeed_id,
+            limit=2,
+            cursor=cursor,
+        )
+        pages.append([event_data['data']['title'] for event_data in events_data])
+        if len(events_data) < 2:
+            break
+        cursor = event_repository.get_next_cursor(events_data, cursor)
+
+    assert pages == [['c', 'd'], ['y', 'x'], ['w']]
+
+
+async def _subscribe(container, newsfeed_id, to_newsfeed_id):
+    subscription_service = container.subscription_service()
+    await subscription_service.create_subscription(
+        newsfeed_id=newsfeed_id,
+        to_newsfeed_id=to_newsfeed_id,
+    )
+
+
+async def _process_event(event_dispatcher_service, event_processor_service, newsfeed_id, title):
+    await event_dispatcher_service.dispatch_new_event(
+        newsfeed_id=newsfeed_id,
+        data={
+            'title': title,
+        },
+    )
+    await event_processor_service.process_event()
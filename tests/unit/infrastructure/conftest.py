@@ -0,0 +1,28 @@
+"""Infrastructure test fixtures."""
+
+import os
+
+import aioredis
+from pytest import fixture
+
+from newsfeed.infrastructure.utils import parse_redis_dsn
+
+
+@fixture
+async def redis_dsn(loop):
+    """Return dsn of empty redis database.
+
+    Dsn is taken from ``TEST_REDIS_DSN`` environment variable, ``None`` is returned if it is not
+    set. Test database is flushed before every test.
+    """
+    dsn = os.getenv('TEST_REDIS_DSN')
+    if not dsn:
+        return None
+
+    redis_config = parse_redis_dsn(dsn)
+    redis = await aioredis.create_redis(redis_config['address'], db=int(redis_config['db']))
+    await redis.flushdb()
+    redis.close()
+    await redis.wait_closed()
+
+    return dsn
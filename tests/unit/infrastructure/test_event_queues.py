@@ -0,0 +1,337 @@
+"""Event queue tests."""
+
+from pytest import raises, skip
+
+from newsfeed.infrastructure.event_queues import (
+    InMemoryEventQueue,
+    RedisStreamEventQueue,
+    QueueFull,
+)
+from newsfeed.infrastructure.redis_clients import RedisClientManager
+from newsfeed.infrastructure.serializers import create_serializer
+
+
+async def test_in_memory_queue_rejects_messages_when_full():
+    """Check in-memory queue ``reject`` overflow policy."""
+    queue = InMemoryEventQueue(config={'max_size': 2, 'overflow_policy': 'reject'})
+
+    await queue.put(('post', {'id': '1'}))
+    await queue.put(('post', {'id': '2'}))
+    with raises(QueueFull):
+        await queue.put(('post', {'id': '3'}))
+
+    assert await queue.get() == ('post', {'id': '1'})
+    assert await queue.get() == ('post', {'id': '2'})
+    assert await queue.is_empty()
+
+
+async def test_in_memory_queue_waits_for_free_space():
+    """Check in-memory queue ``wait`` overflow policy."""
+    queue = InMemoryEventQueue(
+        config={
+            'max_size': 1,
+            'overflow_policy': 'wait',
+            'put_timeout': 0.01,
+            'retry_after': 5,
+        },
+    )
+
+    await queue.put(('post', {'id': '1'}))
+    with raises(QueueFull) as exception_info:
+        await queue.put(('post', {'id': '2'}))
+
+    assert exception_info.value.retry_after == 5
+    assert await queue.get() == ('post', {'id': '1'})
+    assert await queue.is_empty()
+
+
+async def test_in_memory_queue_drops_oldest_messages():
+    """Check in-memory queue ``drop_oldest`` overflow policy."""
+    queue = InMemoryEventQueue(config={'max_size': 2, 'overflow_policy': 'drop_oldest'})
+
+    await queue.put(('post', {'id': '1'}))
+    await queue.put(('post', {'id': '2'}))
+    await queue.put(('post', {'id': '3'}))
+
+    assert await queue.get() == ('post', {'id': '2'})
+    assert await queue.get() == ('post', {'id': '3'})
+    assert await queue.is_empty()
+
+
+async def test_in_memory_queue_drops_only_posts():
+    """Check in-memory queue ``drop_oldest`` overflow policy never drops fan-outs and deletions."""
+    queue = InMemoryEventQueue(config={'max_size': 2, 'overflow_policy': 'drop_oldest'})
+    fan_out = ('fanout', {'event': {'newsfeed_id': '123', 'id': '1'}, 'newsfeed_ids': ['124']})
+
+    await queue.put(fan_out)
+    await queue.put(('post', {'newsfeed_id': '123', 'id': '2'}))
+    await queue.put(('post', {'newsfeed_id': '123', 'id': '3'}))
+    await queue.put(('delete', {'newsfeed_id': '125', 'event_id': '4'}))
+    with raises(QueueFull):
+        await queue.put(('post', {'newsfeed_id': '123', 'id': '5'}))
+
+    assert await queue.get() == ('delete', {'newsfeed_id': '125', 'event_id': '4'})
+    assert await queue.get() == fan_out
+    assert await queue.is_empty()
+
+
+async def test_in_memory_queue_rejects_messages_when_nothing_to_drop():
+    """Check in-memory queue ``drop_oldest`` overflow policy rejects messages if queue is empty."""
+    queue = InMemoryEventQueue(config={'max_size': 0, 'overflow_policy': 'drop_oldest', 'retry_after': 5})
+
+    with raises(QueueFull) as exception_info:
+        await queue.put(('post', {'id': '1'}))
+    assert await queue.put_many([('post', {'id': '2'})]) == 0
+
+    assert exception_info.value.retry_after == 5
+    assert await queue.is_empty()
+
+
+async def test_in_memory_queue_rejects_messages():
+    """Check in-memory queue delivers rejected messages again up to ``max_deliveries`` times."""
+    queue = InMemoryEventQueue(config={'max_size': 1, 'max_deliveries': 2})
+
+    await queue.put(('post', {'id': '1'}))
+    for _ in range(2):
+        message = await queue.get()
+        assert message == ('post', {'id': '1'})
+        await queue.reject(message)
+
+    assert await queue.is_empty()
+    assert (await queue.get_metrics())['dead_letters'] == 1
+
+
+async def test_in_memory_queue_bypass_limit():
+    """Check in-memory queue accepts messages that bypass size limit when full."""
+    queue = InMemoryEventQueue(config={'max_size': 1, 'overflow_policy': 'reject'})
+
+    await queue.put(('post', {'id': '1'}))
+    await queue.put(('fanout', {'event': {'newsfeed_id': '123'}, 'newsfeed_ids': ['124']}), bypass_limit=True)
+    with raises(QueueFull):
+        await queue.put(('post', {'id': '3'}))
+
+    assert await queue.get() == ('post', {'id': '1'})
+    assert await queue.get() == ('fanout', {'event': {'newsfeed_id': '123'}, 'newsfeed_ids': ['124']})
+    assert await queue.is_empty()
+
+
+async def test_in_memory_queue_put_many():
+    """Check in-memory queue accepts multiple messages while it has free space."""
+    queue = InMemoryEventQueue(config={'max_size': 2})
+
+    assert await queue.put_many([('post', {'id': '1'}), ('post', {'id': '2'}), ('post', {'id': '3'})]) == 2
+    assert await queue.put_many([('post', {'id': '4'})]) == 0
+
+    assert await queue.get() == ('post', {'id': '1'})
+    assert await queue.get() == ('post', {'id': '2'})
+    assert await queue.is_empty()
+
+
+async def test_in_memory_queue_put_many_drops_oldest_messages():
+    """Check in-memory queue accepts all messages with ``drop_oldest`` overflow policy."""
+    queue = InMemoryEventQueue(config={'max_size': 2, 'overflow_policy': 'drop_oldest'})
+
+    assert await queue.put_many([('post', {'id': '1'}), ('post', {'id': '2'}), ('post', {'id': '3'})]) == 3
+
+    assert await queue.get() == ('post', {'id': '2'})
+    assert await queue.get() == ('post', {'id': '3'})
+    assert await queue.is_empty()
+
+
+async def test_in_memory_queue_prioritizes_deletions():
+    """Check in-memory queue gets deletions before posts."""
+    queue = InMemoryEventQueue(config={'max_size': 16})
+
+    await queue.put(('post', {'id': '1', 'newsfeed_id': '123'}))
+    await queue.put(('delete', {'event_id': '2', 'newsfeed_id': '123'}))
+
+    assert await queue.get() == ('delete', {'event_id': '2', 'newsfeed_id': '123'})
+    assert await queue.get() == ('post', {'id': '1', 'newsfeed_id': '123'})
+
+
+async def test_in_memory_queue_coalesces_deletions():
+    """Check in-memory queue coalesces deletions of the same event."""
+    queue = InMemoryEventQueue(config={'max_size': 16})
+
+    await queue.put(('delete', {'event_id': '1', 'newsfeed_id': '123'}))
+    await queue.put(('delete', {'event_id': '1', 'newsfeed_id': '123'}))
+    await queue.put(('delete', {'event_id': '2', 'newsfeed_id': '123'}))
+
+    assert await queue.get() == ('delete', {'event_id': '1', 'newsfeed_id': '123'})
+    assert await queue.get() == ('delete', {'event_id': '2', 'newsfeed_id': '123'})
+    assert await queue.is_empty()
+    assert (await queue.get_metrics())['cancelled'] == {'delete': 1}
+
+
+async def test_in_memory_queue_cancels_posts():
+    """Check in-memory queue cancels pending post by deletion of its event."""
+    queue = InMemoryEventQueue(config={'max_size': 2})
+
+    await queue.put(('post', {'id': '1', 'newsfeed_id': '123'}))
+    await queue.put(('post', {'id': '2', 'newsfeed_id': '123'}))
+    await queue.put(('delete', {'event_id': '1', 'newsfeed_id': '123'}))
+    await queue.put(('post', {'id': '3', 'newsfeed_id': '123'}))
+
+    assert await queue.get() == ('post', {'id': '2', 'newsfeed_id': '123'})
+    assert await queue.get() == ('post', {'id': '3', 'newsfeed_id': '123'})
+    assert await queue.is_empty()
+    assert (await queue.get_metrics())['cancelled'] == {'post': 1, 'delete': 1}
+
+
+async def test_in_memory_queue_cancels_fan_outs():
+    """Check in-memory queue cancels pending fan-outs by deletion of their event."""
+    queue = InMemoryEventQueue(config={'max_size': 16})
+    event_data = {'id': '1', 'newsfeed_id': '123'}
+
+    await queue.put(('fanout', {'event': event_data, 'newsfeed_ids': ['124']}))
+    await queue.put(('fanout', {'event': event_data, 'newsfeed_ids': ['125']}))
+    await queue.put(('post', {'id': '2', 'newsfeed_id': '123'}))
+    await queue.put(('delete', {'event_id': '1', 'newsfeed_id': '123'}))
+
+    assert await queue.get() == ('delete', {'event_id': '1', 'newsfeed_id': '123'})
+    assert await queue.get() == ('post', {'id': '2', 'newsfeed_id': '123'})
+    assert await queue.is_empty()
+
+
+async def test_in_memory_queue_schedules_newsfeeds_fairly():
+    """Check in-memory queue serves newsfeeds in turn."""
+    queue = InMemoryEventQueue(config={'max_size': 16})
+
+    for event_id in ('1', '2', '3'):
+        await queue.put(('post', {'id': event_id, 'newsfeed_id': 'noisy'}))
+    await queue.put(('fanout', {'event': {'newsfeed_id': 'noisy'}, 'newsfeed_ids': ['124', '125']}))
+    await queue.put(('post', {'id': '4', 'newsfeed_id': 'quiet'}))
+    await queue.put(('post', {'id': '5', 'newsfeed_id': 'quiet'}))
+
+    order = []
+    while not await queue.is_empty():
+        action, data = await queue.get()
+        order.append(data.get('id', action))
+
+    assert order == ['1', '4', '2', '5', '3', 'fanout']
+
+    metrics = await queue.get_metrics()
+    assert metrics['depth'] == {}
+    assert metrics['wait_time']['post']['count'] == 5
+    assert metrics['wait_time']['fanout']['max'] >= 0
+
+
+def test_in_memory_queue_unknown_overflow_policy():
+    """Check in-memory queue initialization with unknown overflow policy."""
+    with raises(ValueError):
+        InMemoryEventQueue(config={'max_size': 1, 'overflow_policy': 'unknown'})
+
+
+async def test_redis_queue_put_get_acknowledge(redis_dsn):
+    """Check redis stream queue putting, getting and acknowledging of messages."""
+    queue = _create_redis_queue(redis_dsn, max_size=2)
+
+    await queue.put(('post', {'id': '1'}))
+    await queue.put(('delete', {'id': '2'}))
+    with raises(QueueFull):
+        await queue.put(('post', {'id': '3'}))
+
+    message_1 = await queue.get()
+    message_2 = await queue.get()
+    assert message_1 == ('post', {'id': '1'})
+    assert message_2 == ('delete', {'id': '2'})
+    assert not await queue.is_empty()
+
+    await queue.acknowledge(message_1)
+    await queue.acknowledge(message_2)
+    assert await queue.is_empty()
+
+
+async def test_redis_queue_bypass_limit(redis_dsn):
+    """Check redis stream queue accepts messages that bypass size limit when full."""
+    queue = _create_redis_queue(redis_dsn, max_size=1)
+
+    await queue.put(('post', {'id': '1'}))
+    await queue.put(('fanout', {'event': {'newsfeed_id': '123'}, 'newsfeed_ids': ['124']}), bypass_limit=True)
+    with raises(QueueFull):
+        await queue.put(('post', {'id': '3'}))
+
+    for _ in range(2):
+        await queue.acknowledge(await queue.get())
+    assert await queue.is_empty()
+
+
+async def test_redis_queue_put_many(redis_dsn):
+    """Check redis stream queue accepts multiple messages while it has free space."""
+    queue = _create_redis_queue(redis_dsn, max_size=2)
+
+    assert await queue.put_many([('post', {'id': '1'}), ('post', {'id': '2'}), ('post', {'id': '3'})]) == 2
+    assert await queue.put_many([('post', {'id': '4'})]) == 0
+
+    for message_id in ('1', '2'):
+        message = await queue.get()
+        assert message == ('post', {'id': message_id})
+        await queue.acknowledge(message)
+    assert await queue.is_empty()
+
+
+async def test_redis_queue_drops_oldest_posts(redis_dsn):
+    """Check redis stream queue ``drop_oldest`` overflow policy drops only posts that are not delivered."""
+    queue = _create_redis_queue(redis_dsn, max_size=3, overflow_policy='drop_oldest')
+    fan_out = ('fanout', {'event': {'newsfeed_id': '123', 'id': '1'}, 'newsfeed_ids': ['124']})
+
+    await queue.put(('post', {'id': '1'}))
+    await queue.put(fan_out)
+    await queue.put(('post', {'id': '2'}))
+    pending_message = await queue.get()
+    assert pending_message == ('post', {'id': '1'})
+
+    assert await queue.put_many([('delete', {'id': '3'}), ('post', {'id': '4'})]) == 1
+    with raises(QueueFull):
+        await queue.put(('post', {'id': '4'}))
+
+    await queue.acknowledge(pending_message)
+    for expected_message in (fan_out, ('delete', {'id': '3'})):
+        message = await queue.get()
+        assert message == expected_message
+        await queue.acknowledge(message)
+    assert await queue.is_empty()
+
+
+async def test_redis_queue_claims_unacknowledged_messages(redis_dsn):
+    """Check redis stream queue delivers messages of crashed consumers again."""
+    queue_1 = _create_redis_queue(redis_dsn, consumer='consumer_1', claim_idle_time=0)
+    queue_2 = _create_redis_queue(redis_dsn, consumer='consumer_2', claim_idle_time=0)
+
+    await queue_1.put(('post', {'id': '1'}))
+    assert await queue_1.get() == ('post', {'id': '1'})
+
+    message = await queue_2.get()
+    assert message == ('post', {'id': '1'})
+
+    await queue_2.acknowledge(message)
+    assert await queue_1.is_empty()
+
+
+async def test_redis_queue_rejects_messages(redis_dsn):
+    """Check redis stream queue delivers rejected messages again and then moves them to dead letters."""
+    queue = _create_redis_queue(redis_dsn, claim_idle_time=0, max_deliveries=2)
+
+    await queue.put(('post', {'id': '1'}))
+    for _ in range(2):
+        message = await queue.get()
+        assert message == ('post', {'id': '1'})
+        await queue.reject(message)
+
+    assert await queue.is_empty()
+    assert (await queue.get_metrics())['dead_letters'] == 1
+
+
+def _create_redis_queue(redis_dsn, max_size=16, **config):
+    if not redis_dsn:
+        skip('TEST_REDIS_DSN environment variable is not set')
+    return RedisStreamEventQueue(
+        config={
+            'dsn': redis_dsn,
+            'max_size': max_size,
+            'block_timeout': 0.1,
+            **config,
+        },
+        serializer=create_serializer(),
+        redis_client_manager=RedisClientManager(),
+    )
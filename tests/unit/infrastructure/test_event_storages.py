@@ -0,0 +1,432 @@
+"""Event storage tests."""
+
+import datetime
+import uuid
+
+from pytest import fixture, raises, skip
+
+from newsfeed.infrastructure.event_storages import (
+    InMemoryEventStorage,
+    RedisEventStorage,
+    EventNotFound,
+    NewsfeedNumberLimitExceeded,
+)
+from newsfeed.infrastructure.redis_clients import RedisClientManager
+from newsfeed.infrastructure.serializers import create_serializer
+
+
+@fixture(params=['memory', 'redis'])
+def storage(request, redis_dsn):
+    if request.param == 'redis':
+        return _create_redis_storage(redis_dsn)
+    return _create_in_memory_storage()
+
+
+async def test_in_memory_storage_keeps_newest_events_first():
+    """Check in-memory storage ordering."""
+    storage = _create_in_memory_storage()
+    event_1 = _create_event_data(newsfeed_id='123')
+    event_2 = _create_event_data(newsfeed_id='123')
+
+    await storage.add(event_1)
+    await storage.add(event_2)
+
+    assert await storage.get_by_newsfeed_id('123') == [event_2, event_1]
+
+
+async def test_in_memory_storage_evicts_oldest_events():
+    """Check in-memory storage eviction."""
+    storage = _create_in_memory_storage(max_events_per_newsfeed=2)
+    event_1 = _create_event_data(newsfeed_id='123')
+    event_2 = _create_event_data(newsfeed_id='123')
+    event_3 = _create_event_data(newsfeed_id='123')
+
+    await storage.add(event_1)
+    await storage.add(event_2)
+    await storage.add(event_3)
+
+    assert await storage.get_by_newsfeed_id('123') == [event_3, event_2]
+    with raises(EventNotFound):
+        await storage.get_by_fqid('123', event_1['id'])
+
+
+async def test_in_memory_storage_evicts_least_recently_used_newsfeeds():
+    """Check in-memory storage eviction of newsfeeds over number limit."""
+    storage = _create_in_memory_storage(max_newsfeeds=2)
+    event_1 = _create_event_data(newsfeed_id='123')
+    event_2 = _create_event_data(newsfeed_id='124')
+    event_3 = _create_event_data(newsfeed_id='125')
+    event_4 = _create_event_data(newsfeed_id='126')
+
+    await storage.add(event_1)
+    await storage.add({**event_2, 'child_fqids': [('125', str(uuid.uuid4()))]})
+    await storage.get_by_newsfeed_id('123')
+    await storage.add(event_3)
+
+    assert await storage.get_by_newsfeed_id('124') == []
+    assert await storage.get_child_fqids('124', event_2['id']) == []
+
+    await storage.add(event_4)
+
+    assert await storage.get_by_newsfeed_id('123') == []
+    assert await storage.get_by_newsfeed_id('125') == [event_3]
+    metrics = await storage.get_metrics()
+    assert metrics['newsfeeds'] == 2
+    assert metrics['evicted_newsfeeds'] == 2
+    assert metrics['evicted_events'] == 2
+
+
+async def test_in_memory_storage_evicts_newsfeeds_over_size_limit():
+    """Check in-memory storage eviction of newsfeeds over size limit."""
+    storage = _create_in_memory_storage()
+    await storage.add(_create_event_data(newsfeed_id='123'))
+    event_size = (await storage.get_metrics())['size']
+
+    storage = _create_in_memory_storage(max_bytes=event_size * 2)
+    event_1 = _create_event_data(newsfeed_id='123')
+    event_2 = _create_event_data(newsfeed_id='124')
+    event_3 = _create_event_data(newsfeed_id='124')
+
+    await storage.add(event_1)
+    await storage.add(event_2)
+    assert (await storage.get_metrics())['size'] == event_size * 2
+
+    await storage.add(event_3)
+
+    assert await storage.get_by_newsfeed_id('123') == []
+    assert await storage.get_by_newsfeed_id('124') == [event_3, event_2]
+    assert (await storage.get_metrics())['size'] == event_size * 2
+
+    await storage.delete_by_fqid('124', event_2['id'])
+    await storage.delete_by_fqid('124', event_3['id'])
+
+    assert await storage.get_metrics() == {
+        'newsfeeds': 0,
+        'events': 0,
+        'size': 0,
+        'evicted_newsfeeds': 1,
+        'evicted_events': 1,
+    }
+
+
+async def test_in_memory_storage_reads_do_not_create_newsfeeds():
+    """Check that reading of unknown newsfeeds does not count them to the limit."""
+    storage = _create_in_memory_storage(max_newsfeeds=1)
+    event = _create_event_data(newsfeed_id='123')
+    await storage.add(event)
+
+    assert await storage.get_by_newsfeed_id('124') == []
+    with raises(EventNotFound):
+        await storage.get_by_fqid('125', event['id'])
+    with raises(EventNotFound):
+        await storage.delete_by_fqid('126', event['id'])
+
+    assert await storage.get_by_newsfeed_id('123') == [event]
+    assert (await storage.get_metrics())['newsfeeds'] == 1
+
+
+async def test_in_memory_storage_add_many():
+    """Check in-memory storage bulk adding."""
+    storage = _create_in_memory_storage()
+    event_1 = _create_event_data(newsfeed_id='123')
+    event_2 = _create_event_data(newsfeed_id='124')
+    event_3 = _create_event_data(newsfeed_id='123')
+
+    await storage.add_many([event_1, event_2, event_3])
+
+    assert await storage.get_by_newsfeed_id('123') == [event_3, event_1]
+    assert await storage.get_by_newsfeed_id('124') == [event_2]
+
+
+async def test_in_memory_storage_get_by_fqid():
+    """Check in-memory storage event lookup."""
+    storage = _create_in_memory_storage()
+    event_1 = _create_event_data(newsfeed_id='123')
+    event_2 = _create_event_data(newsfeed_id='124')
+
+    await storage.add(event_1)
+    await storage.add(event_2)
+
+    assert await storage.get_by_fqid('123', event_1['id']) == event_1
+    with raises(EventNotFound):
+        await storage.get_by_fqid('123', event_2['id'])
+
+
+async def test_in_memory_storage_delete_by_fqid():
+    """Check in-memory storage event deletion."""
+    storage = _create_in_memory_storage()
+    event_1 = _create_event_data(newsfeed_id='123')
+    event_2 = _create_event_data(newsfeed_id='123')
+    event_3 = _create_event_data(newsfeed_id='123')
+
+    await storage.add(event_1)
+    await storage.add(event_2)
+    await storage.add(event_3)
+    await storage.delete_by_fqid('123', event_2['id'])
+    with raises(EventNotFound):
+        await storage.delete_by_fqid('123', str(uuid.uuid4()))
+
+    assert await storage.get_by_newsfeed_id('123') == [event_3, event_1]
+    with raises(EventNotFound):
+        await storage.get_by_fqid('123', event_2['id'])
+
+
+async def test_storage_get_by_newsfeed_id_paginated(storage):
+    """Check storage pagination of newsfeed events."""
+    event_1 = _create_event_data(newsfeed_id='123')
+    event_2 = _create_event_data(newsfeed_id='123')
+    event_3 = _create_event_data(newsfeed_id='123')
+
+    await storage.add_many([event_1, event_2, event_3])
+
+    assert await storage.get_by_newsfeed_id('123', limit=2) == [event_3, event_2]
+    assert await storage.get_by_newsfeed_id('123', limit=2, after_event_id=event_2['id']) == [event_1]
+    assert await storage.get_by_newsfeed_id('123', after_event_id=event_3['id']) == [event_2, event_1]
+    assert await storage.get_by_newsfeed_id('123', after_event_id=event_1['id']) == []
+    with raises(EventNotFound):
+        await storage.get_by_newsfeed_id('123', after_event_id=str(uuid.uuid4()))
+
+
+async def test_storage_add_existing_event(storage):
+    """Check storage does not duplicate events that are added again."""
+    event_1 = _create_event_data(newsfeed_id='123')
+    event_2 = _create_event_data(newsfeed_id='123')
+
+    await storage.add_many([event_1])
+    await storage.add_many([event_1, event_2])
+
+    assert await storage.get_by_newsfeed_id('123') == [event_2, event_1]
+    assert await storage.get_by_fqid('123', event_1['id']) == event_1
+
+
+async def test_storage_add_redelivered_event(storage):
+    """Check storage keeps data and position of event that is added again."""
+    event_1 = _create_event_data(newsfeed_id='123')
+    event_2 = _create_event_data(newsfeed_id='123')
+
+    await storage.add(event_1)
+    await storage.add(event_2)
+    await storage.add({**event_1, 'data': {'payload': 'redelivered'}})
+
+    assert await storage.get_by_newsfeed_id('123') == [event_2, event_1]
+    assert await storage.get_by_fqid('123', event_1['id']) == event_1
+
+
+async def test_storage_add_many_with_parent(storage):
+    """Check storage adds events only if their parent event exists."""
+    parent_event = _create_event_data(newsfeed_id='123')
+    event_1 = _create_event_data(newsfeed_id='124')
+    event_2 = _create_event_data(newsfeed_id='125')
+
+    with raises(EventNotFound):
+        await storage.add_many([event_1], parent_fqid=('123', parent_event['id']))
+
+    await storage.add(parent_event)
+    await storage.add_many([event_1], parent_fqid=('123', parent_event['id']))
+
+    await storage.delete_by_fqid('123', parent_event['id'])
+    with raises(EventNotFound):
+        await storage.add_many([event_2], parent_fqid=('123', parent_event['id']))
+
+    assert await storage.get_by_newsfeed_id('124') == [event_1]
+    assert await storage.get_by_newsfeed_id('125') == []
+
+
+async def test_storage_child_fqids(storage):
+    """Check storage keeps child FQIDs separately from event data."""
+    event = _create_event_data(newsfeed_id='123')
+    child_fqids = [
+        ('124', str(uuid.uuid4())),
+        ('125', str(uuid.uuid4())),
+        ('124', str(uuid.uuid4())),
+    ]
+
+    await storage.add_many([{**event, 'child_fqids': child_fqids}])
+
+    assert await storage.get_by_fqid('123', event['id']) == event
+    assert await storage.get_by_newsfeed_id('123') == [event]
+    assert await storage.get_child_fqids('123', event['id']) == child_fqids
+    assert await storage.get_child_fqids_many([('123', event['id']), child_fqids[0]]) == [child_fqids, []]
+
+    await storage.delete_by_fqid('123', event['id'])
+
+    assert await storage.get_child_fqids('123', event['id']) == []
+
+
+async def test_storage_fan_out_on_read_newsfeeds(storage):
+    """Check storage marking of newsfeeds with events fanned out on read."""
+    await storage.add_fan_out_on_read_newsfeed('123')
+    await storage.add_fan_out_on_read_newsfeed('125')
+
+    assert await storage.get_fan_out_on_read_newsfeeds(['123', '124', '125']) == {'123', '125'}
+    assert await storage.get_fan_out_on_read_newsfeeds([]) == set()
+
+
+async def test_storage_skips_deleted_events(storage):
+    """Check storage does not add events with recorded deletions."""
+    event_1 = _create_event_data(newsfeed_id='123')
+    event_2 = _create_event_data(newsfeed_id='123')
+    event_3 = _create_event_data(newsfeed_id='124')
+
+    await storage.record_deletion('123', event_1['id'])
+    await storage.record_deletion('124', event_3['id'])
+    await storage.add(event_1)
+    await storage.add_many([event_2, event_3])
+
+    assert await storage.get_by_newsfeed_id('123') == [event_2]
+    assert await storage.get_by_newsfeed_id('124') == []
+
+
+async def test_in_memory_storage_evicts_oldest_deletions():
+    """Check in-memory storage keeps no more than maximum number of deletions."""
+    storage = _create_in_memory_storage(max_deletions=1)
+    event_1 = _create_event_data(newsfeed_id='123')
+    event_2 = _create_event_data(newsfeed_id='123')
+
+    await storage.record_deletion('123', event_1['id'])
+    await storage.record_deletion('123', event_2['id'])
+    await storage.add_many([event_1, event_2])
+
+    assert await storage.get_by_newsfeed_id('123') == [event_1]
+
+
+async def test_in_memory_storage_evicts_child_fqids():
+    """Check in-memory storage eviction of child FQIDs."""
+    storage = _create_in_memory_storage(max_events_per_newsfeed=1)
+    event_1 = {**_create_event_data(newsfeed_id='123'), 'child_fqids': [('124', str(uuid.uuid4()))]}
+    event_2 = _create_event_data(newsfeed_id='123')
+
+    await storage.add(event_1)
+    await storage.add(event_2)
+
+    assert await storage.get_child_fqids('123', event_1['id']) == []
+
+
+async def test_redis_storage_evicts_oldest_events(redis_dsn):
+    """Check redis storage eviction of events and their child FQIDs."""
+    storage = _create_redis_storage(redis_dsn, max_events_per_newsfeed=2)
+    event_1 = {**_create_event_data(newsfeed_id='123'), 'child_fqids': [('124', str(uuid.uuid4()))]}
+    event_2 = _create_event_data(newsfeed_id='123')
+    event_3 = _create_event_data(newsfeed_id='123')
+
+    await storage.add(event_1)
+    await storage.add_many([event_2, event_3])
+
+    assert await storage.get_by_newsfeed_id('123') == [event_3, event_2]
+    with raises(EventNotFound):
+        await storage.get_by_fqid('123', event_1['id'])
+    assert await storage.get_child_fqids('123', event_1['id']) == []
+
+
+async def test_redis_storage_reloads_flushed_scripts(redis_dsn):
+    """Check that redis storage loads its scripts again after they are flushed from redis."""
+    storage = _create_redis_storage(redis_dsn)
+    event_1 = _create_event_data(newsfeed_id='123')
+    event_2 = _create_event_data(newsfeed_id='123')
+
+    await storage.add(event_1)
+    async with storage._redis_client.get_connection() as redis:
+        await redis.script_flush()
+    await storage.add(event_2)
+    await storage.delete_by_fqid('123', event_1['id'])
+
+    assert await storage.get_by_newsfeed_id('123') == [event_2]
+    with raises(EventNotFound):
+        await storage.delete_by_fqid('123', event_1['id'])
+
+
+async def test_redis_storage_limits_newsfeeds_number(redis_dsn):
+    """Check that redis storage skips events of newsfeeds over the limit."""
+    storage = _create_redis_storage(redis_dsn, max_newsfeeds=2)
+    event_1 = _create_event_data(newsfeed_id='123')
+    event_2 = _create_event_data(newsfeed_id='124')
+    event_3 = _create_event_data(newsfeed_id='125')
+
+    await storage.add(event_1)
+    await storage.add_many([event_2, event_3])
+    assert await storage.get_by_newsfeed_id('124') == [event_2]
+    assert await storage.get_by_newsfeed_id('125') == []
+    assert (await storage.get_metrics())['skipped_events'] == 1
+    with raises(NewsfeedNumberLimitExceeded):
+        await storage.add(event_3)
+
+    await storage.delete_by_fqid('123', event_1['id'])
+    await storage.add_many([event_2, event_3])
+    assert await storage.get_by_newsfeed_id('125') == [event_3]
+
+
+async def test_redis_storage_skips_expired_events(redis_dsn):
+    """Check that redis storage skips events which data has expired."""
+    storage = _create_redis_storage(redis_dsn)
+    event_1 = _create_event_data(newsfeed_id='123')
+    event_2 = _create_event_data(newsfeed_id='123')
+    event_3 = _create_event_data(newsfeed_id='123')
+    await storage.add_many([event_1, event_2, event_3])
+
+    async with storage._redis_client.get_connection() as redis:
+        await redis.delete(f"event:{event_2['id']}")
+
+    assert await storage.get_by_newsfeed_id('123', limit=2) == [event_3, event_1]
+    assert await storage.get_by_newsfeed_id('123', limit=1, after_event_id=event_3['id']) == [event_1]
+
+
+async def test_redis_storage_expires_events(redis_dsn):
+    """Check that redis storage sets ttl of events and newsfeeds."""
+    storage = _create_redis_storage(redis_dsn, ttl=60)
+    event = _create_event_data(newsfeed_id='123')
+    await storage.add(event)
+
+    async with storage._redis_client.get_connection() as redis:
+        assert 0 < await redis.ttl(f"event:{event['id']}") <= 60
+        assert 0 < await redis.ttl('newsfeed_events:123') <= 60
+
+
+async def test_redis_storage_expires_deletions(redis_dsn):
+    """Check that redis storage sets ttl of deletions."""
+    storage = _create_redis_storage(redis_dsn)
+    event = _create_event_data(newsfeed_id='123')
+    await storage.record_deletion('123', event['id'])
+
+    async with storage._redis_client.get_connection() as redis:
+        assert 0 < await redis.ttl(f"deleted_event:{event['id']}") <= 60
+
+
+def _create_redis_storage(redis_dsn, max_newsfeeds=1024, max_events_per_newsfeed=1024, ttl=0):
+    if not redis_dsn:
+        skip('TEST_REDIS_DSN environment variable is not set')
+    return RedisEventStorage(
+        config={
+            'dsn': redis_dsn,
+            'max_newsfeeds': max_newsfeeds,
+            'max_events_per_newsfeed': max_events_per_newsfeed,
+            'ttl': ttl,
+            'deletions_ttl': 60,
+        },
+        serializer=create_serializer(),
+        redis_client_manager=RedisClientManager(),
+    )
+
+
+def _create_in_memory_storage(max_newsfeeds=1024, max_events_per_newsfeed=1024, max_bytes=0, max_deletions=1024):
+    return InMemoryEventStorage(
+        config={
+            'max_newsfeeds': max_newsfeeds,
+            'max_events_per_newsfeed': max_events_per_newsfeed,
+            'max_bytes': max_bytes,
+            'deletions_ttl': 60,
+            'max_deletions': max_deletions,
+        },
+    )
+
+
+def _create_event_data(newsfeed_id):
+    return {
+        'id': str(uuid.uuid4()),
+        'newsfeed_id': newsfeed_id,
+        'data': {
+            'event_data': 'some_data',
+        },
+        'parent_fqid': None,
+        'first_seen_at': datetime.datetime.utcnow().timestamp(),
+        'published_at': datetime.datetime.utcnow().timestamp(),
+    }
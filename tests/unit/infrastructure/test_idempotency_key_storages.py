@@ -0,0 +1,63 @@
+"""Idempotency key storage tests."""
+
+from pytest import fixture, skip
+
+from newsfeed.infrastructure.idempotency_key_storages import (
+    InMemoryIdempotencyKeyStorage,
+    RedisIdempotencyKeyStorage,
+)
+from newsfeed.infrastructure.redis_clients import RedisClientManager
+from newsfeed.infrastructure.serializers import create_serializer
+
+
+@fixture(params=['memory', 'redis'])
+def storage(request, redis_dsn):
+    config = {
+        'ttl': 60,
+        'max_keys': 1024,
+    }
+    if request.param == 'redis':
+        if not redis_dsn:
+            skip('TEST_REDIS_DSN environment variable is not set')
+        return RedisIdempotencyKeyStorage(
+            config={'dsn': redis_dsn, **config},
+            serializer=create_serializer(),
+            redis_client_manager=RedisClientManager(),
+        )
+    return InMemoryIdempotencyKeyStorage(config=config)
+
+
+async def test_storage_add(storage):
+    """Check storage returns data added by known key."""
+    assert await storage.add('123:key', {'id': '1'}) is None
+    assert await storage.add('123:key', {'id': '2'}) == {'id': '1'}
+    assert await storage.add('124:key', {'id': '3'}) is None
+
+
+async def test_storage_delete(storage):
+    """Check deleted key could be used again."""
+    await storage.add('123:key', {'id': '1'})
+    await storage.delete('123:key')
+
+    assert await storage.add('123:key', {'id': '2'}) is None
+    assert await storage.add('123:key', {'id': '3'}) == {'id': '2'}
+
+
+async def test_in_memory_storage_expires_keys():
+    """Check in-memory storage forgets keys after ttl."""
+    storage = InMemoryIdempotencyKeyStorage(config={'ttl': 0, 'max_keys': 1024})
+
+    await storage.add('123:key', {'id': '1'})
+
+    assert await storage.add('123:key', {'id': '2'}) is None
+
+
+async def test_in_memory_storage_evicts_oldest_keys():
+    """Check in-memory storage keeps no more than maximum number of keys."""
+    storage = InMemoryIdempotencyKeyStorage(config={'ttl': 60, 'max_keys': 2})
+
+    for number in range(3):
+        await storage.add(f'123:key-{number}', {'id': str(number)})
+
+    assert await storage.add('123:key-0', {'id': '3'}) is None
+    assert await storage.add('123:key-2', {'id': '4'}) == {'id': '2'}
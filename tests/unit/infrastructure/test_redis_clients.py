@@ -0,0 +1,64 @@
+"""Redis client tests."""
+
+from pytest import skip
+
+from newsfeed.infrastructure.redis_clients import RedisClientManager
+
+
+DSN = 'redis://localhost:6379?db=0&connection_timeout=1&minsize=1&maxsize=1'
+
+
+def test_clients_are_shared_by_dsn_and_name(loop):
+    """Check that the same client is returned for the same dsn and name."""
+    manager = RedisClientManager()
+
+    client = manager.get_client(DSN)
+
+    assert manager.get_client(DSN) is client
+    assert manager.get_client(DSN, name='blocking') is not client
+    assert manager.get_client(DSN.replace('db=0', 'db=1')) is not client
+
+
+def test_metrics_mask_passwords(loop):
+    """Check that passwords of dsns are masked in metrics."""
+    manager = RedisClientManager()
+    manager.get_client(DSN.replace('localhost', ':secret@localhost'))
+
+    metrics = manager.get_metrics()
+
+    assert metrics[0]['dsn'] == DSN.replace('localhost', ':***@localhost')
+    assert metrics[0]['name'] == 'default'
+    assert metrics[0]['healthy'] is None
+
+
+async def test_start_prewarms_connections(redis_dsn):
+    """Check that starting of manager opens connections and checks health of clients."""
+    if not redis_dsn:
+        skip('TEST_REDIS_DSN environment variable is not set')
+    manager = RedisClientManager(health_check_interval=0)
+    client = manager.get_client(redis_dsn)
+
+    await manager.start()
+
+    metrics = manager.get_metrics()[0]
+    assert metrics['healthy'] is True
+    assert metrics['size'] >= metrics['minsize']
+    assert metrics['wait_time']['count'] == 1
+
+    async with client.get_connection() as redis:
+        assert await redis.ping() == 'PONG'
+    assert manager.get_metrics()[0]['wait_time']['count'] == 2
+
+    await manager.close()
+    assert manager.get_metrics() == []
+
+
+async def test_health_check_fails_on_unreachable_redis(loop):
+    """Check that unreachable redis is reported as unhealthy."""
+    manager = RedisClientManager(health_check_interval=0)
+    client = manager.get_client(DSN.replace('6379', '1'))
+
+    assert await client.check_health() is False
+    assert manager.get_metrics()[0]['healthy'] is False
+
+    await manager.close()
@@ -0,0 +1,89 @@
+"""Serializer tests."""
+
+import datetime
+import json
+import uuid
+
+from pytest import fixture, importorskip, raises
+
+from newsfeed.infrastructure.serializers import (
+    Serializer,
+    create_serializer,
+    BACKENDS,
+)
+
+
+@fixture(params=BACKENDS)
+def serializer(request):
+    if request.param != 'json':
+        importorskip(request.param)
+    return create_serializer(request.param)
+
+
+def test_serializer_output_is_the_same_as_standard_library_output(serializer):
+    """Check serializer output is byte-identical to output of standard library serializer."""
+    # Event data has no floats in exponent notation, backends format them differently
+    event_data = _create_event_data()
+
+    assert serializer.dumps(event_data) == Serializer().dumps(event_data)
+
+
+def test_serializer_output_is_the_same_json_as_standard_library_output(serializer):
+    """Check serializer output is the same JSON as output of standard library serializer."""
+    data = {
+        **_create_event_data(),
+        'floats': [1e16, 1.5e-7, -2.5e-300, 0.1, 1.0],
+    }
+
+    assert json.loads(serializer.dumps(data)) == json.loads(Serializer().dumps(data))
+
+
+def test_serializer_loads_dumped_data(serializer):
+    """Check serializer deserializes data that it has serialized."""
+    event_data = _create_event_data()
+
+    loaded_data = serializer.loads(serializer.dumps(event_data))
+    assert loaded_data == Serializer().loads(Serializer().dumps(event_data))
+    assert serializer.loads(serializer.dumps(event_data).decode('utf-8')) == loaded_data
+
+
+def test_serializer_falls_back_to_standard_library(serializer):
+    """Check serializer output for data that is not supported by every backend."""
+    data = {'big_integer': 2 ** 70, 1: 'non-string key'}
+
+    assert serializer.dumps(data) == b'{"big_integer":1180591620717411303424,"1":"non-string key"}'
+
+
+def test_serializer_raises_value_error_on_invalid_data(serializer):
+    """Check serializer deserialization of invalid data."""
+    with raises(ValueError):
+        serializer.loads('{"invalid": ')
+
+
+def test_create_serializer_unknown_backend():
+    """Check serializer creation with unknown backend."""
+    with raises(ValueError):
+        create_serializer('unknown')
+
+
+def _create_event_data():
+    return {
+        'id': str(uuid.uuid4()),
+        'newsfeed_id': '123',
+        'data': {
+            'title': 'Новини — “quoted” ✓',
+            'body': 'Line\nbreak, tab\t, control \x01 and escaped \\ / "',
+            'payload_id': 835,
+            'rating': 4.5,
+            'tags': ['a', 'b'],
+            'flag': True,
+            'nothing': None,
+        },
+        'parent_fqid': ('124', str(uuid.uuid4())),
+        'child_fqids': [
+            ('125', str(uuid.uuid4())),
+            ('126', str(uuid.uuid4())),
+        ],
+        'first_seen_at': datetime.datetime.utcnow().timestamp(),
+        'published_at': None,
+    }
@@ -0,0 +1,218 @@
+"""Subscription storage tests."""
+
+import datetime
+import uuid
+
+from pytest import fixture, raises, skip
+
+from newsfeed.infrastructure.subscription_storages import (
+    InMemorySubscriptionStorage,
+    RedisSubscriptionStorage,
+    SubscriptionNotFound,
+    SubscriptionBetweenNotFound,
+    SubscriptionNumberLimitExceeded,
+    NewsfeedNumberLimitExceeded,
+)
+from newsfeed.infrastructure.redis_clients import RedisClientManager
+from newsfeed.infrastructure.serializers import create_serializer
+
+
+@fixture(params=['memory', 'redis'])
+def create_storage(request, redis_dsn):
+    if request.param == 'redis' and not redis_dsn:
+        skip('TEST_REDIS_DSN environment variable is not set')
+
+    def _create_storage(max_newsfeeds=1024):
+        config = {
+            'max_newsfeeds': max_newsfeeds,
+            'max_subscriptions_per_newsfeed': 2,
+        }
+        if request.param == 'redis':
+            return RedisSubscriptionStorage(
+                config={'dsn': redis_dsn, **config},
+                serializer=create_serializer(),
+                redis_client_manager=RedisClientManager(),
+            )
+        return InMemorySubscriptionStorage(config=config)
+    return _create_storage
+
+
+@fixture
+def storage(create_storage):
+    return create_storage()
+
+
+async def test_storage_keeps_newest_subscriptions_first(storage):
+    """Check storage ordering."""
+    subscription_1 = _create_subscription_data(newsfeed_id='123', to_newsfeed_id='124')
+    subscription_2 = _create_subscription_data(newsfeed_id='123', to_newsfeed_id='125')
+    subscription_3 = _create_subscription_data(newsfeed_id='126', to_newsfeed_id='124')
+
+    await storage.add(subscription_1)
+    await storage.add(subscription_2)
+    await storage.add(subscription_3)
+
+    assert await storage.get_by_newsfeed_id('123') == [subscription_2, subscription_1]
+    assert await storage.get_by_to_newsfeed_id('124') == [subscription_3, subscription_1]
+
+
+async def test_storage_get_between(storage):
+    """Check storage lookup of subscription between newsfeeds."""
+    subscription = _create_subscription_data(newsfeed_id='123', to_newsfeed_id='124')
+
+    await storage.add(subscription)
+
+    assert await storage.get_between('123', '124') == subscription
+    with raises(SubscriptionBetweenNotFound):
+        await storage.get_between('124', '123')
+
+
+async def test_storage_delete_by_fqid(storage):
+    """Check storage subscription deletion."""
+    subscription_1 = _create_subscription_data(newsfeed_id='123', to_newsfeed_id='124')
+    subscription_2 = _create_subscription_data(newsfeed_id='125', to_newsfeed_id='124')
+
+    await storage.add(subscription_1)
+    await storage.add(subscription_2)
+    await storage.delete_by_fqid('123', subscription_1['id'])
+
+    assert await storage.get_by_newsfeed_id('123') == []
+    assert await storage.get_by_to_newsfeed_id('124') == [subscription_2]
+    with raises(SubscriptionNotFound):
+        await storage.get_by_fqid('123', subscription_1['id'])
+    with raises(SubscriptionBetweenNotFound):
+        await storage.get_between('123', '124')
+    with raises(SubscriptionNotFound):
+        await storage.delete_by_fqid('123', subscription_1['id'])
+
+
+async def test_storage_subscriptions_number_limit(storage):
+    """Check storage limit of subscriptions per newsfeed."""
+    await storage.add(_create_subscription_data(newsfeed_id='123', to_newsfeed_id='124'))
+    await storage.add(_create_subscription_data(newsfeed_id='123', to_newsfeed_id='125'))
+
+    with raises(SubscriptionNumberLimitExceeded):
+        await storage.add(_create_subscription_data(newsfeed_id='123', to_newsfeed_id='126'))
+
+
+async def test_storage_add_many(storage):
+    """Check storage bulk adding and lookup of existing subscriptions."""
+    subscription_1 = _create_subscription_data(newsfeed_id='123', to_newsfeed_id='124')
+    subscription_2 = _create_subscription_data(newsfeed_id='125', to_newsfeed_id='124')
+
+    await storage.add_many([subscription_1, subscription_2])
+
+    assert await storage.get_by_newsfeed_id('123') == [subscription_1]
+    assert await storage.get_by_to_newsfeed_id('124') == [subscription_2, subscription_1]
+    assert await storage.get_between('125', '124') == subscription_2
+    assert await storage.get_existing_between([('123', '124'), ('124', '123'), ('125', '124')]) == {
+        ('123', '124'),
+        ('125', '124'),
+    }
+
+
+async def test_storage_add_many_limits(storage):
+    """Check storage does not add any of subscriptions that exceed limits."""
+    await storage.add(_create_subscription_data(newsfeed_id='123', to_newsfeed_id='124'))
+
+    with raises(SubscriptionNumberLimitExceeded):
+        await storage.add_many([
+            _create_subscription_data(newsfeed_id='125', to_newsfeed_id='124'),
+            _create_subscription_data(newsfeed_id='123', to_newsfeed_id='125'),
+            _create_subscription_data(newsfeed_id='123', to_newsfeed_id='126'),
+        ])
+
+    assert len(await storage.get_by_newsfeed_id('123')) == 1
+    assert await storage.get_by_newsfeed_id('125') == []
+
+
+async def test_in_memory_storage_add_many_newsfeeds_number_limit():
+    """Check in-memory storage limit of newsfeeds number for bulk adding."""
+    storage = InMemorySubscriptionStorage(config={'max_newsfeeds': 2, 'max_subscriptions_per_newsfeed': 2})
+
+    await storage.add_many([
+        _create_subscription_data(newsfeed_id='123', to_newsfeed_id='124'),
+        _create_subscription_data(newsfeed_id='124', to_newsfeed_id='125'),
+    ])
+    await storage.add_many([_create_subscription_data(newsfeed_id='123', to_newsfeed_id='125')])
+
+    with raises(NewsfeedNumberLimitExceeded):
+        await storage.add_many([_create_subscription_data(newsfeed_id='125', to_newsfeed_id='123')])
+
+
+async def test_in_memory_storage_reads_do_not_count_to_newsfeeds_number_limit():
+    """Check that reading of unknown newsfeeds does not count them to the limit."""
+    storage = InMemorySubscriptionStorage(config={'max_newsfeeds': 3, 'max_subscriptions_per_newsfeed': 2})
+    subscription = _create_subscription_data(newsfeed_id='123', to_newsfeed_id='124')
+
+    assert await storage.get_by_newsfeed_id('125') == []
+    assert await storage.get_by_to_newsfeed_id('126') == []
+    with raises(SubscriptionNotFound):
+        await storage.get_by_fqid('127', subscription['id'])
+    with raises(SubscriptionNotFound):
+        await storage.delete_by_fqid('128', subscription['id'])
+
+    await storage.add(subscription)
+    await storage.add(_create_subscription_data(newsfeed_id='124', to_newsfeed_id='123'))
+    await storage.add(_create_subscription_data(newsfeed_id='125', to_newsfeed_id='123'))
+    with raises(NewsfeedNumberLimitExceeded):
+        await storage.add(_create_subscription_data(newsfeed_id='126', to_newsfeed_id='123'))
+
+    await storage.delete_by_fqid('123', subscription['id'])
+    await storage.add(_create_subscription_data(newsfeed_id='126', to_newsfeed_id='123'))
+
+
+async def test_storage_delete_many(storage):
+    """Check storage bulk deletion."""
+    subscription_1 = _create_subscription_data(newsfeed_id='123', to_newsfeed_id='124')
+    subscription_2 = _create_subscription_data(newsfeed_id='125', to_newsfeed_id='124')
+    await storage.add_many([subscription_1, subscription_2])
+
+    assert await storage.delete_many([
+        ('123', subscription_1['id']),
+        ('123', subscription_2['id']),
+        ('125', subscription_2['id']),
+    ]) == [True, False, True]
+
+    assert await storage.get_by_to_newsfeed_id('124') == []
+    assert await storage.get_existing_between([('123', '124'), ('125', '124')]) == set()
+
+
+async def test_storage_deletion_frees_newsfeeds_number_limit(create_storage):
+    """Check that newsfeed stops counting to the limit when its last subscription is deleted."""
+    storage = create_storage(max_newsfeeds=2)
+    subscription_1 = _create_subscription_data(newsfeed_id='123', to_newsfeed_id='124')
+    subscription_2 = _create_subscription_data(newsfeed_id='123', to_newsfeed_id='125')
+    subscription_3 = _create_subscription_data(newsfeed_id='124', to_newsfeed_id='123')
+    await storage.add_many([subscription_1, subscription_2, subscription_3])
+
+    await storage.delete_by_fqid('123', subscription_1['id'])
+    with raises(NewsfeedNumberLimitExceeded):
+        await storage.add(_create_subscription_data(newsfeed_id='125', to_newsfeed_id='123'))
+
+    await storage.delete_by_fqid('123', subscription_2['id'])
+    await storage.add(_create_subscription_data(newsfeed_id='125', to_newsfeed_id='123'))
+
+    assert await storage.delete_many([('124', subscription_3['id'])]) == [True]
+    await storage.add(_create_subscription_data(newsfeed_id='126', to_newsfeed_id='123'))
+    with raises(NewsfeedNumberLimitExceeded):
+        await storage.add(_create_subscription_data(newsfeed_id='127', to_newsfeed_id='123'))
+
+
+def test_container_selects_storage_by_dsn(container):
+    """Check selection of subscription storage by its dsn."""
+    assert isinstance(container.subscription_storage(), InMemorySubscriptionStorage)
+
+    container.config.infrastructure.subscription_storage.dsn.from_value(
+        'redis://localhost:6379?db=0&connection_timeout=5&minsize=1&maxsize=4',
+    )
+    assert isinstance(container.subscription_storage(), RedisSubscriptionStorage)
+
+
+def _create_subscription_data(newsfeed_id, to_newsfeed_id):
+    return {
+        'id': str(uuid.uuid4()),
+        'newsfeed_id': newsfeed_id,
+        'to_newsfeed_id': to_newsfeed_id,
+        'subscribed_at': datetime.datetime.utcnow().timestamp(),
+    }
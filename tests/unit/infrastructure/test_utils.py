@@ -0,0 +1,24 @@
+"""Infrastructure utils tests."""
+
+import uuid
+
+from newsfeed.infrastructure.utils import pack_fqids, unpack_fqids
+
+
+def test_pack_fqids():
+    """Check packing of FQIDs."""
+    fqids = [
+        ('124', str(uuid.uuid4())),
+        ('Новини', str(uuid.uuid4())),
+        ('124', str(uuid.uuid4())),
+    ]
+
+    packed_fqids = pack_fqids(fqids)
+
+    assert unpack_fqids(packed_fqids) == fqids
+    assert len(packed_fqids) < len(str(fqids))
+
+
+def test_pack_no_fqids():
+    """Check packing of empty FQIDs list."""
+    assert unpack_fqids(pack_fqids([])) == []
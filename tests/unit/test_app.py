@@ -0,0 +1,67 @@
+"""Application tests."""
+
+import asyncio
+
+from pytest import fixture
+
+from newsfeed.app import create_app
+from newsfeed.containers import create_container
+from newsfeed.domain.event_processor import EventProcessorService
+
+
+@fixture
+def event_processors(monkeypatch):
+    event_processors = []
+    start_processing = EventProcessorService.start_processing
+
+    def start_processing_tracked(self):
+        event_processors.append(self)
+        start_processing(self)
+
+    monkeypatch.setattr(EventProcessorService, 'start_processing', start_processing_tracked)
+    return event_processors
+
+
+@fixture
+def app(loop):
+    yield from _create_app(loop, run_processors=True)
+
+
+@fixture
+def app_without_processors(loop):
+    yield from _create_app(loop, run_processors=False)
+
+
+async def test_app_starts_and_stops_processors(aiohttp_client, app, event_processors):
+    """Check application starts event processors on startup and stops them on cleanup."""
+    client = await aiohttp_client(app)
+
+    assert len(event_processors) == 1
+    tasks = list(event_processors[0]._tasks)
+    assert len(tasks) == app.container.config.domain.processor_concurrency()
+    assert not any(task.done() for task in tasks)
+
+    await client.close()
+
+    assert event_processors[0]._tasks == []
+    await asyncio.gather(*tasks, return_exceptions=True)
+    assert all(task.cancelled() for task in tasks)
+
+
+async def test_app_does_not_start_processors(aiohttp_client, app_without_processors, event_processors):
+    """Check application does not start event processors if ``run_processors`` is disabled."""
+    client = await aiohttp_client(app_without_processors)
+
+    response = await client.get('/status/')
+    assert response.status == 200
+    assert event_processors == []
+
+
+def _create_app(loop, run_processors):
+    container = create_container()
+    container.config.webapi.run_processors.from_value(run_processors)
+    # Container configures its own event loop, while application is run by test loop
+    asyncio.set_event_loop(loop)
+    app = create_app(container)
+    yield app
+    app.container.unwire()
@@ -0,0 +1,57 @@
+"""Standalone event processor tests."""
+
+import asyncio
+import os
+import signal
+
+from newsfeed import processor
+from newsfeed.containers import create_container
+from newsfeed.domain.event_processor import EventProcessorService
+
+
+def test_run_processor(monkeypatch):
+    """Check standalone processor processes events until SIGTERM and stops its processors."""
+    containers = []
+    event_processors = []
+    start_processing = EventProcessorService.start_processing
+
+    def create_container_publishing_event():
+        container = create_container()
+        containers.append(container)
+        asyncio.get_event_loop().create_task(_publish_event_and_terminate(container))
+        return container
+
+    def start_processing_tracked(self):
+        event_processors.append(self)
+        start_processing(self)
+
+    monkeypatch.setattr(processor, 'create_container', create_container_publishing_event)
+    monkeypatch.setattr(EventProcessorService, 'start_processing', start_processing_tracked)
+
+    processor.run_processor()
+
+    loop = asyncio.get_event_loop()
+    try:
+        events = loop.run_until_complete(containers[0].event_repository().get_by_newsfeed_id('123'))
+        assert [event.data for event in events] == [{'event_data': 'some_data'}]
+
+        assert len(event_processors) == 1
+        assert event_processors[0]._tasks == []
+        assert not asyncio.all_tasks(loop)
+    finally:
+        loop.close()
+
+
+async def _publish_event_and_terminate(container):
+    await container.event_dispatcher_service().dispatch_new_event(
+        newsfeed_id='123',
+        data={
+            'event_data': 'some_data',
+        },
+    )
+    event_repository = container.event_repository()
+    for _ in range(100):
+        if await event_repository.get_by_newsfeed_id('123'):
+            break
+        await asyncio.sleep(0.01)
+    os.kill(os.getpid(), signal.SIGTERM)
@@ -0,0 +1,126 @@
+"""Supervisor tests."""
+
+import os
+import signal
+import threading
+import time
+
+from pytest import fixture
+
+from newsfeed.supervisor import Supervisor
+
+
+@fixture(autouse=True)
+def signal_handlers():
+    handlers = {signal_number: signal.getsignal(signal_number) for signal_number in (signal.SIGINT, signal.SIGTERM)}
+    yield
+    for signal_number, handler in handlers.items():
+        signal.signal(signal_number, handler)
+
+
+def test_supervisor_restarts_exited_processes(tmp_path):
+    """Check supervisor restarts processes that exit or raise, waiting ``restart_delay`` before it."""
+    supervisor = _create_supervisor(
+        targets={
+            'exiting': (_exit, (str(tmp_path / 'exiting'),)),
+            'raising': (_raise, (str(tmp_path / 'raising'),)),
+        },
+        restart_delay=0.3,
+    )
+
+    _run_until(supervisor, lambda: all(_count_lines(tmp_path / name) >= 2 for name in ('exiting', 'raising')))
+
+    for name in ('exiting', 'raising'):
+        started_at = _read_lines(tmp_path / name, float)
+        assert len(started_at) >= 2
+        assert all(
+            next_started_at - previous_started_at >= 0.3
+            for previous_started_at, next_started_at in zip(started_at, started_at[1:])
+        )
+
+
+def test_supervisor_stops_processes(tmp_path):
+    """Check supervisor terminates running processes on stop and kills the ones that ignore it."""
+    supervisor = _create_supervisor(
+        targets={
+            'running': (_run_forever, (str(tmp_path / 'running'), False)),
+            'ignoring_termination': (_run_forever, (str(tmp_path / 'ignoring_termination'), True)),
+        },
+        shutdown_timeout=0.5,
+    )
+
+    _run_until(supervisor, lambda: all(
+        _count_lines(tmp_path / name) == 1 for name in ('running', 'ignoring_termination')
+    ))
+
+    processes = supervisor._processes
+    assert not any(process.is_alive() for process in processes.values())
+    assert processes['running'].exitcode == -signal.SIGTERM
+    assert processes['ignoring_termination'].exitcode == -signal.SIGKILL
+    assert len(_read_lines(tmp_path / 'running', int)) == 1
+    assert len(_read_lines(tmp_path / 'ignoring_termination', int)) == 1
+
+
+def _create_supervisor(targets, restart_delay=0.1, shutdown_timeout=1):
+    supervisor = Supervisor(
+        port=8000,
+        workers=1,
+        dedicated_processor=False,
+        run_processors=False,
+        restart_delay=restart_delay,
+        shutdown_timeout=shutdown_timeout,
+    )
+    supervisor._get_targets = lambda: targets
+    return supervisor
+
+
+def _run_until(supervisor, condition, timeout=10):
+    is_finished = threading.Event()
+
+    def stop_when_condition_is_met():
+        deadline = time.monotonic() + timeout
+        while not is_finished.is_set() and not condition() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        supervisor.stop()
+
+    thread = threading.Thread(target=stop_when_condition_is_met)
+    thread.start()
+    try:
+        supervisor.run()
+    finally:
+        is_finished.set()
+        thread.join()
+
+
+def _count_lines(path):
+    if not path.exists():
+        return 0
+    return len(_read_lines(path, str))
+
+
+def _read_lines(path, type_):
+    with open(path) as file:
+        return [type_(line) for line in file.read().split()]
+
+
+def _record_start(path):
+    with open(path, 'a') as file:
+        file.write(f'{time.time()}\n')
+
+
+def _exit(path):
+    _record_start(path)
+
+
+def _raise(path):
+    _record_start(path)
+    raise RuntimeError('Process has failed')
+
+
+def _run_forever(path, ignore_termination):
+    if ignore_termination:
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    with open(path, 'a') as file:
+        file.write(f'{os.getpid()}\n')
+    while True:
+        time.sleep(1)